@@ -1,6 +1,8 @@
 """Core Agent implementation"""
 
 from .agent import Agent, AgentConfig
+from .context import ContextManager
+from .executor import ToolExecutor
 from .tool import Tool, ToolSchema
 from .memory import MemoryProvider
 from .state import State
@@ -8,8 +10,10 @@ from .state import State
 __all__ = [
     "Agent",
     "AgentConfig",
+    "ContextManager",
     "Tool",
     "ToolSchema",
+    "ToolExecutor",
     "MemoryProvider",
     "State",
 ]
@@ -1,13 +1,19 @@
 """Core Agent class with ReAct reasoning"""
 from dataclasses import dataclass, field
-from typing import Any, Dict, List, Optional
+from typing import Any, AsyncIterator, Dict, List, Optional
 import asyncio
+import inspect
 import uuid
 from datetime import datetime
 
 try:
     from ..llm.base import BaseLLMClient
     from .tool import Tool
+    from .parser import ToolCallParser
+    from .singleflight import tool_flights
+    from .deadline import deadline, run_with_deadline
+    from .run import Run, agent_run
+    from .context import ContextManager
     from .memory import MemoryProvider
     from .state import State
 except ImportError:
@@ -22,6 +28,12 @@ class AgentConfig:
     enable_sandbox: bool = True
     max_cost: float = 1.0
     temperature: float = 0.7
+    parallel_tool_calls: bool = True
+    max_tool_concurrency: int = 4
+    native_tool_calls: bool = True
+    context_max_tokens: Optional[int] = None  # Prompt budget; oldest turns dropped beyond it
+    context_keep_recent_turns: int = 2  # Newest turns are never compacted
+    observation_max_tokens: Optional[int] = 1000  # Older observations are truncated to this
 
 
 @dataclass
@@ -41,41 +53,30 @@ class Agent:
         if not self.id:
             self.id = f"agent_{uuid.uuid4().hex[:8]}"
         self.state = State()
-        self.iteration_count = 0
-        self.total_cost = 0.0
+        self.total_cost = 0.0  # Lifetime spend across runs; ``max_cost`` applies per run
+        self.last_run: Optional[Run] = None
     
     async def execute(self, task: str, context: Optional[Dict] = None) -> Dict[str, Any]:
-        """Execute task using ReAct reasoning loop"""
-        self.iteration_count = 0
-        self.state.update({"task": task, "status": "running"})
+        """Execute task using ReAct reasoning loop
+        
+        The whole task, including memory and tool calls, must finish within
+        ``config.timeout_seconds``; the deadline is visible to the LLM layer.
+        """
+        run = self._start_run(task)
         
         try:
-            # Memory retrieval
-            if self.memory:
-                memories = await self.memory.retrieve(task, k=5)
-                context = context or {}
-                context["memories"] = memories
-            
-            # Build messages
-            messages = self._build_messages(task, context)
-            
-            # Execute ReAct loop
-            result = await self._react_loop(messages)
-            
-            # Store experience
-            if self.memory:
-                await self.memory.store({
-                    "task": task,
-                    "content": result,
-                    "timestamp": datetime.now().isoformat()
-                })
+            with agent_run(run), deadline(self.config.timeout_seconds):
+                result = await run_with_deadline(
+                    self._run(task, run, context), self._timeout_message()
+                )
             
             self.state.update({"status": "completed"})
             return {
                 "success": True,
                 "output": result,
-                "iterations": self.iteration_count,
-                "cost": self.total_cost
+                "iterations": run.iterations,
+                "cost": run.cost,
+                "usage": self.usage_summary(run)
             }
             
         except Exception as e:
@@ -83,8 +84,108 @@ class Agent:
             return {
                 "success": False,
                 "error": str(e),
-                "iterations": self.iteration_count
+                "iterations": run.iterations,
+                "usage": self.usage_summary(run)
             }
+        finally:
+            await self._end_run(run)
+    
+    async def execute_stream(
+        self, task: str, context: Optional[Dict] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Execute task, yielding ReAct events as they happen.
+        
+        Event types: ``token`` (model output delta), ``thought`` (full assistant
+        message that led to tool calls), ``tool_call``, ``observation``, and a
+        terminal ``final`` or ``error`` event mirroring ``execute``'s result.
+        """
+        run = self._start_run(task)
+        
+        try:
+            with agent_run(run), deadline(self.config.timeout_seconds):
+                messages = await run_with_deadline(
+                    self._prepare_messages(task, context), self._timeout_message()
+                )
+                
+                result = ""
+                events = self._react_events(messages, run, stream=True)
+                while True:
+                    try:
+                        event = await run_with_deadline(
+                            events.__anext__(), self._timeout_message()
+                        )
+                    except StopAsyncIteration:
+                        break
+                    if event["type"] == "final":
+                        result = event["content"]
+                    else:
+                        yield event
+                
+                await run_with_deadline(self._remember(task, result), self._timeout_message())
+            
+            self.state.update({"status": "completed"})
+            yield {
+                "type": "final",
+                "content": result,
+                "iterations": run.iterations,
+                "cost": run.cost,
+                "usage": self.usage_summary(run)
+            }
+            
+        except Exception as e:
+            self.state.update({"status": "failed", "error": str(e)})
+            yield {
+                "type": "error",
+                "error": str(e),
+                "iterations": run.iterations,
+                "usage": self.usage_summary(run)
+            }
+        finally:
+            await self._end_run(run)
+    
+    async def _run(self, task: str, run: Run, context: Optional[Dict] = None) -> str:
+        """Prepare context, run the ReAct loop and remember the outcome"""
+        messages = await self._prepare_messages(task, context)
+        
+        # Execute ReAct loop
+        result = await self._react_loop(messages, run)
+        
+        await self._remember(task, result)
+        return result
+    
+    def _start_run(self, task: str) -> Run:
+        """Fresh bookkeeping for one execution; concurrent runs each get their own"""
+        run = Run(f"{self.id}:{uuid.uuid4().hex[:8]}")
+        self.last_run = run
+        self.state.update({"task": task, "status": "running"})
+        return run
+    
+    async def _end_run(self, run: Run) -> None:
+        """Let tools release per-run state, e.g. sandbox sessions"""
+        await asyncio.gather(
+            *(tool.end_run(run.id) for tool in self.tools), return_exceptions=True
+        )
+    
+    def _timeout_message(self) -> str:
+        return f"Task timed out after {self.config.timeout_seconds}s"
+    
+    async def _prepare_messages(self, task: str, context: Optional[Dict] = None) -> List[Dict]:
+        """Retrieve memories and build the initial conversation"""
+        if self.memory:
+            memories = await self.memory.retrieve(task, k=5)
+            context = context or {}
+            context["memories"] = memories
+        
+        return self._build_messages(task, context)
+    
+    async def _remember(self, task: str, result: str) -> None:
+        """Store the experience in memory"""
+        if self.memory:
+            await self.memory.store({
+                "task": task,
+                "content": result,
+                "timestamp": datetime.now().isoformat()
+            })
     
     def _build_messages(self, task: str, context: Optional[Dict] = None) -> List[Dict]:
         """Build LLM messages with tools and context"""
@@ -94,7 +195,7 @@ class Agent:
             memories_text = "\n".join([m["content"] for m in context["memories"]])
             messages.append({"role": "system", "content": f"Relevant memories:\n{memories_text}"})
         
-        if self.tools:
+        if self.tools and not self._use_native_tools():
             tools_text = self._format_tools()
             messages.append({"role": "system", "content": f"Available tools:\n{tools_text}"})
         
@@ -105,102 +206,242 @@ class Agent:
         """Format tools for prompt"""
         return "\n".join([f"- {t.name}: {t.description}" for t in self.tools])
     
-    async def _react_loop(self, messages: List[Dict]) -> str:
+    async def _react_loop(self, messages: List[Dict], run: Run) -> str:
         """ReAct: Thought → Action → Observation loop"""
+        async for event in self._react_events(messages, run):
+            if event["type"] == "final":
+                return event["content"]
+        return ""
+    
+    async def _react_events(
+        self, messages: List[Dict], run: Run, stream: bool = False
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Run the ReAct loop as a stream of events, ending with ``final``"""
         conversation = messages.copy()
+        context = self._context_manager()
+        removed = 0
         
-        while self.iteration_count < self.config.max_iterations:
-            self.iteration_count += 1
+        generate_kwargs: Dict[str, Any] = {"temperature": self.config.temperature}
+        if self._use_native_tools():
+            generate_kwargs["tools"] = self.tool_schemas
+        
+        while run.iterations < self.config.max_iterations:
+            run.iterations += 1
+            removed += context.compact(conversation)
             
-            response = await self.model_client.generate(
-                messages=conversation,
-                temperature=self.config.temperature
-            )
+            if stream:
+                response: Dict[str, Any] = {}
+                async for chunk in self.model_client.stream(
+                    messages=conversation,
+                    **generate_kwargs
+                ):
+                    if chunk.get("done"):
+                        response = chunk["response"]
+                    elif chunk.get("content"):
+                        yield {
+                            "type": "token",
+                            "content": chunk["content"],
+                            "iteration": run.iterations
+                        }
+            else:
+                response = await self.model_client.generate(
+                    messages=conversation,
+                    **generate_kwargs
+                )
             
             self.total_cost += response.get("cost", 0)
+            run.cost += response.get("cost", 0)
+            self._record_usage(run, response, tokens_saved=removed)
             
-            if self.total_cost > self.config.max_cost:
-                raise Exception(f"Cost limit exceeded: ${self.total_cost:.2f}")
+            if run.cost > self.config.max_cost:
+                raise Exception(f"Cost limit exceeded: ${run.cost:.2f}")
             
             content = response["content"]
-            conversation.append({"role": "assistant", "content": content})
+            native_calls = response.get("tool_calls") or []
+            assistant_message: Dict[str, Any] = {"role": "assistant", "content": content}
+            if native_calls:
+                assistant_message["tool_calls"] = native_calls
+            conversation.append(assistant_message)
+            
+            if not native_calls and self._is_task_complete(content):
+                yield {"type": "final", "content": content}
+                return
             
-            if self._is_task_complete(content):
-                return content
+            if native_calls:
+                tool_calls = self.tool_parser.parse_structured(native_calls)
+            else:
+                tool_calls = self._extract_tool_calls(content)
             
-            if tool_calls := self._extract_tool_calls(content):
+            if tool_calls or native_calls:
+                yield {"type": "thought", "content": content, "iteration": run.iterations}
                 for tool_call in tool_calls:
-                    observation = await self._execute_tool(tool_call)
-                    conversation.append({
-                        "role": "user",
-                        "content": f"Observation: {observation}"
-                    })
+                    yield {
+                        "type": "tool_call",
+                        "tool": tool_call["tool"].name,
+                        "params": tool_call["params"]
+                    }
+                observations = await self._execute_tool_calls(tool_calls)
+                for tool_call, observation in zip(tool_calls, observations):
+                    yield {
+                        "type": "observation",
+                        "tool": tool_call["tool"].name,
+                        "content": observation
+                    }
+                    if tool_call.get("id"):
+                        conversation.append({
+                            "role": "tool",
+                            "tool_call_id": tool_call["id"],
+                            "content": observation
+                        })
+                    else:
+                        conversation.append({
+                            "role": "user",
+                            "content": f"Observation: {observation}"
+                        })
+                # Every native call needs a reply, including ones we could not run
+                answered = {tool_call.get("id") for tool_call in tool_calls}
+                for call in native_calls:
+                    if call.get("id") not in answered:
+                        name = call.get("function", {}).get("name")
+                        conversation.append({
+                            "role": "tool",
+                            "tool_call_id": call.get("id"),
+                            "content": f"Tool {name} error: unknown tool or invalid arguments"
+                        })
             else:
-                return content
+                yield {"type": "final", "content": content}
+                return
         
         raise Exception(f"Max iterations ({self.config.max_iterations}) exceeded")
     
+    def _context_manager(self) -> ContextManager:
+        return ContextManager(
+            max_tokens=self.config.context_max_tokens,
+            keep_recent_turns=self.config.context_keep_recent_turns,
+            max_observation_tokens=self.config.observation_max_tokens,
+            model=getattr(self.model_client, "model", None)
+        )
+    
+    def _record_usage(self, run: Run, response: Dict[str, Any], tokens_saved: int = 0) -> None:
+        """Log one model call's tokens and cost for ``run``
+        
+        ``tokens_saved`` is how many prompt tokens context compaction kept
+        out of this call.
+        """
+        usage = response.get("usage") or {}
+        entry = {
+            "iteration": run.iterations,
+            "prompt_tokens": usage.get("prompt_tokens", 0),
+            "completion_tokens": usage.get("completion_tokens", response.get("tokens", 0)),
+            "cached_tokens": usage.get("cached_tokens", 0),
+            "tokens_saved": tokens_saved,
+            "cost": response.get("cost", 0)
+        }
+        if usage.get("estimated"):
+            entry["estimated"] = True
+        if response.get("cached") or response.get("coalesced"):
+            entry["cached"] = True
+        run.usage_log.append(entry)
+    
+    def usage_summary(self, run: Optional[Run] = None) -> Dict[str, Any]:
+        """Token and cost totals for ``run`` (default: the latest), with per-iteration detail"""
+        usage_log = (run or self.last_run or Run("")).usage_log
+        totals = {
+            name: sum(entry[name] for entry in usage_log)
+            for name in ("prompt_tokens", "completion_tokens", "cached_tokens", "tokens_saved", "cost")
+        }
+        totals["total_tokens"] = totals["prompt_tokens"] + totals["completion_tokens"]
+        totals["iterations"] = list(usage_log)
+        return totals
+    
     def _is_task_complete(self, response: str) -> bool:
         """Check for task completion markers"""
         markers = ["final answer", "task complete", "conclusion", "finished"]
         return any(marker in response.lower() for marker in markers)
     
+    def _refresh_tool_cache(self) -> None:
+        """Rebuild the parser and function schemas when the tool set changes"""
+        key = tuple(id(tool) for tool in self.tools)
+        if getattr(self, "_tool_cache_key", None) != key:
+            self._tool_parser = ToolCallParser(self.tools)
+            self._tool_schemas = [tool.function_schema() for tool in self.tools]
+            self._tool_cache_key = key
+    
+    @property
+    def tool_parser(self) -> ToolCallParser:
+        """Parser for the current tool set"""
+        self._refresh_tool_cache()
+        return self._tool_parser
+    
+    @property
+    def tool_schemas(self) -> List[Dict[str, Any]]:
+        """Native function-calling schemas for the current tool set"""
+        self._refresh_tool_cache()
+        return self._tool_schemas
+    
+    def _use_native_tools(self) -> bool:
+        """Whether tools are sent as schemas instead of described in the prompt"""
+        return bool(
+            self.tools
+            and self.config.native_tool_calls
+            and getattr(self.model_client, "supports_tools", False)
+        )
+    
     def _extract_tool_calls(self, response: str) -> List[Dict]:
-        """Extract tool calls using AST parsing"""
-        import re
-        import ast
-        import inspect
-        
-        tool_calls = []
-        for tool in self.tools:
-            # Match tool_name(...) handling multiline args
-            # We use a simplified regex to find the start, then let AST handle parsing
-            # This regex finds "tool_name(" and captures until ")"
-            # Note: This is still a bit fragile for nested parens, but better than before
-            pattern = rf"{tool.name}\s*\((?:[^)(]|\((?:[^)(]+|\([^)(]*\))*\))*\)"
-            
-            for match in re.finditer(pattern, response, re.IGNORECASE):
-                call_str = match.group(0)
-                try:
-                    # Parse the call string
-                    tree = ast.parse(call_str, mode='eval')
-                    if not isinstance(tree.body, ast.Call):
-                        continue
-                        
-                    # Extract arguments
-                    params = {}
-                    
-                    # Handle keyword args (key=value)
-                    for kw in tree.body.keywords:
-                        params[kw.arg] = ast.literal_eval(kw.value)
-                    
-                    # Handle positional args
-                    if tree.body.args:
-                        # Inspect tool signature to map positional args to names
-                        sig = inspect.signature(tool.execute)
-                        param_names = list(sig.parameters.keys())
-                        
-                        for i, arg in enumerate(tree.body.args):
-                            if i < len(param_names):
-                                params[param_names[i]] = ast.literal_eval(arg)
-                    
-                    tool_calls.append({"tool": tool, "params": params})
-                    
-                except Exception:
-                    # Fallback or ignore invalid calls
-                    continue
-                    
-        return tool_calls
+        """Extract tool calls written in free text"""
+        return self.tool_parser.parse(response)
+    
+    async def _execute_tool_calls(self, tool_calls: List[Dict]) -> List[str]:
+        """Execute one turn's tool calls, returning observations in call order.
+
+        With ``parallel_tool_calls`` enabled, consecutive calls run concurrently
+        (bounded by ``max_tool_concurrency``). A tool flagged ``serial`` acts as a
+        barrier: it waits for earlier calls and runs alone.
+        """
+        if not self.config.parallel_tool_calls or len(tool_calls) < 2:
+            return [await self._execute_tool(tool_call) for tool_call in tool_calls]
+        
+        semaphore = asyncio.Semaphore(max(1, self.config.max_tool_concurrency))
+        
+        async def run(tool_call: Dict) -> str:
+            async with semaphore:
+                return await self._execute_tool(tool_call)
+        
+        observations: List[str] = []
+        batch: List[Dict] = []
+        for tool_call in tool_calls:
+            if tool_call["tool"].serial:
+                if batch:
+                    observations.extend(await asyncio.gather(*(run(c) for c in batch)))
+                    batch = []
+                observations.append(await self._execute_tool(tool_call))
+            else:
+                batch.append(tool_call)
+        if batch:
+            observations.extend(await asyncio.gather(*(run(c) for c in batch)))
+        return observations
     
     async def _execute_tool(self, tool_call: Dict) -> str:
         """Execute tool and return observation"""
         tool = tool_call["tool"]
+        params = tool_call["params"]
         try:
-            result = await tool.execute(**tool_call["params"])
+            if tool.coalesce:
+                result, _ = await tool_flights.do(
+                    tool.call_key(params), lambda: self._invoke_tool(tool, params)
+                )
+            else:
+                result = await self._invoke_tool(tool, params)
             return f"Tool {tool.name} returned: {result}"
         except Exception as e:
             return f"Tool {tool.name} error: {str(e)}"
     
+    async def _invoke_tool(self, tool: Tool, params: Dict[str, Any]) -> Any:
+        """Await an async tool; run a synchronous one on the tool executor"""
+        if inspect.iscoroutinefunction(tool.execute):
+            return await tool.execute(**params)
+        return await tool.run_blocking(tool.execute, **params)
+    
     def get_state(self) -> Dict:
         """Get current agent state"""
         return self.state.to_dict()
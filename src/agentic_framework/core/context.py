@@ -0,0 +1,126 @@
+"""Context-window management for the ReAct conversation"""
+from typing import Any, Callable, Dict, List, Optional
+
+try:
+    from ..llm.usage import count_tokens
+except ImportError:
+    pass
+
+
+class ContextManager:
+    """Keep a growing ReAct conversation within a token budget.
+
+    The preamble (system messages and the task) is never touched, so the
+    prompt prefix stays stable across iterations. Everything after it is
+    grouped into turns: an assistant message plus the observations that
+    answer it. Compaction is applied in place, in two steps:
+
+    1. Observations outside the ``keep_recent_turns`` newest turns are cut
+       to ``max_observation_tokens`` (or passed to ``summarizer``). A
+       compacted message is never touched again, so it is identical in
+       every later prompt.
+    2. If the conversation still exceeds ``max_tokens``, the oldest turns
+       are dropped whole (keeping tool calls paired with their replies)
+       and replaced by a single note.
+
+    ``compact`` returns the number of tokens removed.
+    """
+
+    def __init__(
+        self,
+        max_tokens: Optional[int] = None,
+        keep_recent_turns: int = 2,
+        max_observation_tokens: Optional[int] = 1000,
+        summarizer: Optional[Callable[[str], str]] = None,
+        model: Optional[str] = None
+    ):
+        self.max_tokens = max_tokens
+        self.keep_recent_turns = keep_recent_turns
+        self.max_observation_tokens = max_observation_tokens
+        self.summarizer = summarizer
+        self.model = model
+        self.dropped_turns = 0
+        self._compacted: Dict[int, Dict[str, Any]] = {}  # Holds refs so ids stay unique
+        self._marker: Optional[Dict[str, Any]] = None
+
+    def count(self, message: Dict[str, Any]) -> int:
+        return count_tokens(str(message.get("content") or ""), self.model)
+
+    def compact(self, conversation: List[Dict[str, Any]]) -> int:
+        """Compact ``conversation`` in place; return the tokens removed"""
+        start = self._preamble_length(conversation)
+        turns = self._turns(conversation, start)
+        removed = 0
+
+        if self.max_observation_tokens is not None:
+            for turn in turns[:max(0, len(turns) - self.keep_recent_turns)]:
+                for message in turn[1:]:
+                    removed += self._shrink(message)
+
+        if self.max_tokens is not None:
+            total = sum(self.count(message) for message in conversation)
+            if total > self.max_tokens and self._marker is None:
+                total += self.count({"content": self._note(len(turns))})
+            droppable = max(0, len(turns) - self.keep_recent_turns)
+            drop = 0
+            while total > self.max_tokens and drop < droppable:
+                freed = sum(self.count(message) for message in turns[drop])
+                total -= freed
+                removed += freed
+                drop += 1
+            if drop:
+                dropped = [message for turn in turns[:drop] for message in turn]
+                ids = {id(message) for message in dropped}
+                conversation[:] = [m for m in conversation if id(m) not in ids]
+                self.dropped_turns += drop
+                removed += self._update_marker(conversation, start)
+        return removed
+
+    def _preamble_length(self, conversation: List[Dict[str, Any]]) -> int:
+        for i, message in enumerate(conversation):
+            if message.get("role") == "user":
+                end = i + 1
+                if end < len(conversation) and conversation[end] is self._marker:
+                    end += 1
+                return end
+        return len(conversation)
+
+    def _turns(self, conversation: List[Dict[str, Any]], start: int) -> List[List[Dict[str, Any]]]:
+        turns: List[List[Dict[str, Any]]] = []
+        for message in conversation[start:]:
+            if message.get("role") == "assistant" or not turns:
+                turns.append([message])
+            else:
+                turns[-1].append(message)
+        return turns
+
+    def _shrink(self, message: Dict[str, Any]) -> int:
+        if id(message) in self._compacted or not isinstance(message.get("content"), str):
+            return 0
+        self._compacted[id(message)] = message
+        before = self.count(message)
+        if before <= self.max_observation_tokens:
+            return 0
+        text = message["content"]
+        if self.summarizer is not None:
+            message["content"] = self.summarizer(text)
+        else:
+            keep = int(len(text) * self.max_observation_tokens / before)
+            message["content"] = (
+                f"{text[:keep]}... [truncated {before - self.max_observation_tokens} tokens]"
+            )
+        return max(0, before - self.count(message))
+
+    def _update_marker(self, conversation: List[Dict[str, Any]], start: int) -> int:
+        """Insert or refresh the note standing in for dropped turns; return its cost"""
+        note = self._note(self.dropped_turns)
+        if self._marker is None:
+            self._marker = {"role": "system", "content": note}
+            conversation.insert(start, self._marker)
+            return -self.count(self._marker)
+        self._marker["content"] = note
+        return 0
+
+    @staticmethod
+    def _note(dropped: int) -> str:
+        return f"[{dropped} earlier reasoning steps were omitted to fit the context window]"
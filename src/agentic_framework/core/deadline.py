@@ -0,0 +1,49 @@
+"""Task deadlines propagated through the call stack"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from typing import Awaitable, Iterator, Optional, TypeVar
+import asyncio
+import time
+
+T = TypeVar("T")
+
+_deadline: ContextVar[Optional[float]] = ContextVar("agentic_framework_deadline", default=None)
+
+
+class DeadlineExceeded(asyncio.TimeoutError):
+    """The enclosing task ran out of time"""
+
+
+@contextmanager
+def deadline(seconds: Optional[float]) -> Iterator[None]:
+    """Bound everything in this context (and tasks it spawns) to ``seconds``.
+
+    Nested deadlines can only shorten the enclosing one. ``None`` or 0 adds
+    no limit.
+    """
+    if not seconds:
+        yield
+        return
+    expires = time.monotonic() + seconds
+    current = _deadline.get()
+    token = _deadline.set(expires if current is None else min(current, expires))
+    try:
+        yield
+    finally:
+        _deadline.reset(token)
+
+
+def remaining() -> Optional[float]:
+    """Seconds left before the current deadline, or ``None`` if unbounded"""
+    expires = _deadline.get()
+    return None if expires is None else max(0.0, expires - time.monotonic())
+
+
+async def run_with_deadline(awaitable: Awaitable[T], message: str = "Deadline exceeded") -> T:
+    """Await ``awaitable``, cancelling it when the current deadline passes"""
+    try:
+        return await asyncio.wait_for(awaitable, remaining())
+    except asyncio.TimeoutError as e:
+        if remaining() == 0 and not isinstance(e, DeadlineExceeded):
+            raise DeadlineExceeded(message) from None
+        raise
@@ -0,0 +1,149 @@
+"""Managed executors for blocking and CPU-heavy tool work"""
+from concurrent.futures import Executor, ProcessPoolExecutor, ThreadPoolExecutor
+from typing import Any, Callable, Dict, Optional, Tuple
+import asyncio
+import functools
+import pickle
+import threading
+import time
+
+try:
+    from .deadline import remaining
+except ImportError:
+    pass
+
+
+class ToolTimeout(asyncio.TimeoutError):
+    """A tool did not finish within its timeout"""
+
+
+def _timed_call(fn: Callable[..., Any], args: tuple, kwargs: dict) -> Tuple[float, float, Any]:
+    """Run ``fn`` in a worker and report wall-clock start/end (picklable)"""
+    started = time.time()
+    result = fn(*args, **kwargs)
+    return started, time.time(), result
+
+
+def _check_picklable(fn: Callable[..., Any]) -> None:
+    """Fail clearly, before submitting, when ``fn`` cannot reach a worker process"""
+    try:
+        pickle.dumps(fn)
+    except Exception as e:
+        name = getattr(fn, "__qualname__", None) or repr(fn)
+        raise TypeError(
+            f"{name} cannot run in a process pool ({e}); "
+            "cpu_bound tools must not hold clients, locks or other unpicklable state"
+        ) from e
+
+
+class ToolExecutor:
+    """Run blocking tool code off the event loop.
+
+    Each tool category gets its own bounded thread pool (sized by
+    ``max_workers[category]``, else ``default_workers``), so slow search
+    calls cannot starve finance lookups. CPU-heavy work goes to a shared
+    process pool; its callables and arguments must be picklable (callables
+    are checked before submission and rejected with a ``TypeError``). Calls are
+    bounded by ``timeout`` and the enclosing task deadline. A timed-out
+    thread cannot be killed, so it keeps its worker until it returns.
+    """
+
+    def __init__(
+        self,
+        max_workers: Optional[Dict[str, int]] = None,
+        default_workers: int = 4,
+        process_workers: Optional[int] = None,
+        default_timeout: Optional[float] = None
+    ):
+        self.max_workers = max_workers or {}
+        self.default_workers = default_workers
+        self.process_workers = process_workers
+        self.default_timeout = default_timeout
+        self._pools: Dict[str, Executor] = {}
+        self._stats: Dict[str, Dict[str, float]] = {}
+        self._lock = threading.Lock()
+
+    def _pool(self, category: str, cpu_bound: bool) -> Executor:
+        key = "process" if cpu_bound else category
+        with self._lock:
+            pool = self._pools.get(key)
+            if pool is None:
+                if cpu_bound:
+                    pool = ProcessPoolExecutor(max_workers=self.process_workers)
+                else:
+                    pool = ThreadPoolExecutor(
+                        max_workers=self.max_workers.get(category, self.default_workers),
+                        thread_name_prefix=f"tool-{category}"
+                    )
+                self._pools[key] = pool
+            return pool
+
+    def _category_stats(self, category: str) -> Dict[str, float]:
+        return self._stats.setdefault(category, {
+            "submitted": 0, "completed": 0, "failed": 0, "timeouts": 0, "in_flight": 0,
+            "queue_time": 0.0, "max_queue_time": 0.0, "run_time": 0.0, "max_run_time": 0.0
+        })
+
+    async def run(
+        self,
+        fn: Callable[..., Any],
+        *args: Any,
+        category: str = "general",
+        cpu_bound: bool = False,
+        timeout: Optional[float] = None,
+        **kwargs: Any
+    ) -> Any:
+        """Await ``fn(*args, **kwargs)`` executed on the category's pool"""
+        if cpu_bound:
+            _check_picklable(fn)
+        stats = self._category_stats(category)
+        limits = [t for t in (timeout or self.default_timeout, remaining()) if t is not None]
+        loop = asyncio.get_running_loop()
+        submitted = time.time()
+        future = loop.run_in_executor(
+            self._pool(category, cpu_bound), functools.partial(_timed_call, fn, args, kwargs)
+        )
+        stats["submitted"] += 1
+        stats["in_flight"] += 1
+        try:
+            started, finished, result = await asyncio.wait_for(
+                future, min(limits) if limits else None
+            )
+        except asyncio.TimeoutError:
+            stats["timeouts"] += 1
+            raise ToolTimeout(f"{getattr(fn, '__name__', 'tool call')} timed out") from None
+        except BaseException:
+            stats["failed"] += 1
+            raise
+        finally:
+            stats["in_flight"] -= 1
+
+        stats["completed"] += 1
+        queue_time, run_time = max(0.0, started - submitted), finished - started
+        stats["queue_time"] += queue_time
+        stats["max_queue_time"] = max(stats["max_queue_time"], queue_time)
+        stats["run_time"] += run_time
+        stats["max_run_time"] = max(stats["max_run_time"], run_time)
+        return result
+
+    def stats(self) -> Dict[str, Dict[str, float]]:
+        """Per-category counts plus average and max queue and run latencies"""
+        result = {}
+        for category, stats in self._stats.items():
+            completed = stats["completed"]
+            result[category] = {
+                **stats,
+                "avg_queue_time": stats["queue_time"] / completed if completed else 0.0,
+                "avg_run_time": stats["run_time"] / completed if completed else 0.0
+            }
+        return result
+
+    def shutdown(self, wait: bool = True) -> None:
+        with self._lock:
+            pools, self._pools = self._pools, {}
+        for pool in pools.values():
+            pool.shutdown(wait=wait)
+
+
+# Shared by every tool unless one is given its own
+default_executor = ToolExecutor()
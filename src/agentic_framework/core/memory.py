@@ -11,3 +11,12 @@ class MemoryProvider(ABC):
     @abstractmethod
     async def retrieve(self, query: str, k: int = 5) -> List[Dict[str, Any]]:
         ...
+
+    async def store_many(self, memories: List[Dict[str, Any]]) -> None:
+        """Store several memories; providers override this to batch the work"""
+        for memory in memories:
+            await self.store(memory)
+
+    async def retrieve_many(self, queries: List[str], k: int = 5) -> List[List[Dict[str, Any]]]:
+        """Retrieve for several queries, one result list per query"""
+        return [await self.retrieve(query, k) for query in queries]
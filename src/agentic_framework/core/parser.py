@@ -0,0 +1,101 @@
+"""Tool call parsing for model responses"""
+from typing import Any, Dict, List, Optional
+import ast
+import inspect
+import json
+import re
+
+try:
+    from .tool import Tool
+except ImportError:
+    pass
+
+
+class ToolCallParser:
+    """Extract tool calls from a model response in a single pass.
+
+    Built once per tool set: all tool names are folded into one compiled
+    alternation, so a response is scanned once regardless of how many tools
+    exist, and each tool's positional parameter names are resolved once.
+    Structured (JSON function-calling) tool calls are accepted as well.
+    """
+
+    # Balanced parentheses up to two levels deep inside the argument list
+    _ARGS = r"\((?:[^)(]|\((?:[^)(]+|\([^)(]*\))*\))*\)"
+
+    def __init__(self, tools: List[Tool]):
+        self.tools = {tool.name.lower(): tool for tool in tools if tool.name}
+        self._param_names: Dict[str, List[str]] = {}
+        self.pattern: Optional[re.Pattern] = None
+        if self.tools:
+            names = sorted(self.tools, key=len, reverse=True)
+            alternation = "|".join(re.escape(name) for name in names)
+            self.pattern = re.compile(
+                rf"(?<!\w)(?P<name>{alternation})\s*{self._ARGS}", re.IGNORECASE
+            )
+
+    def parse(self, response: str) -> List[Dict[str, Any]]:
+        """Extract ``name(args...)`` calls written in free text, in order"""
+        if self.pattern is None:
+            return []
+
+        tool_calls = []
+        for match in self.pattern.finditer(response):
+            tool = self.tools[match.group("name").lower()]
+            call_str = match.group(0)
+            try:
+                # Parse the call string
+                tree = ast.parse(call_str, mode="eval")
+                if not isinstance(tree.body, ast.Call):
+                    continue
+
+                # Extract arguments
+                params = {}
+
+                # Handle keyword args (key=value)
+                for kw in tree.body.keywords:
+                    params[kw.arg] = ast.literal_eval(kw.value)
+
+                # Handle positional args, mapped through the tool signature
+                if tree.body.args:
+                    param_names = self._positional_names(tool)
+                    for i, arg in enumerate(tree.body.args):
+                        if i < len(param_names):
+                            params[param_names[i]] = ast.literal_eval(arg)
+
+                tool_calls.append({"tool": tool, "params": params})
+
+            except Exception:
+                # Fallback or ignore invalid calls
+                continue
+
+        return tool_calls
+
+    def parse_structured(self, tool_calls: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """Map native function-calling results onto tools.
+
+        Accepts OpenAI-style ``{"id", "function": {"name", "arguments"}}``
+        entries or flat ``{"name", "arguments"}`` ones; ``arguments`` may be a
+        JSON string or a dict. Unknown tools and malformed arguments are skipped.
+        """
+        parsed = []
+        for call in tool_calls:
+            function = call.get("function", call)
+            tool = self.tools.get(str(function.get("name", "")).lower())
+            if tool is None:
+                continue
+            arguments = function.get("arguments") or {}
+            if isinstance(arguments, str):
+                try:
+                    arguments = json.loads(arguments)
+                except json.JSONDecodeError:
+                    continue
+            if not isinstance(arguments, dict):
+                continue
+            parsed.append({"tool": tool, "params": arguments, "id": call.get("id")})
+        return parsed
+
+    def _positional_names(self, tool: Tool) -> List[str]:
+        if tool.name not in self._param_names:
+            self._param_names[tool.name] = list(inspect.signature(tool.execute).parameters)
+        return self._param_names[tool.name]
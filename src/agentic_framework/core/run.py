@@ -0,0 +1,36 @@
+"""Per-run bookkeeping of an agent execution, visible to the tools it calls"""
+from contextlib import contextmanager
+from contextvars import ContextVar
+from dataclasses import dataclass, field
+from typing import Any, Dict, Iterator, List, Optional
+
+
+@dataclass
+class Run:
+    """One ``Agent.execute`` call: its id, iterations, spend and usage log
+
+    Kept apart from the agent so concurrent runs on one agent never share
+    counters or budgets.
+    """
+    id: str
+    iterations: int = 0
+    cost: float = 0.0
+    usage_log: List[Dict[str, Any]] = field(default_factory=list)
+
+
+_run: ContextVar[Optional[Run]] = ContextVar("agentic_framework_run", default=None)
+
+
+@contextmanager
+def agent_run(run: Run) -> Iterator[Run]:
+    """Mark everything in this context (and tasks it spawns) as part of ``run``"""
+    token = _run.set(run)
+    try:
+        yield run
+    finally:
+        _run.reset(token)
+
+
+def current_run() -> Optional[Run]:
+    """The agent run calling this code, or ``None`` outside any run"""
+    return _run.get()
@@ -0,0 +1,50 @@
+"""Single-flight coalescing of identical in-flight calls"""
+from typing import Any, Awaitable, Callable, Dict, Hashable, Tuple
+import asyncio
+
+
+class SingleFlight:
+    """Run at most one call per key at a time; concurrent callers share it.
+
+    The first caller for a key starts the work as a task; callers arriving
+    while it is in flight await the same task instead of repeating it. The
+    key is forgotten as soon as the call finishes, so this never serves stale
+    results (pair it with a cache for that). A caller that is cancelled does
+    not cancel the shared call for the others.
+    """
+
+    def __init__(self):
+        self._flights: Dict[Tuple[Any, Hashable], asyncio.Task] = {}
+        self.calls = 0
+        self.shared = 0
+
+    async def do(self, key: Hashable, fn: Callable[[], Awaitable[Any]]) -> Tuple[Any, bool]:
+        """Return ``(result, shared)``; ``shared`` is True if another caller ran it"""
+        flight_key = (asyncio.get_running_loop(), key)
+        task = self._flights.get(flight_key)
+        shared = task is not None
+        if shared:
+            self.shared += 1
+        else:
+            self.calls += 1
+            task = asyncio.ensure_future(fn())
+            self._flights[flight_key] = task
+            task.add_done_callback(lambda _: self._flights.pop(flight_key, None))
+        return await asyncio.shield(task), shared
+
+    @property
+    def in_flight(self) -> int:
+        return len(self._flights)
+
+    def stats(self) -> Dict[str, Any]:
+        total = self.calls + self.shared
+        return {
+            "calls": self.calls,
+            "shared": self.shared,
+            "in_flight": self.in_flight,
+            "shared_rate": self.shared / total if total else 0.0
+        }
+
+
+# Process-wide group used for tools marked ``coalesce=True``
+tool_flights = SingleFlight()
@@ -1,9 +1,45 @@
 """Base Tool class and schema"""
 from abc import ABC, abstractmethod
 from dataclasses import dataclass, field
-from typing import Any, Dict, Optional
+from typing import Any, Callable, Dict, Optional, Union, get_args, get_origin
+import hashlib
+import inspect
+import json
 import uuid
 
+try:
+    from .executor import ToolExecutor, default_executor
+except ImportError:
+    pass
+
+_JSON_TYPES = {
+    str: "string",
+    int: "integer",
+    float: "number",
+    bool: "boolean",
+    list: "array",
+    tuple: "array",
+    dict: "object",
+}
+
+
+def _annotation_schema(annotation: Any) -> Dict[str, Any]:
+    """JSON schema for a parameter annotation; ``{}`` (any value) when unknown"""
+    if get_origin(annotation) is Union:
+        # Optional[X] -> X
+        args = [a for a in get_args(annotation) if a is not type(None)]
+        annotation = args[0] if len(args) == 1 else Any
+    origin = get_origin(annotation) or annotation
+    json_type = _JSON_TYPES.get(origin) if isinstance(origin, type) else None
+    if json_type is None:
+        return {}
+    schema: Dict[str, Any] = {"type": json_type}
+    if json_type == "array":
+        # Function-calling APIs reject arrays without ``items``
+        args = [a for a in get_args(annotation) if a is not Ellipsis]
+        schema["items"] = _annotation_schema(args[0]) if len(args) == 1 else {}
+    return schema
+
 
 @dataclass
 class ToolSchema:
@@ -31,13 +67,78 @@ class Tool(ABC):
     category: str = "general"
     version: str = "1.0.0"
     schema: Optional[ToolSchema] = None
+    serial: bool = False  # Never run concurrently with other calls in the same turn
+    coalesce: bool = False  # Identical concurrent calls share one execution (read-only tools)
+    cpu_bound: bool = False  # Blocking work goes to a process pool instead of threads
+    timeout: Optional[float] = None  # Seconds allowed for blocking work
+    executor: Optional[ToolExecutor] = field(default=None, repr=False)
     metadata: Dict[str, Any] = field(default_factory=dict)
     
     @abstractmethod
     async def execute(self, **kwargs) -> Any:
-        """Execute the tool"""
+        """Execute the tool
+        
+        Tools may also define a plain (synchronous) ``execute``; the agent
+        then runs it on the tool executor.
+        """
         pass
     
+    def __getstate__(self) -> Dict[str, Any]:
+        # ``cpu_bound`` tools are pickled to a worker process, where they run
+        # directly; their executor (pools and locks) stays behind
+        state = self.__dict__.copy()
+        state["executor"] = None
+        return state
+    
+    async def end_run(self, run_id: str) -> None:
+        """Release state kept for agent run ``run_id`` (called when the run ends)"""
+    
+    async def run_blocking(self, fn: Callable[..., Any], *args: Any, **kwargs: Any) -> Any:
+        """Run blocking ``fn`` off the event loop on this tool's category pool"""
+        executor = self.executor if self.executor is not None else default_executor
+        return await executor.run(
+            fn, *args, category=self.category, cpu_bound=self.cpu_bound,
+            timeout=self.timeout, **kwargs
+        )
+    
+    def function_schema(self) -> Dict[str, Any]:
+        """JSON schema for native function calling (OpenAI ``tools`` format)
+        
+        Uses ``schema.input_schema`` when set, otherwise derives one from the
+        ``execute`` signature.
+        """
+        if self.schema and self.schema.input_schema:
+            parameters = self.schema.input_schema
+        else:
+            parameters = self._signature_schema()
+        return {
+            "type": "function",
+            "function": {
+                "name": self.name,
+                "description": self.description,
+                "parameters": parameters
+            }
+        }
+    
+    def _signature_schema(self) -> Dict[str, Any]:
+        properties: Dict[str, Any] = {}
+        required = []
+        for name, param in inspect.signature(self.execute).parameters.items():
+            if param.kind in (param.VAR_POSITIONAL, param.VAR_KEYWORD):
+                continue
+            properties[name] = _annotation_schema(param.annotation)
+            if param.default is param.empty:
+                required.append(name)
+        return {"type": "object", "properties": properties, "required": required}
+    
+    def call_key(self, params: Dict[str, Any]) -> str:
+        """Stable key for a call, used to coalesce identical in-flight calls"""
+        payload = json.dumps(
+            {"tool": self.name, "version": self.version, "params": params},
+            sort_keys=True, default=str, separators=(",", ":")
+        )
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+    
     def to_dict(self) -> Dict[str, Any]:
         """Convert to dictionary for serialization"""
         return {
@@ -46,5 +147,7 @@ class Tool(ABC):
             "description": self.description,
             "category": self.category,
             "version": self.version,
+            "serial": self.serial,
+            "coalesce": self.coalesce,
             "metadata": self.metadata
         }
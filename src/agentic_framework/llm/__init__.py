@@ -1,4 +1,23 @@
 from .base import BaseLLMClient
+from .cache import CachedLLMClient, ResponseCache
+from .coalescing import CoalescingLLMClient
 from .openai_client import OpenAIClient
+from .resilience import ResilientLLMClient, RetryPolicy
+from .ratelimit import ModelLimits, RateLimitedLLMClient, RateLimiter
+from .semantic_cache import SemanticCachedLLMClient
+from .usage import ModelPrice
 
-__all__ = ["BaseLLMClient", "OpenAIClient"]
+__all__ = [
+    "BaseLLMClient",
+    "CachedLLMClient",
+    "CoalescingLLMClient",
+    "ModelLimits",
+    "ModelPrice",
+    "OpenAIClient",
+    "RateLimitedLLMClient",
+    "RateLimiter",
+    "ResilientLLMClient",
+    "ResponseCache",
+    "RetryPolicy",
+    "SemanticCachedLLMClient",
+]
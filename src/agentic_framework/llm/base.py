@@ -1,10 +1,33 @@
 """LLM base interface."""
 from abc import ABC, abstractmethod
-from typing import Any, Dict, List
+from typing import Any, AsyncIterator, Dict, List
 
 
 class BaseLLMClient(ABC):
+    # Clients that accept ``tools=[...]`` (OpenAI function schemas) and return
+    # structured ``tool_calls`` in the response set this to True.
+    supports_tools: bool = False
+
     @abstractmethod
     async def generate(self, messages: List[Dict[str, str]], **kwargs: Any) -> Dict[str, Any]:
-        """Generate a response from the LLM given chat messages."""
+        """Generate a response from the LLM given chat messages.
+
+        Returns ``content``, ``tokens`` and ``cost``; clients that support tools
+        add ``tool_calls`` as OpenAI-style ``{"id", "type", "function"}`` dicts.
+        Clients that know the token split add ``usage`` with ``prompt_tokens``,
+        ``completion_tokens``, ``cached_tokens`` and ``total_tokens``.
+        """
         raise NotImplementedError
+
+    async def stream(
+        self, messages: List[Dict[str, str]], **kwargs: Any
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Stream a response as ``{"content": delta}`` chunks.
+
+        The last chunk is ``{"done": True, "response": {...}}`` where the response
+        has the same shape as ``generate``'s. Clients without native streaming
+        fall back to a single chunk from ``generate``.
+        """
+        response = await self.generate(messages, **kwargs)
+        yield {"content": response["content"]}
+        yield {"done": True, "response": response}
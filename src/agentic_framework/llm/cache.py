@@ -0,0 +1,248 @@
+"""Response caching for LLM clients"""
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple
+import asyncio
+import hashlib
+import json
+import re
+import sqlite3
+import threading
+import time
+
+from .base import BaseLLMClient
+
+# Generation parameters that change the completion and so belong in the key
+KEY_PARAMS = ("temperature", "max_tokens", "top_p", "stop", "seed", "tools", "tool_choice")
+
+
+def normalize_messages(messages: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+    """Collapse whitespace in message text so cosmetic differences share a key"""
+    normalized = []
+    for message in messages:
+        message = dict(message)
+        if isinstance(message.get("content"), str):
+            message["content"] = re.sub(r"\s+", " ", message["content"]).strip()
+        normalized.append(message)
+    return normalized
+
+
+def request_key(
+    messages: List[Dict[str, Any]],
+    params: Dict[str, Any],
+    model: Optional[str] = None,
+    normalize: bool = True
+) -> str:
+    """Stable hash of the model, messages and result-affecting parameters"""
+    payload = {
+        "model": model,
+        "messages": normalize_messages(messages) if normalize else messages,
+        "params": {name: params[name] for name in KEY_PARAMS if params.get(name) is not None},
+    }
+    encoded = json.dumps(payload, sort_keys=True, default=str, separators=(",", ":"))
+    return hashlib.sha256(encoded.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    """Two-tier response store: in-memory LRU plus optional SQLite, with TTL
+
+    Async callers use ``aget``/``aset``, which keep SQLite work on the
+    cache's own worker thread.
+    """
+
+    def __init__(
+        self,
+        max_entries: int = 1000,
+        ttl: Optional[float] = None,
+        db_path: Optional[str] = None
+    ):
+        self.max_entries = max_entries
+        self.ttl = ttl
+        self._lru: "OrderedDict[str, Tuple[float, Dict[str, Any]]]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        self._executor: Optional[ThreadPoolExecutor] = None
+        if db_path:
+            self._executor = ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="response-cache-sqlite"
+            )
+            self._conn = sqlite3.connect(db_path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            with self._conn:
+                self._conn.execute(
+                    "CREATE TABLE IF NOT EXISTS responses "
+                    "(key TEXT PRIMARY KEY, response TEXT, expires_at REAL)"
+                )
+
+    def get(self, key: str, load: bool = True) -> Optional[Dict[str, Any]]:
+        """Fresh response or None; ``load=False`` skips the SQLite tier"""
+        now = time.time()
+        with self._lock:
+            entry = self._lru.get(key)
+            if entry is not None:
+                expires_at, response = entry
+                if expires_at >= now:
+                    self._lru.move_to_end(key)
+                    return response
+                del self._lru[key]
+        if self._conn is None or not load:
+            return None
+        return self._loaded(key, self._executor.submit(self._load, key).result())
+
+    def set(self, key: str, response: Dict[str, Any]) -> None:
+        expires_at = self._expiry()
+        with self._lock:
+            self._remember(key, expires_at, response)
+        if self._conn is not None:
+            self._executor.submit(self._persist, key, response, expires_at).result()
+
+    def _expiry(self) -> float:
+        return time.time() + self.ttl if self.ttl is not None else float("inf")
+
+    # SQLite is only touched on the worker thread, which serializes the
+    # connection; ``_lock`` guards the LRU alone and is never held over I/O.
+
+    def _load(self, key: str) -> Optional[Tuple[float, Dict[str, Any]]]:
+        row = self._conn.execute(
+            "SELECT response, expires_at FROM responses WHERE key = ?", (key,)
+        ).fetchone()
+        if row is None:
+            return None
+        if row[1] < time.time():
+            with self._conn:
+                self._conn.execute("DELETE FROM responses WHERE key = ?", (key,))
+            return None
+        return row[1], json.loads(row[0])
+
+    def _loaded(
+        self, key: str, loaded: Optional[Tuple[float, Dict[str, Any]]]
+    ) -> Optional[Dict[str, Any]]:
+        """Promote a row read from SQLite into the LRU"""
+        if loaded is None:
+            return None
+        expires_at, response = loaded
+        with self._lock:
+            self._remember(key, expires_at, response)
+        return response
+
+    def _persist(self, key: str, response: Dict[str, Any], expires_at: float) -> None:
+        with self._conn:
+            self._conn.execute(
+                "INSERT OR REPLACE INTO responses (key, response, expires_at) "
+                "VALUES (?, ?, ?)",
+                (key, json.dumps(response, default=str), expires_at)
+            )
+
+    async def _run(self, fn, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, fn, *args)
+
+    async def aget(self, key: str) -> Optional[Dict[str, Any]]:
+        """``get`` with the SQLite lookup off the event loop"""
+        response = self.get(key, load=False)
+        if response is not None or self._conn is None:
+            return response
+        return self._loaded(key, await self._run(self._load, key))
+
+    async def aset(self, key: str, response: Dict[str, Any]) -> None:
+        """``set`` with the SQLite write off the event loop"""
+        expires_at = self._expiry()
+        with self._lock:
+            self._remember(key, expires_at, response)
+        if self._conn is not None:
+            await self._run(self._persist, key, response, expires_at)
+
+    def _remember(self, key: str, expires_at: float, response: Dict[str, Any]):
+        self._lru[key] = (expires_at, response)
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.max_entries:
+            self._lru.popitem(last=False)
+
+    def __len__(self) -> int:
+        return len(self._lru)
+
+    def close(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=True)
+            self._executor = None
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
+
+
+class CachedLLMClient(BaseLLMClient):
+    """Caching decorator around any ``BaseLLMClient``.
+
+    Requests are keyed by ``request_key`` (whitespace-normalized messages
+    unless ``normalize=False``). By default only deterministic requests
+    (temperature 0) are cached. Hits are returned with ``cost`` 0 and
+    ``cached: True`` so agent cost accounting treats them as free.
+    """
+
+    def __init__(
+        self,
+        client: BaseLLMClient,
+        cache: Optional[ResponseCache] = None,
+        normalize: bool = True,
+        deterministic_only: bool = True
+    ):
+        self.client = client
+        self.cache = cache if cache is not None else ResponseCache()
+        self.normalize = normalize
+        self.deterministic_only = deterministic_only
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def supports_tools(self) -> bool:
+        return getattr(self.client, "supports_tools", False)
+
+    def _key(self, messages: List[Dict[str, Any]], kwargs: Dict[str, Any]) -> Optional[str]:
+        if self.deterministic_only and kwargs.get("temperature", 0.7) != 0:
+            return None
+        return request_key(messages, kwargs, getattr(self.client, "model", None), self.normalize)
+
+    def _hit(self, response: Dict[str, Any]) -> Dict[str, Any]:
+        self.hits += 1
+        return {**response, "cost": 0.0, "cached": True}
+
+    async def generate(self, messages: List[Dict[str, str]], **kwargs: Any) -> Dict[str, Any]:
+        key = self._key(messages, kwargs)
+        if key is None:
+            return await self.client.generate(messages, **kwargs)
+
+        cached = await self.cache.aget(key)
+        if cached is not None:
+            return self._hit(cached)
+
+        self.misses += 1
+        response = await self.client.generate(messages, **kwargs)
+        await self.cache.aset(key, response)
+        return response
+
+    async def stream(
+        self, messages: List[Dict[str, str]], **kwargs: Any
+    ) -> AsyncIterator[Dict[str, Any]]:
+        key = self._key(messages, kwargs)
+        cached = await self.cache.aget(key) if key is not None else None
+        if cached is not None:
+            response = self._hit(cached)
+            yield {"content": response["content"]}
+            yield {"done": True, "response": response}
+            return
+
+        if key is not None:
+            self.misses += 1
+        async for chunk in self.client.stream(messages, **kwargs):
+            if chunk.get("done") and key is not None:
+                await self.cache.aset(key, chunk["response"])
+            yield chunk
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "size": len(self.cache),
+            "hit_rate": self.hits / lookups if lookups else 0.0
+        }
@@ -0,0 +1,54 @@
+"""Single-flight coalescing for LLM clients"""
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+from .base import BaseLLMClient
+from .cache import request_key
+from ..core.singleflight import SingleFlight
+
+
+class CoalescingLLMClient(BaseLLMClient):
+    """Collapse identical concurrent ``generate`` calls into one request.
+
+    Requests are keyed by ``request_key``, the same normalized key used by
+    ``CachedLLMClient``, so the two compose (put the cache outside). Callers
+    that joined an in-flight request get its response with ``cost`` 0 and
+    ``coalesced: True``, so the spend is counted once. Streaming requests
+    are passed through unchanged.
+    """
+
+    def __init__(
+        self,
+        client: BaseLLMClient,
+        group: Optional[SingleFlight] = None,
+        normalize: bool = True,
+        deterministic_only: bool = False
+    ):
+        self.client = client
+        self.group = group if group is not None else SingleFlight()
+        self.normalize = normalize
+        self.deterministic_only = deterministic_only
+
+    @property
+    def supports_tools(self) -> bool:
+        return getattr(self.client, "supports_tools", False)
+
+    async def generate(self, messages: List[Dict[str, str]], **kwargs: Any) -> Dict[str, Any]:
+        if self.deterministic_only and kwargs.get("temperature", 0.7) != 0:
+            return await self.client.generate(messages, **kwargs)
+
+        key = request_key(messages, kwargs, getattr(self.client, "model", None), self.normalize)
+        response, shared = await self.group.do(
+            key, lambda: self.client.generate(messages, **kwargs)
+        )
+        if shared:
+            return {**response, "cost": 0.0, "coalesced": True}
+        return response
+
+    async def stream(
+        self, messages: List[Dict[str, str]], **kwargs: Any
+    ) -> AsyncIterator[Dict[str, Any]]:
+        async for chunk in self.client.stream(messages, **kwargs):
+            yield chunk
+
+    def stats(self) -> Dict[str, Any]:
+        return self.group.stats()
@@ -1,43 +1,164 @@
 """OpenAI LLM Client Implementation"""
-from typing import Any, Dict, List
+from typing import Any, AsyncIterator, Dict, List, Optional
 import os
 from openai import AsyncOpenAI
 
 from .base import BaseLLMClient
+from ..core.deadline import remaining
+from .transport import ClientRegistry, default_registry
+from .usage import ModelPrice, count_message_tokens, count_tokens, price_for, usage_cost
 
 
 class OpenAIClient(BaseLLMClient):
-    """OpenAI LLM client with cost tracking"""
+    """OpenAI LLM client with cost tracking
     
-    def __init__(self, api_key: str = None, model: str = "gpt-4", base_url: str = None):
-        self.client = AsyncOpenAI(
-            api_key=api_key or os.getenv("OPENAI_API_KEY"),
-            base_url=base_url
-        )
+    By default the underlying ``AsyncOpenAI`` (and its connection pool) comes
+    from a process-wide ``ClientRegistry`` shared by every client with the
+    same ``base_url`` and API key. Pass ``shared=False`` for a private one.
+    
+    Each request times out after ``timeout`` seconds, or sooner if the
+    enclosing task deadline (``core.deadline``) leaves less time.
+    
+    Token counts come from the API's usage block (falling back to local
+    counting) and are priced per model from ``usage.PRICES`` unless
+    ``prices`` overrides the table.
+    """
+    
+    supports_tools = True
+    
+    def __init__(
+        self,
+        api_key: str = None,
+        model: str = "gpt-4",
+        base_url: str = None,
+        shared: bool = True,
+        registry: Optional[ClientRegistry] = None,
+        timeout: Optional[float] = None,
+        prices: Optional[Dict[str, ModelPrice]] = None
+    ):
+        self.api_key = api_key or os.getenv("OPENAI_API_KEY")
+        self.base_url = base_url
         self.model = model
+        self.registry = registry or default_registry
+        self.timeout = timeout
+        self.price = price_for(model, prices)
+        self._client = None if shared else AsyncOpenAI(api_key=self.api_key, base_url=base_url)
+    
+    @property
+    def client(self) -> AsyncOpenAI:
+        if self._client is not None:
+            return self._client
+        return self.registry.get(self.api_key, self.base_url)
+    
+    def _request_params(
+        self, messages: List[Dict[str, str]], kwargs: Dict[str, Any]
+    ) -> Dict[str, Any]:
+        params = {
+            "model": self.model,
+            "messages": messages,
+            "temperature": kwargs.get("temperature", 0.7),
+            "max_tokens": kwargs.get("max_tokens", 2000),
+        }
+        if kwargs.get("tools"):
+            params["tools"] = kwargs["tools"]
+            params["tool_choice"] = kwargs.get("tool_choice", "auto")
+        budget = [t for t in (self.timeout, remaining()) if t is not None]
+        if budget:
+            params["timeout"] = min(budget)
+        return params
     
     async def generate(self, messages: List[Dict[str, str]], **kwargs: Any) -> Dict[str, Any]:
         """Generate response from OpenAI"""
         response = await self.client.chat.completions.create(
-            model=self.model,
-            messages=messages,
-            temperature=kwargs.get("temperature", 0.7),
-            max_tokens=kwargs.get("max_tokens", 2000),
+            **self._request_params(messages, kwargs),
             stream=False
         )
         
-        content = response.choices[0].message.content
+        message = response.choices[0].message
+        tool_calls = [
+            {
+                "id": call.id,
+                "type": "function",
+                "function": {"name": call.function.name, "arguments": call.function.arguments}
+            }
+            for call in message.tool_calls or []
+        ]
+        return self._build_response(message.content, tool_calls, messages, response.usage)
+    
+    async def stream(
+        self, messages: List[Dict[str, str]], **kwargs: Any
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """Stream response deltas from OpenAI"""
+        response = await self.client.chat.completions.create(
+            **self._request_params(messages, kwargs),
+            stream=True,
+            stream_options={"include_usage": True}
+        )
         
-        # Approximate cost calculation
-        if content:
-            tokens = len(content.split()) * 1.3  # Rough estimate
+        parts = []
+        tool_calls: Dict[int, Dict[str, Any]] = {}
+        usage = None
+        async for chunk in response:
+            if chunk.usage:
+                usage = chunk.usage  # Final chunk, after all choices
+            if not chunk.choices:
+                continue
+            delta = chunk.choices[0].delta
+            if delta.content:
+                parts.append(delta.content)
+                yield {"content": delta.content}
+            # Tool call names/arguments arrive in fragments keyed by index
+            for fragment in delta.tool_calls or []:
+                call = tool_calls.setdefault(fragment.index, {
+                    "id": None,
+                    "type": "function",
+                    "function": {"name": "", "arguments": ""}
+                })
+                if fragment.id:
+                    call["id"] = fragment.id
+                if fragment.function:
+                    call["function"]["name"] += fragment.function.name or ""
+                    call["function"]["arguments"] += fragment.function.arguments or ""
+        
+        response = self._build_response(
+            "".join(parts), [tool_calls[i] for i in sorted(tool_calls)], messages, usage
+        )
+        yield {"done": True, "response": response}
+    
+    def _build_response(
+        self,
+        content: Optional[str],
+        tool_calls: Optional[List[Dict[str, Any]]] = None,
+        messages: Optional[List[Dict[str, Any]]] = None,
+        usage: Any = None
+    ) -> Dict[str, Any]:
+        """Wrap completion text with token usage and cost"""
+        if usage is not None:
+            details = getattr(usage, "prompt_tokens_details", None)
+            token_usage = {
+                "prompt_tokens": usage.prompt_tokens,
+                "completion_tokens": usage.completion_tokens,
+                "cached_tokens": getattr(details, "cached_tokens", None) or 0,
+                "estimated": False
+            }
         else:
-            tokens = 0
-            
-        cost = tokens * 0.00001  # Approximate $0.01 per 1000 tokens
+            completion = count_tokens(content or "", self.model)
+            for call in tool_calls or []:
+                completion += count_tokens(call["function"]["arguments"], self.model)
+            token_usage = {
+                "prompt_tokens": count_message_tokens(messages or [], self.model),
+                "completion_tokens": completion,
+                "cached_tokens": 0,
+                "estimated": True
+            }
+        token_usage["total_tokens"] = token_usage["prompt_tokens"] + token_usage["completion_tokens"]
         
-        return {
+        response = {
             "content": content or "",  # Ensure content is at least empty string
-            "tokens": tokens,
-            "cost": cost
+            "tokens": token_usage["total_tokens"],
+            "cost": usage_cost(token_usage, self.price),
+            "usage": token_usage
         }
+        if tool_calls:
+            response["tool_calls"] = tool_calls
+        return response
@@ -0,0 +1,317 @@
+"""Client-side rate limiting and adaptive concurrency for LLM calls"""
+from dataclasses import dataclass, field
+from typing import Any, AsyncIterator, Dict, List, Optional, Tuple, Union
+import asyncio
+import heapq
+import itertools
+import time
+
+from .base import BaseLLMClient
+
+# Lower runs first; interactive requests overtake queued batch work
+PRIORITIES = {"interactive": 0, "batch": 10}
+
+
+@dataclass
+class ModelLimits:
+    """Published limits for one model; ``None`` means unlimited"""
+    requests_per_minute: Optional[float] = None
+    tokens_per_minute: Optional[float] = None
+
+
+class TokenBucket:
+    """Continuously refilled bucket; may go into debt when usage is corrected"""
+
+    def __init__(self, per_minute: float, capacity: Optional[float] = None):
+        self.rate = per_minute / 60.0
+        self.capacity = capacity or per_minute
+        self.level = self.capacity
+        self.updated = time.monotonic()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.level = min(self.capacity, self.level + (now - self.updated) * self.rate)
+        self.updated = now
+
+    def delay(self, amount: float) -> float:
+        """Seconds until ``amount`` can be taken"""
+        self._refill()
+        amount = min(amount, self.capacity)
+        return 0.0 if self.level >= amount else (amount - self.level) / self.rate
+
+    def take(self, amount: float):
+        self._refill()
+        self.level -= min(amount, self.capacity)
+
+    def adjust(self, delta: float):
+        """Charge (positive) or refund (negative) the difference from an estimate"""
+        self._refill()
+        self.level = min(self.capacity, self.level - delta)
+
+
+class AIMDWindow:
+    """Additive-increase / multiplicative-decrease concurrency limit.
+
+    Grows by about one slot per window of successful calls, and is cut by
+    ``backoff`` on a 429 or a call slower than ``latency_target``. Only
+    calls started after the last cut can cut again, so one burst of 429s
+    halves the window once rather than collapsing it.
+    """
+
+    def __init__(
+        self,
+        initial: int = 8,
+        minimum: int = 1,
+        maximum: int = 64,
+        latency_target: Optional[float] = None,
+        backoff: float = 0.5
+    ):
+        self.limit = float(initial)
+        self.minimum = minimum
+        self.maximum = maximum
+        self.latency_target = latency_target
+        self.backoff = backoff
+        self._last_decrease = float("-inf")
+
+    def on_success(self, started: float, latency: float):
+        if self.latency_target is not None and latency > self.latency_target:
+            self.on_overload(started)
+        else:
+            self.limit = min(self.maximum, self.limit + 1.0 / self.limit)
+
+    def on_overload(self, started: float):
+        if started <= self._last_decrease:
+            return
+        self.limit = max(self.minimum, self.limit * self.backoff)
+        self._last_decrease = time.monotonic()
+
+
+@dataclass
+class Ticket:
+    """Admission granted by ``RateLimiter.acquire``"""
+    model: str
+    tokens: float
+    started: float
+    wait: float
+
+
+@dataclass
+class _ModelState:
+    requests: Optional[TokenBucket]
+    tokens: Optional[TokenBucket]
+    window: AIMDWindow
+    waiters: List[Tuple[int, int, float, asyncio.Future]] = field(default_factory=list)
+    timer: Optional[asyncio.TimerHandle] = None
+    in_flight: int = 0
+    admitted: int = 0
+    throttled: int = 0
+    total_wait: float = 0.0
+    max_wait: float = 0.0
+
+
+class RateLimiter:
+    """Per-model admission control for LLM requests.
+
+    A request is admitted when its model has a free concurrency slot (AIMD
+    window) and both the requests/min and tokens/min buckets can pay for it.
+    Waiters are served in priority order, then FIFO. Token reservations are
+    estimates and are corrected with the real usage on ``release``.
+    """
+
+    def __init__(
+        self,
+        limits: Optional[Dict[str, ModelLimits]] = None,
+        default_limits: Optional[ModelLimits] = None,
+        initial_concurrency: int = 8,
+        min_concurrency: int = 1,
+        max_concurrency: int = 64,
+        latency_target: Optional[float] = None
+    ):
+        self.limits = limits or {}
+        self.default_limits = default_limits or ModelLimits()
+        self.initial_concurrency = initial_concurrency
+        self.min_concurrency = min_concurrency
+        self.max_concurrency = max_concurrency
+        self.latency_target = latency_target
+        self._states: Dict[str, _ModelState] = {}
+        self._seq = itertools.count()
+
+    def _state(self, model: str) -> _ModelState:
+        state = self._states.get(model)
+        if state is None:
+            limits = self.limits.get(model, self.default_limits)
+            state = self._states[model] = _ModelState(
+                requests=TokenBucket(limits.requests_per_minute)
+                if limits.requests_per_minute else None,
+                tokens=TokenBucket(limits.tokens_per_minute)
+                if limits.tokens_per_minute else None,
+                window=AIMDWindow(
+                    self.initial_concurrency, self.min_concurrency,
+                    self.max_concurrency, self.latency_target
+                )
+            )
+        return state
+
+    async def acquire(
+        self, model: str, tokens: float = 0.0, priority: Union[str, int] = "interactive"
+    ) -> Ticket:
+        """Wait until a request of ``tokens`` estimated tokens may start"""
+        state = self._state(model)
+        rank = PRIORITIES.get(priority, 0) if isinstance(priority, str) else priority
+        future = asyncio.get_running_loop().create_future()
+        heapq.heappush(state.waiters, (rank, next(self._seq), tokens, future))
+        enqueued = time.monotonic()
+        self._dispatch(state)
+        try:
+            started = await future
+        except asyncio.CancelledError:
+            if future.done() and not future.cancelled():
+                # Admitted just as we were cancelled: hand the slot back
+                state.in_flight -= 1
+                self._dispatch(state)
+            raise
+        wait = started - enqueued
+        state.total_wait += wait
+        state.max_wait = max(state.max_wait, wait)
+        return Ticket(model, tokens, started, wait)
+
+    def release(
+        self, ticket: Ticket, used_tokens: Optional[float] = None, throttled: bool = False
+    ):
+        """Return the slot; feed real usage and the outcome back into the limits"""
+        state = self._states[ticket.model]
+        state.in_flight -= 1
+        if throttled:
+            state.throttled += 1
+            state.window.on_overload(ticket.started)
+        else:
+            state.window.on_success(ticket.started, time.monotonic() - ticket.started)
+        if used_tokens is not None and state.tokens is not None:
+            state.tokens.adjust(used_tokens - ticket.tokens)
+        self._dispatch(state)
+
+    def _dispatch(self, state: _ModelState):
+        if state.timer is not None:
+            state.timer.cancel()
+            state.timer = None
+        while state.waiters and state.in_flight < max(1, int(state.window.limit)):
+            _, _, tokens, future = state.waiters[0]
+            if future.done():
+                heapq.heappop(state.waiters)  # Cancelled while queued
+                continue
+            delay = max(
+                state.requests.delay(1) if state.requests else 0.0,
+                state.tokens.delay(tokens) if state.tokens else 0.0
+            )
+            if delay > 0:
+                state.timer = asyncio.get_running_loop().call_later(
+                    delay, self._dispatch, state
+                )
+                return
+            heapq.heappop(state.waiters)
+            if state.requests:
+                state.requests.take(1)
+            if state.tokens:
+                state.tokens.take(tokens)
+            state.in_flight += 1
+            state.admitted += 1
+            future.set_result(time.monotonic())
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Queue depth, wait times and current limits per model"""
+        result = {}
+        for model, state in self._states.items():
+            queued: Dict[int, int] = {}
+            for rank, _, _, future in state.waiters:
+                if not future.done():
+                    queued[rank] = queued.get(rank, 0) + 1
+            result[model] = {
+                "queue_depth": sum(queued.values()),
+                "queued_by_priority": queued,
+                "in_flight": state.in_flight,
+                "concurrency_limit": state.window.limit,
+                "admitted": state.admitted,
+                "throttled": state.throttled,
+                "avg_wait": state.total_wait / state.admitted if state.admitted else 0.0,
+                "max_wait": state.max_wait
+            }
+        return result
+
+
+def is_rate_limited(error: BaseException) -> bool:
+    """True for HTTP 429 errors (``openai.RateLimitError`` and friends)"""
+    return getattr(error, "status_code", None) == 429 or type(error).__name__ == "RateLimitError"
+
+
+def estimate_tokens(messages: List[Dict[str, Any]], kwargs: Dict[str, Any]) -> float:
+    """Upper-bound reservation: ~4 characters per prompt token plus ``max_tokens``"""
+    chars = sum(len(str(message.get("content") or "")) for message in messages)
+    return chars / 4 + kwargs.get("max_tokens", 2000)
+
+
+def _used_tokens(response: Dict[str, Any], prompt_estimate: float) -> float:
+    usage = response.get("usage") or {}
+    if usage.get("total_tokens") is not None:
+        return usage["total_tokens"]
+    return prompt_estimate + (response.get("tokens") or 0)
+
+
+class RateLimitedLLMClient(BaseLLMClient):
+    """Rate-limiting decorator around any ``BaseLLMClient``.
+
+    Pass ``priority="batch"`` (per call or as the default) to let interactive
+    traffic go first. 429 responses shrink the concurrency window and are
+    re-raised. Share one ``RateLimiter`` between clients of the same account.
+    """
+
+    def __init__(
+        self,
+        client: BaseLLMClient,
+        limiter: Optional[RateLimiter] = None,
+        priority: Union[str, int] = "interactive"
+    ):
+        self.client = client
+        self.limiter = limiter if limiter is not None else RateLimiter()
+        self.priority = priority
+
+    @property
+    def supports_tools(self) -> bool:
+        return getattr(self.client, "supports_tools", False)
+
+    @property
+    def model(self) -> str:
+        return getattr(self.client, "model", None) or "default"
+
+    async def generate(self, messages: List[Dict[str, str]], **kwargs: Any) -> Dict[str, Any]:
+        priority = kwargs.pop("priority", None) or self.priority
+        reserved = estimate_tokens(messages, kwargs)
+        ticket = await self.limiter.acquire(self.model, reserved, priority)
+        try:
+            response = await self.client.generate(messages, **kwargs)
+        except BaseException as e:
+            self.limiter.release(ticket, throttled=is_rate_limited(e))
+            raise
+        prompt = reserved - kwargs.get("max_tokens", 2000)
+        self.limiter.release(ticket, used_tokens=_used_tokens(response, prompt))
+        return response
+
+    async def stream(
+        self, messages: List[Dict[str, str]], **kwargs: Any
+    ) -> AsyncIterator[Dict[str, Any]]:
+        priority = kwargs.pop("priority", None) or self.priority
+        reserved = estimate_tokens(messages, kwargs)
+        ticket = await self.limiter.acquire(self.model, reserved, priority)
+        used = None
+        try:
+            async for chunk in self.client.stream(messages, **kwargs):
+                if chunk.get("done"):
+                    prompt = reserved - kwargs.get("max_tokens", 2000)
+                    used = _used_tokens(chunk["response"], prompt)
+                yield chunk
+        except BaseException as e:
+            self.limiter.release(ticket, throttled=is_rate_limited(e))
+            raise
+        self.limiter.release(ticket, used_tokens=used)
+
+    def stats(self) -> Dict[str, Any]:
+        return self.limiter.stats().get(self.model, {})
@@ -0,0 +1,211 @@
+"""Timeouts, retries and hedged requests for LLM clients"""
+from collections import deque
+from dataclasses import dataclass
+from typing import Any, AsyncIterator, Dict, List, Optional
+import asyncio
+import logging
+import random
+import time
+
+from openai import APIConnectionError
+
+from .base import BaseLLMClient
+from ..core.deadline import DeadlineExceeded, remaining
+
+logger = logging.getLogger(__name__)
+
+RETRYABLE_STATUS = {408, 409, 429, 500, 502, 503, 504}
+
+
+def is_retryable(error: BaseException) -> bool:
+    """Timeouts, connection failures and 408/409/429/5xx responses"""
+    if isinstance(error, DeadlineExceeded):
+        return False
+    if isinstance(error, (asyncio.TimeoutError, ConnectionError, APIConnectionError)):
+        return True
+    return getattr(error, "status_code", None) in RETRYABLE_STATUS
+
+
+def _retry_after(error: BaseException) -> Optional[float]:
+    headers = getattr(getattr(error, "response", None), "headers", None) or {}
+    try:
+        return float(headers.get("retry-after"))
+    except (TypeError, ValueError):
+        return None
+
+
+@dataclass
+class RetryPolicy:
+    """Retry with "decorrelated jitter" backoff: each sleep is drawn from
+    ``uniform(base_delay, 3 * previous_sleep)`` and capped at ``max_delay``."""
+    max_attempts: int = 3
+    base_delay: float = 0.5
+    max_delay: float = 20.0
+
+    def next_delay(self, previous: float) -> float:
+        upper = max(self.base_delay, previous * 3)
+        return min(self.max_delay, random.uniform(self.base_delay, upper))
+
+
+class ResilientLLMClient(BaseLLMClient):
+    """Deadline-aware retry and hedging decorator around any ``BaseLLMClient``.
+
+    Every attempt is bounded by ``timeout`` and by the enclosing task
+    deadline; retryable failures are retried per ``retry`` as long as the
+    deadline leaves room (honouring ``Retry-After``). With ``hedge=True``,
+    once ``hedge_min_samples`` latencies are known, a second identical
+    request is sent if the first has not answered by the ``hedge_quantile``
+    latency, and whichever finishes first wins (the other is cancelled; its
+    provider-side cost is not counted). Streams are retried only until the
+    first chunk arrives and are never hedged.
+    """
+
+    def __init__(
+        self,
+        client: BaseLLMClient,
+        timeout: Optional[float] = None,
+        retry: Optional[RetryPolicy] = None,
+        hedge: bool = False,
+        hedge_quantile: float = 0.95,
+        hedge_min_samples: int = 20,
+        latency_window: int = 200
+    ):
+        self.client = client
+        self.timeout = timeout
+        self.retry = retry if retry is not None else RetryPolicy()
+        self.hedge = hedge
+        self.hedge_quantile = hedge_quantile
+        self.hedge_min_samples = hedge_min_samples
+        self._latencies: deque = deque(maxlen=latency_window)
+        self.attempts = 0
+        self.retries = 0
+        self.hedges = 0
+        self.hedge_wins = 0
+
+    @property
+    def supports_tools(self) -> bool:
+        return getattr(self.client, "supports_tools", False)
+
+    @property
+    def model(self) -> Optional[str]:
+        return getattr(self.client, "model", None)
+
+    def latency_quantile(self, quantile: float) -> Optional[float]:
+        if len(self._latencies) < max(1, self.hedge_min_samples):
+            return None
+        ordered = sorted(self._latencies)
+        return ordered[int(quantile * (len(ordered) - 1))]
+
+    def _budget(self) -> Optional[float]:
+        """Time allowed for the next attempt"""
+        left = remaining()
+        if left is not None and left <= 0:
+            raise DeadlineExceeded("Deadline exceeded before the LLM call")
+        budget = [t for t in (self.timeout, left) if t is not None]
+        return min(budget) if budget else None
+
+    async def _backoff(self, error: BaseException, attempt: int, delay: float) -> float:
+        """Sleep before the next attempt, or re-raise if out of attempts or time"""
+        if attempt >= self.retry.max_attempts or not is_retryable(error):
+            raise error
+        delay = self.retry.next_delay(delay)
+        delay = max(delay, _retry_after(error) or 0.0)
+        left = remaining()
+        if left is not None and delay >= left:
+            raise error
+        self.retries += 1
+        logger.debug("Retrying LLM call in %.2fs after %r", delay, error)
+        await asyncio.sleep(delay)
+        return delay
+
+    async def generate(self, messages: List[Dict[str, str]], **kwargs: Any) -> Dict[str, Any]:
+        delay = 0.0
+        attempt = 0
+        while True:
+            attempt += 1
+            budget = self._budget()
+            try:
+                return await self._attempt(messages, kwargs, budget)
+            except Exception as e:
+                delay = await self._backoff(e, attempt, delay)
+
+    async def _attempt(
+        self, messages: List[Dict[str, str]], kwargs: Dict[str, Any], budget: Optional[float]
+    ) -> Dict[str, Any]:
+        self.attempts += 1
+        start = time.monotonic()
+        hedge_after = self.latency_quantile(self.hedge_quantile) if self.hedge else None
+        if hedge_after is None or (budget is not None and hedge_after >= budget):
+            response = await asyncio.wait_for(self.client.generate(messages, **kwargs), budget)
+        else:
+            response = await self._hedged(messages, kwargs, budget, hedge_after)
+        self._latencies.append(time.monotonic() - start)
+        return response
+
+    async def _hedged(
+        self,
+        messages: List[Dict[str, str]],
+        kwargs: Dict[str, Any],
+        budget: Optional[float],
+        hedge_after: float
+    ) -> Dict[str, Any]:
+        start = time.monotonic()
+        primary = asyncio.ensure_future(self.client.generate(messages, **kwargs))
+        tasks = {primary}
+        try:
+            done, _ = await asyncio.wait(tasks, timeout=hedge_after)
+            if done:
+                return primary.result()
+
+            self.hedges += 1
+            backup = asyncio.ensure_future(self.client.generate(messages, **kwargs))
+            tasks.add(backup)
+            pending = set(tasks)
+            error: Optional[BaseException] = None
+            while pending:
+                left = None if budget is None else max(0.0, budget - (time.monotonic() - start))
+                done, pending = await asyncio.wait(
+                    pending, timeout=left, return_when=asyncio.FIRST_COMPLETED
+                )
+                if not done:
+                    raise asyncio.TimeoutError()
+                for task in done:
+                    if task.exception() is None:
+                        if task is backup:
+                            self.hedge_wins += 1
+                        return task.result()
+                    error = task.exception()
+            raise error
+        finally:
+            for task in tasks:
+                if not task.done():
+                    task.cancel()
+
+    async def stream(
+        self, messages: List[Dict[str, str]], **kwargs: Any
+    ) -> AsyncIterator[Dict[str, Any]]:
+        delay = 0.0
+        attempt = 0
+        while True:
+            attempt += 1
+            self._budget()
+            self.attempts += 1
+            started = False
+            try:
+                async for chunk in self.client.stream(messages, **kwargs):
+                    started = True
+                    yield chunk
+                return
+            except Exception as e:
+                if started:
+                    raise
+                delay = await self._backoff(e, attempt, delay)
+
+    def stats(self) -> Dict[str, Any]:
+        return {
+            "attempts": self.attempts,
+            "retries": self.retries,
+            "hedges": self.hedges,
+            "hedge_wins": self.hedge_wins,
+            "p95_latency": self.latency_quantile(0.95)
+        }
@@ -0,0 +1,192 @@
+"""Similarity-based response caching for LLM clients"""
+from collections import OrderedDict
+from typing import Any, AsyncIterator, Callable, Dict, FrozenSet, List, Optional, Tuple
+import re
+import time
+
+import numpy as np
+
+from .base import BaseLLMClient
+from .cache import request_key
+from ..memory.embeddings import default_embedding_function
+
+
+class _ScopeIndex:
+    """Normalized prompt embeddings and responses cached for one scope"""
+
+    def __init__(self, dim: int):
+        self.vectors = np.zeros((0, dim), dtype=np.float32)
+        self.entries: List[Tuple[FrozenSet[str], Dict[str, Any], float]] = []
+
+    def add(self, vector: np.ndarray, entities: FrozenSet[str], response: Dict[str, Any]):
+        self.vectors = np.vstack([self.vectors, vector[None, :]])
+        self.entries.append((entities, response, time.time()))
+
+    def drop(self, rows: List[int]):
+        keep = np.setdiff1d(np.arange(len(self.entries)), rows)
+        self.vectors = self.vectors[keep]
+        self.entries = [self.entries[i] for i in keep]
+
+
+class SemanticCachedLLMClient(BaseLLMClient):
+    """Serve near-duplicate prompts from earlier responses.
+
+    The final user message is embedded and compared (cosine) with previous
+    prompts that share the same *scope*: model, tools and every earlier
+    message (agent instructions, memories, prior turns). A hit needs
+    similarity >= ``threshold`` and the same salient tokens (numbers and
+    upper-case symbols such as tickers), so "analyze AAPL fundamentals" can
+    reuse "give me AAPL fundamental analysis" but never an MSFT answer.
+
+    Matching paraphrases takes a semantic embedding model. The default is
+    the one ``SemanticMemory`` uses with Chroma (``chromadb`` required);
+    pass ``embedding_function`` to use another. A lexical embedder such as
+    ``HashingEmbeddingFunction`` only reaches the default ``threshold`` for
+    near-identical wording. Each scope keeps at most ``max_entries_per_scope`` responses (oldest
+    evicted) for at most ``ttl`` seconds. Hits cost 0 and carry
+    ``cached: True`` plus the ``similarity``.
+    """
+
+    def __init__(
+        self,
+        client: BaseLLMClient,
+        threshold: float = 0.9,
+        embedding_function: Optional[Callable[[List[str]], np.ndarray]] = None,
+        max_scopes: int = 256,
+        max_entries_per_scope: int = 512,
+        ttl: Optional[float] = None,
+        namespace: str = ""
+    ):
+        self.client = client
+        self.threshold = threshold
+        if embedding_function is None:
+            try:
+                embedding_function = default_embedding_function()
+            except ImportError as e:
+                raise ImportError(
+                    "SemanticCachedLLMClient needs a semantic embedding model: "
+                    "install chromadb or pass embedding_function"
+                ) from e
+        self.embedding_function = embedding_function
+        self.max_scopes = max_scopes
+        self.max_entries_per_scope = max_entries_per_scope
+        self.ttl = ttl
+        self.namespace = namespace
+        self._scopes: "OrderedDict[str, _ScopeIndex]" = OrderedDict()
+        self.hits = 0
+        self.misses = 0
+
+    @property
+    def supports_tools(self) -> bool:
+        return getattr(self.client, "supports_tools", False)
+
+    @staticmethod
+    def _entities(text: str) -> FrozenSet[str]:
+        return frozenset(
+            token for token in re.findall(r"\w+", text)
+            if any(c.isdigit() for c in token) or (len(token) > 1 and token.isupper())
+        )
+
+    def _split(self, messages: List[Dict[str, Any]], kwargs: Dict[str, Any]):
+        """Return (scope key, final user prompt), or (None, None) if not cacheable"""
+        if not messages or messages[-1].get("role") != "user":
+            return None, None
+        prompt = messages[-1].get("content")
+        if not isinstance(prompt, str) or not prompt.strip():
+            return None, None
+        model = getattr(self.client, "model", None)
+        scope = request_key(messages[:-1], kwargs, f"{self.namespace}:{model}")
+        return scope, prompt
+
+    def _embed(self, prompt: str) -> np.ndarray:
+        vector = np.asarray(self.embedding_function([prompt]), dtype=np.float32)[0]
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def _lookup(self, scope: str, vector: np.ndarray, entities: FrozenSet[str]):
+        index = self._scopes.get(scope)
+        if index is None or not index.entries:
+            return None
+        self._scopes.move_to_end(scope)
+        if self.ttl is not None:
+            cutoff = time.time() - self.ttl
+            expired = [i for i, (_, _, created) in enumerate(index.entries) if created < cutoff]
+            if expired:
+                index.drop(expired)
+                if not index.entries:
+                    return None
+
+        scores = index.vectors @ vector
+        for row in np.argsort(-scores):
+            if scores[row] < self.threshold:
+                break
+            cached_entities, response, _ = index.entries[row]
+            if cached_entities == entities:
+                return {**response, "cost": 0.0, "cached": True, "similarity": float(scores[row])}
+        return None
+
+    def _store(self, scope: str, vector: np.ndarray, entities: FrozenSet[str], response):
+        index = self._scopes.get(scope)
+        if index is None:
+            index = self._scopes[scope] = _ScopeIndex(vector.shape[0])
+            while len(self._scopes) > self.max_scopes:
+                self._scopes.popitem(last=False)
+        index.add(vector, entities, response)
+        if len(index.entries) > self.max_entries_per_scope:
+            index.drop(list(range(len(index.entries) - self.max_entries_per_scope)))
+
+    async def generate(self, messages: List[Dict[str, str]], **kwargs: Any) -> Dict[str, Any]:
+        scope, prompt = self._split(messages, kwargs)
+        if scope is None:
+            return await self.client.generate(messages, **kwargs)
+
+        vector, entities = self._embed(prompt), self._entities(prompt)
+        cached = self._lookup(scope, vector, entities)
+        if cached is not None:
+            self.hits += 1
+            return cached
+
+        self.misses += 1
+        response = await self.client.generate(messages, **kwargs)
+        self._store(scope, vector, entities, response)
+        return response
+
+    async def stream(
+        self, messages: List[Dict[str, str]], **kwargs: Any
+    ) -> AsyncIterator[Dict[str, Any]]:
+        scope, prompt = self._split(messages, kwargs)
+        if scope is None:
+            async for chunk in self.client.stream(messages, **kwargs):
+                yield chunk
+            return
+
+        vector, entities = self._embed(prompt), self._entities(prompt)
+        cached = self._lookup(scope, vector, entities)
+        if cached is not None:
+            self.hits += 1
+            yield {"content": cached["content"]}
+            yield {"done": True, "response": cached}
+            return
+
+        self.misses += 1
+        async for chunk in self.client.stream(messages, **kwargs):
+            if chunk.get("done"):
+                self._store(scope, vector, entities, chunk["response"])
+            yield chunk
+
+    def clear(self, scope: Optional[str] = None) -> None:
+        """Evict one scope, or everything"""
+        if scope is None:
+            self._scopes.clear()
+        else:
+            self._scopes.pop(scope, None)
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "scopes": len(self._scopes),
+            "entries": sum(len(index.entries) for index in self._scopes.values()),
+            "hit_rate": self.hits / lookups if lookups else 0.0
+        }
@@ -0,0 +1,150 @@
+"""Shared, pooled HTTP transport for LLM clients"""
+from dataclasses import dataclass
+from typing import Any, Dict, Optional, Tuple
+import asyncio
+import hashlib
+import importlib
+import importlib.util
+import logging
+import weakref
+
+from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+
+logger = logging.getLogger(__name__)
+
+# The SDK's HTTP library: httpx, or its successor package on newer SDKs.
+# Transports and limits must come from the same library as the client.
+httpx = importlib.import_module(DefaultAsyncHttpxClient.__bases__[0].__module__.split(".")[0])
+
+
+class _CountingTransport(httpx.AsyncBaseTransport):
+    """Wraps the pooled transport to count requests, including failed ones"""
+
+    def __init__(self, transport: httpx.AsyncHTTPTransport, stats: Dict[str, int]):
+        self.transport = transport
+        self.stats = stats
+
+    async def handle_async_request(self, request: httpx.Request) -> httpx.Response:
+        self.stats["requests"] += 1
+        self.stats["in_flight"] += 1
+        try:
+            return await self.transport.handle_async_request(request)
+        finally:
+            self.stats["in_flight"] -= 1
+
+    def connections(self) -> Optional[Tuple[int, int]]:
+        """(open, idle) connections, or None if the pool can't be inspected"""
+        try:
+            pool = getattr(self.transport, "_pool", None)
+            connections = list(getattr(pool, "connections", None) or [])
+            return len(connections), sum(bool(c.is_idle()) for c in connections)
+        except Exception:
+            return None
+
+    async def aclose(self) -> None:
+        await self.transport.aclose()
+
+
+@dataclass
+class PoolConfig:
+    """Connection pool settings shared by all clients of a registry"""
+    max_connections: int = 100
+    max_keepalive_connections: int = 20
+    keepalive_expiry: float = 60.0
+    http2: bool = True
+    connect_timeout: float = 10.0
+    timeout: float = 600.0
+
+
+class ClientRegistry:
+    """Process-wide ``AsyncOpenAI`` clients keyed by (base_url, api_key).
+
+    Every ``OpenAIClient`` talking to the same endpoint with the same key
+    reuses one keep-alive connection pool (HTTP/2 when ``h2`` is installed)
+    instead of opening its own. Pools are bound to an event loop, so one is
+    kept per loop and dropped with it.
+    """
+
+    def __init__(self, config: Optional[PoolConfig] = None):
+        self.config = config or PoolConfig()
+        self._clients: Dict[Tuple[Optional[str], Optional[str]], Any] = {}
+        self._stats: Dict[Tuple[Optional[str], Optional[str]], Dict[str, int]] = {}
+        self._transports: Dict[Tuple[Optional[str], Optional[str]], Any] = {}
+
+    def get(self, api_key: Optional[str], base_url: Optional[str] = None) -> AsyncOpenAI:
+        """Return the shared client for this endpoint and the running loop"""
+        key = (base_url, api_key)
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            loop = None
+        per_loop = self._clients.setdefault(key, weakref.WeakKeyDictionary())
+        loop_key = loop if loop is not None else _NO_LOOP
+        client = per_loop.get(loop_key)
+        if client is None:
+            client, transport = self._create(key)
+            per_loop[loop_key] = client
+            self._transports.setdefault(key, weakref.WeakKeyDictionary())[loop_key] = transport
+        return client
+
+    def _create(
+        self, key: Tuple[Optional[str], Optional[str]]
+    ) -> Tuple[AsyncOpenAI, "_CountingTransport"]:
+        base_url, api_key = key
+        stats = self._stats.setdefault(key, {"clients": 0, "requests": 0, "in_flight": 0})
+        stats["clients"] += 1
+
+        http2 = self.config.http2 and importlib.util.find_spec("h2") is not None
+        if self.config.http2 and not http2:
+            logger.info("h2 is not installed; LLM connection pool falls back to HTTP/1.1")
+        transport = httpx.AsyncHTTPTransport(
+            http2=http2,
+            limits=httpx.Limits(
+                max_connections=self.config.max_connections,
+                max_keepalive_connections=self.config.max_keepalive_connections,
+                keepalive_expiry=self.config.keepalive_expiry
+            )
+        )
+        counting = _CountingTransport(transport, stats)
+        http_client = DefaultAsyncHttpxClient(
+            transport=counting,
+            timeout=httpx.Timeout(self.config.timeout, connect=self.config.connect_timeout)
+        )
+        client = AsyncOpenAI(api_key=api_key, base_url=base_url, http_client=http_client)
+        return client, counting
+
+    def stats(self) -> Dict[str, Dict[str, Any]]:
+        """Per-endpoint request counters and, where inspectable, pool occupancy"""
+        result = {}
+        for key in self._clients:
+            base_url, api_key = key
+            fingerprint = hashlib.sha256((api_key or "").encode()).hexdigest()[:8]
+            entry = dict(self._stats.get(key, {}))
+            occupancy = [
+                transport.connections()
+                for transport in self._transports.get(key, {}).values()
+            ]
+            if occupancy and all(o is not None for o in occupancy):
+                entry["connections"] = sum(o[0] for o in occupancy)
+                entry["idle_connections"] = sum(o[1] for o in occupancy)
+            result[f"{base_url or 'default'}#{fingerprint}"] = entry
+        return result
+
+    async def aclose(self) -> None:
+        """Close every pool opened on the running loop"""
+        loop = asyncio.get_running_loop()
+        for per_loop in self._transports.values():
+            per_loop.pop(loop, None)
+        for per_loop in self._clients.values():
+            client = per_loop.pop(loop, None)
+            if client is not None:
+                await client.close()
+
+
+class _NoLoop:
+    """Weak-referenceable stand-in for clients created outside an event loop"""
+
+
+_NO_LOOP = _NoLoop()
+
+default_registry = ClientRegistry()
@@ -0,0 +1,93 @@
+"""Micro-batching wrapper for memory providers"""
+from typing import Any, Awaitable, Callable, Dict, List, Optional, Tuple
+import asyncio
+
+from agentic_framework.core.memory import MemoryProvider
+
+
+class MicroBatcher:
+    """Merge concurrent ``submit`` calls into one ``handler`` call.
+    
+    The first item opens a window of ``window`` seconds; everything submitted
+    before it closes (or until ``max_batch`` items) is handed to ``handler``
+    as a list, which must return one result per item.
+    """
+    
+    def __init__(
+        self,
+        handler: Callable[[List[Any]], Awaitable[List[Any]]],
+        window: float = 0.005,
+        max_batch: int = 64
+    ):
+        self.handler = handler
+        self.window = window
+        self.max_batch = max_batch
+        self._items: List[Tuple[Any, asyncio.Future]] = []
+        self._timer: Optional[asyncio.TimerHandle] = None
+    
+    async def submit(self, item: Any) -> Any:
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
+        self._items.append((item, future))
+        if len(self._items) >= self.max_batch:
+            self._flush()
+        elif self._timer is None:
+            self._timer = loop.call_later(self.window, self._flush)
+        return await future
+    
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        items, self._items = self._items, []
+        if items:
+            asyncio.ensure_future(self._run(items))
+    
+    async def _run(self, items: List[Tuple[Any, asyncio.Future]]):
+        try:
+            results = await self.handler([item for item, _ in items])
+        except Exception as e:
+            for _, future in items:
+                if not future.done():
+                    future.set_exception(e)
+            return
+        for (_, future), result in zip(items, results):
+            if not future.done():
+                future.set_result(result)
+
+
+class BatchingMemory(MemoryProvider):
+    """Coalesce concurrent single ``store``/``retrieve`` calls into batches
+    
+    Wraps any provider so that requests arriving within ``window`` seconds are
+    served by one ``store_many``/``retrieve_many`` call on the inner provider.
+    """
+    
+    def __init__(self, provider: MemoryProvider, window: float = 0.005, max_batch: int = 64):
+        self.provider = provider
+        self.window = window
+        self.max_batch = max_batch
+        self._store_batcher = MicroBatcher(self._store_batch, window, max_batch)
+        self._retrieve_batchers: Dict[int, MicroBatcher] = {}
+    
+    async def _store_batch(self, memories: List[Dict[str, Any]]) -> List[None]:
+        await self.provider.store_many(memories)
+        return [None] * len(memories)
+    
+    async def store(self, memory: Dict[str, Any]) -> None:
+        await self._store_batcher.submit(memory)
+    
+    async def retrieve(self, query: str, k: int = 5) -> List[Dict[str, Any]]:
+        if k not in self._retrieve_batchers:
+            self._retrieve_batchers[k] = MicroBatcher(
+                lambda queries: self.provider.retrieve_many(queries, k),
+                self.window,
+                self.max_batch
+            )
+        return await self._retrieve_batchers[k].submit(query)
+    
+    async def store_many(self, memories: List[Dict[str, Any]]) -> None:
+        await self.provider.store_many(memories)
+    
+    async def retrieve_many(self, queries: List[str], k: int = 5) -> List[List[Dict[str, Any]]]:
+        return await self.provider.retrieve_many(queries, k)
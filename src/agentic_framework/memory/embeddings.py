@@ -0,0 +1,151 @@
+"""Local embedding functions and caching"""
+from collections import OrderedDict
+from typing import Any, Callable, Dict, List, Optional, Tuple
+import hashlib
+import re
+import sqlite3
+import threading
+import zlib
+
+import numpy as np
+
+
+def default_embedding_function() -> Callable[[List[str]], Any]:
+    """Chroma's bundled sentence-embedding model (all-MiniLM-L6-v2 on ONNX).
+    
+    Unlike ``HashingEmbeddingFunction`` it is semantic: paraphrases land
+    close together. Needs ``chromadb``; the model is downloaded on first use.
+    """
+    from chromadb.utils import embedding_functions
+    
+    return embedding_functions.DefaultEmbeddingFunction()
+
+
+class HashingEmbeddingFunction:
+    """Offline, CPU-only embeddings via the signed hashing trick.
+    
+    Word unigrams and bigrams are hashed (stable CRC32, not the salted
+    builtin ``hash``) into ``dim`` buckets, log-scaled and L2-normalized.
+    No model download, deterministic across processes. Similarity is
+    lexical: reworded text with few shared words scores low.
+    """
+    
+    def __init__(self, dim: int = 256):
+        self.dim = dim
+    
+    def __call__(self, texts: List[str]) -> np.ndarray:
+        vectors = np.zeros((len(texts), self.dim), dtype=np.float32)
+        for row, text in enumerate(texts):
+            tokens = re.findall(r"\w+", text.lower())
+            features = tokens + [f"{a} {b}" for a, b in zip(tokens, tokens[1:])]
+            for feature in features:
+                h = zlib.crc32(feature.encode("utf-8"))
+                vectors[row, h % self.dim] += 1.0 if h & 0x80000000 else -1.0
+        vectors = np.sign(vectors) * np.log1p(np.abs(vectors))
+        norms = np.linalg.norm(vectors, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        return vectors / norms
+
+
+class CachedEmbeddingFunction:
+    """Content-addressed cache in front of any embedding function.
+    
+    Texts are keyed by SHA-256 of ``namespace`` + text. Lookups hit an
+    in-memory LRU of ``max_entries`` vectors first, then the optional SQLite
+    tier at ``disk_path``; only the remaining misses are embedded, in one
+    batch. ``stats()`` reports hit/miss counters.
+    """
+    
+    def __init__(
+        self,
+        embedding_function: Callable[[List[str]], Any],
+        max_entries: int = 10000,
+        disk_path: Optional[str] = None,
+        namespace: Optional[str] = None
+    ):
+        self.embedding_function = embedding_function
+        self.max_entries = max_entries
+        self.namespace = namespace or type(embedding_function).__qualname__
+        self.hits = 0
+        self.disk_hits = 0
+        self.misses = 0
+        self._lru: "OrderedDict[str, np.ndarray]" = OrderedDict()
+        self._lock = threading.Lock()
+        self._conn: Optional[sqlite3.Connection] = None
+        if disk_path:
+            self._conn = sqlite3.connect(disk_path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            with self._conn:
+                self._conn.execute(
+                    "CREATE TABLE IF NOT EXISTS embeddings (key TEXT PRIMARY KEY, vector BLOB)"
+                )
+    
+    def _key(self, text: str) -> str:
+        return hashlib.sha256(f"{self.namespace}\0{text}".encode("utf-8")).hexdigest()
+    
+    def __call__(self, texts: List[str]) -> np.ndarray:
+        keys = [self._key(text) for text in texts]
+        found: Dict[str, np.ndarray] = {}
+        with self._lock:
+            for key in keys:
+                if key in self._lru:
+                    self._lru.move_to_end(key)
+                    found[key] = self._lru[key]
+                    self.hits += 1
+            
+            missing = [key for key in dict.fromkeys(keys) if key not in found]
+            if missing and self._conn is not None:
+                for key, blob in self._disk_get(missing):
+                    found[key] = np.frombuffer(blob, dtype=np.float32)
+                    self._remember(key, found[key])
+                    self.disk_hits += 1
+        
+        todo = {key: text for key, text in zip(keys, texts) if key not in found}
+        if todo:
+            vectors = np.asarray(self.embedding_function(list(todo.values())), dtype=np.float32)
+            with self._lock:
+                self.misses += len(todo)
+                for key, vector in zip(todo, vectors):
+                    found[key] = vector
+                    self._remember(key, vector)
+                if self._conn is not None:
+                    with self._conn:
+                        self._conn.executemany(
+                            "INSERT OR REPLACE INTO embeddings (key, vector) VALUES (?, ?)",
+                            [(key, found[key].tobytes()) for key in todo]
+                        )
+        
+        return np.stack([found[key] for key in keys]) if keys else np.zeros((0, 0), np.float32)
+    
+    def _disk_get(self, keys: List[str]) -> List[Tuple[str, bytes]]:
+        rows = []
+        # Stay well under SQLite's bound-parameter limit
+        for start in range(0, len(keys), 500):
+            chunk = keys[start:start + 500]
+            placeholders = ",".join("?" * len(chunk))
+            rows.extend(self._conn.execute(
+                f"SELECT key, vector FROM embeddings WHERE key IN ({placeholders})", chunk
+            ))
+        return rows
+    
+    def _remember(self, key: str, vector: np.ndarray):
+        self._lru[key] = vector
+        self._lru.move_to_end(key)
+        while len(self._lru) > self.max_entries:
+            self._lru.popitem(last=False)
+    
+    def stats(self) -> Dict[str, Any]:
+        """Hit/miss counters; ``hit_rate`` counts both cache tiers as hits"""
+        lookups = self.hits + self.disk_hits + self.misses
+        return {
+            "hits": self.hits,
+            "disk_hits": self.disk_hits,
+            "misses": self.misses,
+            "size": len(self._lru),
+            "hit_rate": (self.hits + self.disk_hits) / lookups if lookups else 0.0
+        }
+    
+    def close(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
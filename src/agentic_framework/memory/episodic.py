@@ -1,20 +1,93 @@
 """Episodic Memory using SQLite"""
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Tuple, Union
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import atexit
+import logging
+import math
+import re
 import sqlite3
 import json
+import weakref
 from datetime import datetime
 from agentic_framework.core.memory import MemoryProvider
 
+logger = logging.getLogger(__name__)
+
+INSERT_EPISODES = """
+    INSERT INTO episodes (timestamp, agent_id, task, content, type)
+    VALUES (?, ?, ?, ?, ?)
+"""
+
+# Dropped from full-text queries: they match most rows and only add scan work
+STOPWORDS = frozenset("""
+    a about above after again against all am an and any are as at be because been
+    before being below between both but by can could did do does doing down during
+    each few for from further had has have having he her here hers him his how i if
+    in into is it its itself just me more most my no nor not now of off on once only
+    or other our ours out over own same she should so some such than that the their
+    theirs them then there these they this those through to too under until up very
+    was we were what when where which while who whom why will with would you your
+""".split())
+
+# Open memories whose buffered episodes are written at exit if never closed
+_open_memories: "weakref.WeakSet[EpisodicMemory]" = weakref.WeakSet()
+
+
+@atexit.register
+def _flush_at_exit():
+    for memory in list(_open_memories):
+        memory._flush_at_exit()
+
+
 class EpisodicMemory(MemoryProvider):
-    """Episodic memory using SQLite for time-series events"""
+    """Episodic memory using SQLite for time-series events
+    
+    A single long-lived WAL connection is owned by a dedicated worker thread,
+    so no SQLite I/O runs on the event loop. Writes are buffered and flushed
+    in one transaction once ``batch_size`` rows are queued or after
+    ``flush_interval`` seconds; reads flush first so they see every stored
+    episode. A failed flush puts its rows back in the buffer (a cancelled one
+    still commits), and episodes still buffered at interpreter exit are
+    written then.
+    
+    Non-empty queries are answered from an FTS5 index kept in sync with
+    ``episodes`` by triggers and ranked with BM25. Stopwords and one-letter
+    words are dropped; episodes containing every remaining term rank first,
+    and episodes matching any term only fill the remaining slots. ``recency_weight`` blends in
+    an exponential recency decay with the given half-life (seconds). If the
+    SQLite build lacks FTS5, retrieval falls back to most-recent episodes.
+    """
     
-    def __init__(self, db_path: str = "episodic_memory.db"):
+    FTS_CANDIDATE_FACTOR = 4
+    
+    def __init__(
+        self,
+        db_path: str = "episodic_memory.db",
+        batch_size: int = 64,
+        flush_interval: float = 0.05,
+        recency_weight: float = 0.0,
+        recency_half_life: float = 86400.0
+    ):
         self.db_path = db_path
-        self._init_db()
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.recency_weight = recency_weight
+        self.recency_half_life = recency_half_life
+        self.fts_enabled = False
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="episodic-sqlite")
+        self._conn: Optional[sqlite3.Connection] = None
+        self._pending: List[Tuple] = []
+        self._flush_task: Optional[asyncio.Task] = None
+        self._executor.submit(self._init_db).result()
+        _open_memories.add(self)
         
     def _init_db(self):
-        with sqlite3.connect(self.db_path) as conn:
-            conn.execute("""
+        self._conn = sqlite3.connect(self.db_path)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        with self._conn:
+            self._conn.execute("""
                 CREATE TABLE IF NOT EXISTS episodes (
                     id INTEGER PRIMARY KEY AUTOINCREMENT,
                     timestamp TEXT,
@@ -24,39 +97,260 @@ class EpisodicMemory(MemoryProvider):
                     type TEXT
                 )
             """)
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_episodes_timestamp ON episodes (timestamp)"
+            )
+            self._conn.execute(
+                "CREATE INDEX IF NOT EXISTS idx_episodes_agent_timestamp "
+                "ON episodes (agent_id, timestamp)"
+            )
+        self._init_fts()
+    
+    def _init_fts(self):
+        """Create the FTS5 index and the triggers that keep it in sync"""
+        exists = self._conn.execute(
+            "SELECT 1 FROM sqlite_master WHERE name = 'episodes_fts'"
+        ).fetchone()
+        try:
+            with self._conn:
+                self._conn.execute("""
+                    CREATE VIRTUAL TABLE IF NOT EXISTS episodes_fts USING fts5(
+                        task, content, content='episodes', content_rowid='id'
+                    )
+                """)
+                self._conn.execute("""
+                    CREATE TRIGGER IF NOT EXISTS episodes_ai AFTER INSERT ON episodes BEGIN
+                        INSERT INTO episodes_fts (rowid, task, content)
+                        VALUES (new.id, new.task, new.content);
+                    END
+                """)
+                self._conn.execute("""
+                    CREATE TRIGGER IF NOT EXISTS episodes_ad AFTER DELETE ON episodes BEGIN
+                        INSERT INTO episodes_fts (episodes_fts, rowid, task, content)
+                        VALUES ('delete', old.id, old.task, old.content);
+                    END
+                """)
+                self._conn.execute("""
+                    CREATE TRIGGER IF NOT EXISTS episodes_au AFTER UPDATE ON episodes BEGIN
+                        INSERT INTO episodes_fts (episodes_fts, rowid, task, content)
+                        VALUES ('delete', old.id, old.task, old.content);
+                        INSERT INTO episodes_fts (rowid, task, content)
+                        VALUES (new.id, new.task, new.content);
+                    END
+                """)
+                if not exists:
+                    # Index episodes written before FTS was introduced
+                    self._conn.execute("INSERT INTO episodes_fts (episodes_fts) VALUES ('rebuild')")
+        except sqlite3.OperationalError:
+            return
+        self.fts_enabled = True
+    
+    async def _run(self, fn, *args):
+        """Run a blocking call on the connection's worker thread"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, fn, *args)
             
     async def store(self, memory: Dict[str, Any]) -> None:
-        """Log an episode"""
-        with sqlite3.connect(self.db_path) as conn:
-            conn.execute("""
-                INSERT INTO episodes (timestamp, agent_id, task, content, type)
-                VALUES (?, ?, ?, ?, ?)
-            """, (
-                datetime.now().isoformat(),
+        """Log an episode (buffered, see ``flush``)"""
+        await self.store_many([memory])
+    
+    async def store_many(self, memories: List[Dict[str, Any]]) -> None:
+        """Log several episodes (buffered, see ``flush``)"""
+        timestamp = datetime.now().isoformat()
+        self._pending.extend(
+            (
+                timestamp,
                 memory.get("agent_id", "unknown"),
                 memory.get("task", ""),
                 json.dumps(memory.get("content", {})),
                 memory.get("type", "experience")
-            ))
-            
-    async def retrieve(self, query: str, k: int = 5) -> List[Dict[str, Any]]:
-        """Retrieve recent episodes (simple time-based)"""
-        # Note: 'query' is ignored in this simple implementation, acts as 'get recent'
-        with sqlite3.connect(self.db_path) as conn:
-            cursor = conn.execute("""
-                SELECT timestamp, agent_id, task, content, type 
-                FROM episodes 
-                ORDER BY timestamp DESC 
-                LIMIT ?
-            """, (k,))
+            )
+            for memory in memories
+        )
+        if len(self._pending) >= self.batch_size:
+            await self.flush()
+        elif self._flush_task is None or self._flush_task.done():
+            self._flush_task = asyncio.create_task(self._flush_later())
+    
+    async def _flush_later(self):
+        await asyncio.sleep(self.flush_interval)
+        await self.flush()
+    
+    async def flush(self) -> None:
+        """Write all buffered episodes in a single transaction
+        
+        The write is shielded: a caller cancelled mid-flush (e.g. a retrieve
+        past its deadline) leaves it to commit on the connection thread.
+        Only a write that fails hands its rows back to the buffer.
+        """
+        rows, self._pending = self._pending, []
+        if not rows:
+            return
+        write = asyncio.ensure_future(self._run(self._insert_many, rows))
+        write.add_done_callback(lambda done: self._requeue_if_failed(done, rows))
+        await asyncio.shield(write)
+    
+    def _requeue_if_failed(self, write: asyncio.Future, rows: List[Tuple]) -> None:
+        if write.cancelled() or write.exception() is None:
+            return
+        # Keep the rows (ahead of newer ones) for the next flush
+        self._pending[:0] = rows
+        logger.error(
+            "Failed to write %d episodes; kept for retry", len(rows), exc_info=write.exception()
+        )
+    
+    def _insert_many(self, rows: List[Tuple]):
+        with self._conn:
+            self._conn.executemany(INSERT_EPISODES, rows)
+    
+    def _flush_at_exit(self):
+        """Write buffered rows on a fresh connection (executors are gone at exit)"""
+        rows, self._pending = self._pending, []
+        if not rows:
+            return
+        try:
+            conn = sqlite3.connect(self.db_path)
+            try:
+                with conn:
+                    conn.executemany(INSERT_EPISODES, rows)
+            finally:
+                conn.close()
+        except Exception:
+            logger.exception("Lost %d buffered episodes at exit", len(rows))
             
-            results = []
-            for row in cursor:
-                results.append({
-                    "timestamp": row[0],
-                    "agent_id": row[1],
-                    "task": row[2],
-                    "content": json.loads(row[3]),
-                    "type": row[4]
-                })
-            return results
+    async def retrieve(
+        self,
+        query: str,
+        k: int = 5,
+        agent_id: Optional[str] = None,
+        episode_type: Optional[str] = None,
+        since: Optional[Union[str, datetime]] = None,
+        until: Optional[Union[str, datetime]] = None,
+        recency_weight: Optional[float] = None
+    ) -> List[Dict[str, Any]]:
+        """Retrieve episodes matching ``query`` (BM25), or the most recent if empty"""
+        await self.flush()
+        filters = self._filters(agent_id, episode_type, since, until)
+        weight = self.recency_weight if recency_weight is None else recency_weight
+        return await self._run(self._search, query, k, filters, weight)
+    
+    async def retrieve_many(self, queries: List[str], k: int = 5) -> List[List[Dict[str, Any]]]:
+        """Run several queries in one hop to the connection thread"""
+        await self.flush()
+        return await self._run(
+            lambda: [self._search(query, k, [], self.recency_weight) for query in queries]
+        )
+    
+    def _search(
+        self, query: str, k: int, filters: List[Tuple[str, Any]], weight: float
+    ) -> List[Dict[str, Any]]:
+        terms = self._query_terms(query) if self.fts_enabled else []
+        if not terms:
+            return self._select_recent(k, filters)
+        
+        limit = k * self.FTS_CANDIDATE_FACTOR if weight > 0 else k
+        episodes = self._select_matching(self._match_expression(terms, "AND"), limit, filters)
+        if len(terms) > 1 and len(episodes) < limit:
+            seen = {episode["id"] for episode in episodes}
+            extra = self._select_matching(self._match_expression(terms, "OR"), limit, filters)
+            episodes += [e for e in extra if e["id"] not in seen][:limit - len(episodes)]
+        for episode in episodes:
+            del episode["id"]
+        if weight > 0:
+            episodes = self._blend_recency(episodes, weight)[:k]
+        return episodes
+    
+    @staticmethod
+    def _filters(
+        agent_id: Optional[str],
+        episode_type: Optional[str],
+        since: Optional[Union[str, datetime]],
+        until: Optional[Union[str, datetime]]
+    ) -> List[Tuple[str, Any]]:
+        """Build (SQL condition, parameter) pairs for the optional filters"""
+        filters = []
+        if agent_id is not None:
+            filters.append(("e.agent_id = ?", agent_id))
+        if episode_type is not None:
+            filters.append(("e.type = ?", episode_type))
+        if since is not None:
+            if isinstance(since, datetime):
+                since = since.isoformat()
+            filters.append(("e.timestamp >= ?", since))
+        if until is not None:
+            if isinstance(until, datetime):
+                until = until.isoformat()
+            filters.append(("e.timestamp < ?", until))
+        return filters
+    
+    @staticmethod
+    def _query_terms(query: str) -> List[str]:
+        """Distinct searchable words: no stopwords, no single letters (digits stay)"""
+        words = dict.fromkeys(re.findall(r"\w+", query.lower()))
+        return [w for w in words if w not in STOPWORDS and (len(w) > 1 or w.isdigit())]
+    
+    @staticmethod
+    def _match_expression(terms: List[str], operator: str) -> str:
+        """Join quoted terms (so no FTS syntax leaks in) with AND or OR"""
+        return f" {operator} ".join(f'"{term}"' for term in terms)
+    
+    def _select_recent(self, k: int, filters: List[Tuple[str, Any]]) -> List[Dict[str, Any]]:
+        sql = "SELECT e.timestamp, e.agent_id, e.task, e.content, e.type FROM episodes e"
+        if filters:
+            sql += " WHERE " + " AND ".join(cond for cond, _ in filters)
+        sql += " ORDER BY e.timestamp DESC LIMIT ?"
+        params = [value for _, value in filters] + [k]
+        
+        return [self._row_to_episode(row) for row in self._conn.execute(sql, params)]
+    
+    def _select_matching(
+        self, match: str, k: int, filters: List[Tuple[str, Any]]
+    ) -> List[Dict[str, Any]]:
+        sql = """
+            SELECT e.timestamp, e.agent_id, e.task, e.content, e.type, bm25(episodes_fts), e.id
+            FROM episodes_fts JOIN episodes e ON e.id = episodes_fts.rowid
+            WHERE episodes_fts MATCH ?
+        """
+        for cond, _ in filters:
+            sql += f" AND {cond}"
+        sql += " ORDER BY bm25(episodes_fts) LIMIT ?"
+        params = [match] + [value for _, value in filters] + [k]
+        
+        episodes = []
+        for row in self._conn.execute(sql, params):
+            episode = self._row_to_episode(row)
+            episode["score"] = -row[5]  # bm25() is lower-is-better
+            episode["id"] = row[6]
+            episodes.append(episode)
+        return episodes
+    
+    def _blend_recency(self, episodes: List[Dict[str, Any]], weight: float) -> List[Dict[str, Any]]:
+        """Re-rank by (1 - weight) * normalized relevance + weight * recency decay"""
+        if not episodes:
+            return episodes
+        now = datetime.now()
+        top = max(e["score"] for e in episodes) or 1.0
+        for episode in episodes:
+            age = (now - datetime.fromisoformat(episode["timestamp"])).total_seconds()
+            recency = math.exp(-math.log(2) * max(age, 0.0) / self.recency_half_life)
+            episode["score"] = (1 - weight) * episode["score"] / top + weight * recency
+        return sorted(episodes, key=lambda e: e["score"], reverse=True)
+    
+    @staticmethod
+    def _row_to_episode(row: Tuple) -> Dict[str, Any]:
+        return {
+            "timestamp": row[0],
+            "agent_id": row[1],
+            "task": row[2],
+            "content": json.loads(row[3]),
+            "type": row[4]
+        }
+    
+    async def close(self) -> None:
+        """Flush pending writes and release the connection"""
+        if self._flush_task and not self._flush_task.done():
+            self._flush_task.cancel()
+        await self.flush()
+        _open_memories.discard(self)
+        await self._run(self._conn.close)
+        self._executor.shutdown(wait=True)
@@ -1,9 +1,16 @@
-from typing import List, Dict, Any
+from typing import List, Dict, Any, Optional, Set
+import asyncio
+import json
+import logging
+import re
 from agentic_framework.core.memory import MemoryProvider
 from .semantic import SemanticMemory
 from .episodic import EpisodicMemory
 from .procedural import ProceduralMemory
 
+logger = logging.getLogger(__name__)
+
+
 class MultiLayerMemory(MemoryProvider):
     """
     Orchestrates multiple memory layers:
@@ -11,46 +18,157 @@ class MultiLayerMemory(MemoryProvider):
     2. Semantic (Vector DB)
     3. Episodic (Time-series DB)
     4. Procedural (Rules/Preferences)
+
+    ``retrieve`` queries the short-term, semantic and episodic layers
+    concurrently, each under its own deadline (``layer_timeouts``, seconds),
+    and merges whatever came back in time with reciprocal-rank fusion. A
+    layer that is slow or fails contributes nothing instead of stalling the
+    turn. ``store`` writes all layers concurrently; with ``background_writes``
+    it returns immediately and ``flush()`` awaits the pending writes.
     """
-    
-    def __init__(self):
+
+    DEFAULT_LAYER_TIMEOUTS = {"short_term": 0.05, "semantic": 1.0, "episodic": 0.5}
+    RRF_K = 60
+    SHORT_TERM_SIZE = 10
+
+    def __init__(
+        self,
+        semantic: Optional[MemoryProvider] = None,
+        episodic: Optional[MemoryProvider] = None,
+        procedural: Optional[ProceduralMemory] = None,
+        layer_timeouts: Optional[Dict[str, float]] = None,
+        background_writes: bool = False
+    ):
         self.short_term = [] # Simple list for context
-        self.semantic = SemanticMemory()
-        self.episodic = EpisodicMemory()
-        self.procedural = ProceduralMemory()
-        
+        self.semantic = semantic or SemanticMemory()
+        self.episodic = episodic or EpisodicMemory()
+        self.procedural = procedural or ProceduralMemory()
+        self.layer_timeouts = {**self.DEFAULT_LAYER_TIMEOUTS, **(layer_timeouts or {})}
+        self.background_writes = background_writes
+        self._pending_writes: Set[asyncio.Task] = set()
+
     async def store(self, memory: Dict[str, Any]) -> None:
         """Store in appropriate layers"""
+        await self.store_many([memory])
+
+    async def store_many(self, memories: List[Dict[str, Any]]) -> None:
+        """Store a batch, writing all layers concurrently"""
         # 1. Short-term
-        self.short_term.append(memory)
-        if len(self.short_term) > 10:
-            self.short_term.pop(0)
-            
+        self.short_term.extend(memories)
+        del self.short_term[:-self.SHORT_TERM_SIZE]
+
+        writes = {}
         # 2. Episodic (Log everything)
-        await self.episodic.store(memory)
-        
+        writes["episodic"] = self.episodic.store_many(memories)
+
         # 3. Semantic (Only if explicitly marked or important)
-        if isinstance(memory.get("content"), str):
-            await self.semantic.store(memory)
-            
+        semantic = [m for m in memories if isinstance(m.get("content"), str)]
+        if semantic:
+            writes["semantic"] = self.semantic.store_many(semantic)
+
         # 4. Procedural (Check for rule updates)
         # Simple heuristic: if memory has "type": "rule"
-        if memory.get("type") == "rule":
+        rules = [m for m in memories if m.get("type") == "rule"]
+        if rules:
+            writes["procedural"] = asyncio.to_thread(self._store_rules, rules)
+
+        if self.background_writes:
+            for layer, write in writes.items():
+                task = asyncio.create_task(self._guarded_write(layer, write))
+                self._pending_writes.add(task)
+                task.add_done_callback(self._pending_writes.discard)
+        else:
+            await asyncio.gather(*writes.values())
+
+    def _store_rules(self, rules: List[Dict[str, Any]]):
+        for memory in rules:
             key = memory.get("key", "general")
             value = memory.get("content")
             self.procedural.set_preference(key, value)
-            
+
+    async def _guarded_write(self, layer: str, write):
+        try:
+            await write
+        except Exception:
+            logger.exception("Background write to %s memory failed", layer)
+
+    async def flush(self) -> None:
+        """Wait for background layer writes to finish"""
+        if self._pending_writes:
+            await asyncio.gather(*list(self._pending_writes))
+
     async def retrieve(self, query: str, k: int = 5) -> List[Dict[str, Any]]:
-        """Retrieve from Semantic memory (primary for knowledge)"""
-        return await self.semantic.retrieve(query, k)
-    
+        """Retrieve from all fast layers and fuse the rankings"""
+        return (await self.retrieve_many([query], k))[0]
+
+    async def retrieve_many(self, queries: List[str], k: int = 5) -> List[List[Dict[str, Any]]]:
+        """Fan out one batched query per layer, then fuse per query"""
+        layers = {
+            "short_term": self._retrieve_short_term(queries, k),
+            "semantic": self.semantic.retrieve_many(queries, k),
+            "episodic": self.episodic.retrieve_many(queries, k),
+        }
+        results = await asyncio.gather(*(
+            self._with_deadline(layer, call, len(queries)) for layer, call in layers.items()
+        ))
+        return [
+            self._fuse([layer_results[q] for layer_results in results], k)
+            for q in range(len(queries))
+        ]
+
+    async def _with_deadline(
+        self, layer: str, call, num_queries: int
+    ) -> List[List[Dict[str, Any]]]:
+        """Await a layer's results, treating timeouts and errors as no results"""
+        try:
+            return await asyncio.wait_for(call, self.layer_timeouts.get(layer))
+        except asyncio.TimeoutError:
+            logger.warning("%s memory missed its %ss deadline", layer, self.layer_timeouts[layer])
+        except Exception:
+            logger.exception("%s memory retrieval failed", layer)
+        return [[] for _ in range(num_queries)]
+
+    async def _retrieve_short_term(self, queries: List[str], k: int) -> List[List[Dict[str, Any]]]:
+        """Rank buffered memories by query-term overlap, newest first on ties"""
+        batches = []
+        for query in queries:
+            terms = set(re.findall(r"\w+", query.lower()))
+            scored = []
+            for age, memory in enumerate(reversed(self.short_term)):
+                text = self._content_text(memory).lower()
+                overlap = sum(1 for term in terms if term in text)
+                if overlap:
+                    scored.append((-overlap, age, memory))
+            scored.sort(key=lambda item: item[:2])
+            batches.append([memory for _, _, memory in scored[:k]])
+        return batches
+
+    def _fuse(self, rankings: List[List[Dict[str, Any]]], k: int) -> List[Dict[str, Any]]:
+        """Reciprocal-rank fusion, de-duplicated on content"""
+        fused: Dict[str, Dict[str, Any]] = {}
+        for ranking in rankings:
+            for rank, memory in enumerate(ranking):
+                text = self._content_text(memory)
+                entry = fused.get(text)
+                if entry is None:
+                    entry = fused[text] = {"content": text, "score": 0.0}
+                for key, value in memory.items():
+                    entry.setdefault(key, value)
+                entry["score"] += 1.0 / (self.RRF_K + rank + 1)
+        return sorted(fused.values(), key=lambda m: m["score"], reverse=True)[:k]
+
+    @staticmethod
+    def _content_text(memory: Dict[str, Any]) -> str:
+        content = memory.get("content", "")
+        return content if isinstance(content, str) else json.dumps(content, default=str)
+
     def get_procedural_context(self) -> str:
         """Get procedural rules to inject into context"""
         return self.procedural.get_all_context()
-    
+
     async def get_recent_episodes(self, k: int = 5) -> List[Dict[str, Any]]:
         """Get recent episodes"""
         return await self.episodic.retrieve("", k)
-    
+
     async def consolidate(self):
         pass
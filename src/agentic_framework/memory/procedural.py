@@ -1,45 +1,170 @@
+import atexit
 import json
 import os
-from typing import Dict, Any, Optional
+import tempfile
+import threading
+import weakref
+from typing import Dict, Any, Optional, Set
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+
+# Debounced instances with updates to flush at exit (weak, so they can be collected)
+_debounced: "weakref.WeakSet[ProceduralMemory]" = weakref.WeakSet()
+
+
+@atexit.register
+def _flush_at_exit():
+    for memory in list(_debounced):
+        memory.flush()
+
 
 class ProceduralMemory:
     """
     Stores procedural knowledge (rules, preferences) as key-value pairs.
     Backed by a JSON file.
+
+    Snapshots are written atomically (temp file + rename) under an advisory
+    file lock, merging with whatever other workers wrote. With
+    ``flush_interval_ms`` updates are coalesced and flushed at most that often
+    (and at interpreter exit); otherwise every update is flushed immediately.
+    ``journal=True`` also appends each update to ``<filepath>.journal`` so
+    unflushed updates survive a crash.
     """
-    
-    def __init__(self, filepath: str = "procedural_memory.json"):
+
+    def __init__(
+        self,
+        filepath: str = "procedural_memory.json",
+        flush_interval_ms: Optional[int] = None,
+        journal: bool = False
+    ):
         self.filepath = filepath
+        self.flush_interval_ms = flush_interval_ms
+        self.journal = journal
         self.memory: Dict[str, Any] = {}
+        self._dirty: Set[str] = set()
+        self._lock = threading.RLock()
+        self._timer: Optional[threading.Timer] = None
+        self._context: Optional[str] = None
         self._load()
+        if flush_interval_ms is not None:
+            _debounced.add(self)
+
+    @property
+    def journal_path(self) -> str:
+        return f"{self.filepath}.journal"
 
     def _load(self):
+        self.memory = self._read_disk()
+
+    def _read_disk(self) -> Dict[str, Any]:
+        """Latest snapshot with any journaled updates replayed on top"""
+        memory: Dict[str, Any] = {}
         if os.path.exists(self.filepath):
             try:
                 with open(self.filepath, "r") as f:
-                    self.memory = json.load(f)
+                    memory = json.load(f)
             except json.JSONDecodeError:
-                self.memory = {}
+                memory = {}
+        if os.path.exists(self.journal_path):
+            with open(self.journal_path, "r") as f:
+                for line in f:
+                    try:
+                        entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        break  # Torn final line from a crash
+                    memory[entry["key"]] = entry["value"]
+        return memory
 
     def _save(self):
-        with open(self.filepath, "w") as f:
-            json.dump(self.memory, f, indent=2)
+        with self._lock, self._file_lock():
+            merged = self._read_disk()
+            merged.update({key: self.memory[key] for key in self._dirty})
+            self._write_atomic(merged)
+            if os.path.exists(self.journal_path):
+                # Everything journaled so far is now in the snapshot
+                open(self.journal_path, "w").close()
+            self.memory = merged
+            self._dirty.clear()
+            self._context = None
+
+    def _write_atomic(self, data: Dict[str, Any]):
+        directory = os.path.dirname(os.path.abspath(self.filepath))
+        fd, tmp_path = tempfile.mkstemp(dir=directory, prefix=".procedural-", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w") as f:
+                json.dump(data, f, indent=2)
+                f.flush()
+                os.fsync(f.fileno())
+            os.replace(tmp_path, self.filepath)
+        except BaseException:
+            if os.path.exists(tmp_path):
+                os.remove(tmp_path)
+            raise
+
+    def _file_lock(self):
+        return _FileLock(f"{self.filepath}.lock")
 
     def set_preference(self, key: str, value: Any):
         """Set a preference or rule"""
-        self.memory[key] = value
-        self._save()
+        with self._lock:
+            self.memory[key] = value
+            self._dirty.add(key)
+            self._context = None
+            if self.journal:
+                # Under the file lock so other writers' lines never interleave
+                # with ours or land between a snapshot and its journal reset
+                with self._file_lock(), open(self.journal_path, "a") as f:
+                    f.write(json.dumps({"key": key, "value": value}) + "\n")
+            if self.flush_interval_ms is None:
+                self._save()
+            elif self._timer is None:
+                self._timer = threading.Timer(self.flush_interval_ms / 1000, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def flush(self):
+        """Write pending updates now"""
+        with self._lock:
+            if self._timer is not None:
+                self._timer.cancel()
+                self._timer = None
+            if self._dirty:
+                self._save()
 
     def get_preference(self, key: str) -> Optional[Any]:
         """Get a preference"""
         return self.memory.get(key)
 
     def get_all_context(self) -> str:
-        """Get all preferences formatted as context string"""
-        if not self.memory:
-            return ""
-        
-        context = "User Preferences / Rules:\n"
-        for k, v in self.memory.items():
-            context += f"- {k}: {v}\n"
-        return context
+        """Get all preferences formatted as context string (cached until changed)"""
+        with self._lock:
+            if self._context is None:
+                if not self.memory:
+                    self._context = ""
+                else:
+                    lines = [f"- {k}: {v}\n" for k, v in self.memory.items()]
+                    self._context = "User Preferences / Rules:\n" + "".join(lines)
+            return self._context
+
+
+class _FileLock:
+    """Advisory exclusive lock on a sidecar file (no-op without fcntl)"""
+
+    def __init__(self, path: str):
+        self.path = path
+        self._fd: Optional[int] = None
+
+    def __enter__(self):
+        if fcntl is not None:
+            self._fd = os.open(self.path, os.O_CREAT | os.O_RDWR)
+            fcntl.flock(self._fd, fcntl.LOCK_EX)
+        return self
+
+    def __exit__(self, *exc):
+        if self._fd is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+            os.close(self._fd)
+            self._fd = None
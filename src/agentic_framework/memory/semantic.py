@@ -1,46 +1,160 @@
-"""Semantic Memory using ChromaDB"""
-from typing import List, Dict, Any, Optional
-import chromadb
-from chromadb.config import Settings
+"""Semantic Memory using ChromaDB or an in-process NumPy index"""
+from typing import List, Dict, Any, Optional, Union
+from concurrent.futures import ThreadPoolExecutor
+import asyncio
+import functools
+import os
 from agentic_framework.core.memory import MemoryProvider
+from .embeddings import CachedEmbeddingFunction, HashingEmbeddingFunction, default_embedding_function
+from .vector_index import EmbeddingFunction, NumpyVectorIndex, VectorBackend
 
-class SemanticMemory(MemoryProvider):
-    """Semantic memory using Vector DB (ChromaDB)"""
+
+class ChromaBackend(VectorBackend):
+    """Vector backend on a ChromaDB persistent collection
+    
+    With an ``embedding_function`` the backend embeds documents and queries
+    itself and hands Chroma the vectors; otherwise Chroma embeds internally.
+    """
     
-    def __init__(self, collection_name: str = "agent_knowledge", persist_dir: str = "./chroma_db"):
+    def __init__(
+        self,
+        collection_name: str,
+        persist_dir: str,
+        embedding_function: Optional[EmbeddingFunction] = None
+    ):
+        import chromadb
+        
         self.client = chromadb.PersistentClient(path=persist_dir)
         self.collection = self.client.get_or_create_collection(name=collection_name)
+        self.embedding_function = embedding_function
+    
+    def _embed(self, texts: List[str]) -> List[List[float]]:
+        return [list(map(float, vector)) for vector in self.embedding_function(texts)]
+    
+    def add(self, ids: List[str], documents: List[str], metadatas: List[Dict[str, Any]]) -> None:
+        if self.embedding_function is None:
+            self.collection.add(documents=documents, metadatas=metadatas, ids=ids)
+        else:
+            self.collection.add(
+                documents=documents,
+                metadatas=metadatas,
+                ids=ids,
+                embeddings=self._embed(documents)
+            )
+    
+    def query(self, texts: List[str], k: int) -> List[List[Dict[str, Any]]]:
+        if self.embedding_function is None:
+            results = self.collection.query(query_texts=texts, n_results=k)
+        else:
+            results = self.collection.query(query_embeddings=self._embed(texts), n_results=k)
+        
+        batches = []
+        for q, docs in enumerate(results["documents"] or []):
+            batches.append([
+                {
+                    "content": doc,
+                    "metadata": results["metadatas"][q][i] if results["metadatas"] else {},
+                    "id": results["ids"][q][i]
+                }
+                for i, doc in enumerate(docs)
+            ])
+        return batches
+    
+    def delete(self, ids: List[str]) -> None:
+        self.collection.delete(ids=ids)
+
+
+class SemanticMemory(MemoryProvider):
+    """Semantic memory using a Vector DB
+    
+    ``backend`` is ``"chroma"`` (default), ``"numpy"`` for the lightweight
+    in-process ``NumpyVectorIndex`` stored under ``persist_dir/collection_name``,
+    or any ``VectorBackend`` instance.
+    
+    For the built-in backends, embeddings go through a
+    ``CachedEmbeddingFunction`` (``self.embedding_cache``) so repeated task
+    strings are embedded once; pass ``embedding_cache_path`` to persist it.
+    Embedding and index calls run on a dedicated worker thread so they never
+    block the event loop.
+    """
+    
+    def __init__(
+        self,
+        collection_name: str = "agent_knowledge",
+        persist_dir: str = "./chroma_db",
+        backend: Union[str, VectorBackend] = "chroma",
+        embedding_function: Optional[EmbeddingFunction] = None,
+        cache_embeddings: bool = True,
+        embedding_cache_size: int = 10000,
+        embedding_cache_path: Optional[str] = None
+    ):
+        self.embedding_cache: Optional[CachedEmbeddingFunction] = None
+        if backend in ("chroma", "numpy") and cache_embeddings:
+            if embedding_function is None:
+                embedding_function = (
+                    # Chroma's own model, so cached vectors match what Chroma would compute
+                    default_embedding_function() if backend == "chroma"
+                    else HashingEmbeddingFunction()
+                )
+            self.embedding_cache = CachedEmbeddingFunction(
+                embedding_function,
+                max_entries=embedding_cache_size,
+                disk_path=embedding_cache_path
+            )
+            embedding_function = self.embedding_cache
+        
+        if backend == "chroma":
+            self.backend: VectorBackend = ChromaBackend(
+                collection_name, persist_dir, embedding_function=embedding_function
+            )
+        elif backend == "numpy":
+            self.backend = NumpyVectorIndex(
+                os.path.join(persist_dir, collection_name),
+                embedding_function=embedding_function
+            )
+        elif isinstance(backend, VectorBackend):
+            self.backend = backend
+        else:
+            raise ValueError(f"Unknown semantic memory backend: {backend}")
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix="semantic-memory")
+    
+    async def _run(self, fn, *args, **kwargs):
+        """Run a blocking backend call on the worker thread"""
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, functools.partial(fn, *args, **kwargs))
         
     async def store(self, memory: Dict[str, Any]) -> None:
         """Store text with metadata"""
-        content = memory.get("content", "")
-        metadata = memory.get("metadata", {})
-        # Ensure ID
-        mem_id = memory.get("id", str(hash(content)))
+        await self.store_many([memory])
+    
+    async def store_many(self, memories: List[Dict[str, Any]]) -> None:
+        """Embed and insert a batch of memories with one backend call
+        
+        Memories sharing an id (by default, the same content) are stored
+        once, with the last one's metadata: Chroma rejects a whole batch
+        that repeats an id.
+        """
+        batch: Dict[str, Any] = {}
+        for memory in memories:
+            content = memory.get("content", "")
+            metadata = memory.get("metadata", {})
+            # Ensure ID
+            memory_id = memory.get("id", str(hash(content)))
+            # Ensure metadata is not empty (ChromaDB requirement in some versions)
+            batch[memory_id] = (content, metadata or {"type": "memory"})
         
-        # Ensure metadata is not empty (ChromaDB requirement in some versions)
-        if not metadata:
-            metadata = {"type": "memory"}
-            
-        self.collection.add(
-            documents=[content],
-            metadatas=[metadata],
-            ids=[mem_id]
-        )
+        ids = list(batch)
+        documents = [content for content, _ in batch.values()]
+        metadatas = [metadata for _, metadata in batch.values()]
+        await self._run(self.backend.add, ids=ids, documents=documents, metadatas=metadatas)
         
     async def retrieve(self, query: str, k: int = 5) -> List[Dict[str, Any]]:
         """Retrieve semantically similar memories"""
-        results = self.collection.query(
-            query_texts=[query],
-            n_results=k
-        )
-        
-        memories = []
-        if results["documents"]:
-            for i, doc in enumerate(results["documents"][0]):
-                memories.append({
-                    "content": doc,
-                    "metadata": results["metadatas"][0][i] if results["metadatas"] else {},
-                    "id": results["ids"][0][i]
-                })
-        return memories
+        results = await self._run(self.backend.query, [query], k)
+        return results[0] if results else []
+    
+    async def retrieve_many(self, queries: List[str], k: int = 5) -> List[List[Dict[str, Any]]]:
+        """Embed and search a batch of queries with one backend call"""
+        if not queries:
+            return []
+        return await self._run(self.backend.query, queries, k) or [[] for _ in queries]
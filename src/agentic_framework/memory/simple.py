@@ -1,31 +1,128 @@
-from typing import Any, Dict, List
-import asyncio
-
+from collections import Counter, OrderedDict
+from typing import Any, Dict, List, Optional
+import logging
+import math
+import re
+import time
 
 from agentic_framework.core.memory import MemoryProvider
+
+logger = logging.getLogger(__name__)
+
+
 class SimpleMemory(MemoryProvider):
-    """Simple in-memory implementation for testing"""
-    
-    def __init__(self):
-        self.memories: List[Dict[str, Any]] = []
-    
+    """Simple in-memory implementation for testing
+
+    Memories are tokenized once on ``store`` into an inverted index and
+    ranked with BM25 on ``retrieve``. At most ``max_memories`` are kept,
+    evicting the least recently used; with ``ttl`` (seconds) a memory not
+    stored or retrieved for that long is dropped as well.
+    """
+
+    K1 = 1.5
+    B = 0.75
+
+    def __init__(
+        self,
+        max_memories: int = 10000,
+        ttl: Optional[float] = None,
+        min_term_length: int = 3
+    ):
+        self.max_memories = max_memories
+        self.ttl = ttl
+        self.min_term_length = min_term_length
+        self._entries: "OrderedDict[int, Dict[str, Any]]" = OrderedDict()
+        self._postings: Dict[str, Dict[int, int]] = {}
+        self._total_length = 0
+        self._next_id = 0
+
+    @property
+    def memories(self) -> List[Dict[str, Any]]:
+        """Stored memories, oldest first"""
+        return [entry["memory"] for _, entry in sorted(self._entries.items())]
+
     async def store(self, memory: Dict[str, Any]) -> None:
-        self.memories.append(memory)
-    
+        self._add(memory)
+        self._evict()
+
+    async def store_many(self, memories: List[Dict[str, Any]]) -> None:
+        for memory in memories:
+            self._add(memory)
+        self._evict()
+
     async def retrieve(self, query: str, k: int = 5) -> List[Dict[str, Any]]:
-        """Simple keyword matching"""
-        results = []
-        # Strip punctuation and split
-        import string
-        query_clean = query.translate(str.maketrans('', '', string.punctuation))
-        query_terms = query_clean.lower().split()
-        
-        for memory in self.memories[-100:]:  # Recent 100 memories
-            memory_str = str(memory).lower()
-            # Match if query is in memory OR any query term is in memory (excluding common stop words)
-            if query.lower() in memory_str or any(term in memory_str for term in query_terms if len(term) > 3):
-                results.append(memory)
-            if len(results) >= k:
-                break
-        print(f"DEBUG: Found {len(results)} memories")
-        return results
+        """BM25 keyword ranking over the inverted index"""
+        self._evict()
+        terms = [t for t in set(self._tokenize(query)) if len(t) >= self.min_term_length]
+
+        n = len(self._entries)
+        avg_length = (self._total_length / n if n else 0.0) or 1.0
+        scores: Dict[int, float] = {}
+        for term in terms:
+            postings = self._postings.get(term)
+            if not postings:
+                continue
+            idf = math.log(1 + (n - len(postings) + 0.5) / (len(postings) + 0.5))
+            for doc_id, tf in postings.items():
+                length = self._entries[doc_id]["length"]
+                norm = tf + self.K1 * (1 - self.B + self.B * length / avg_length)
+                scores[doc_id] = scores.get(doc_id, 0.0) + idf * tf * (self.K1 + 1) / norm
+
+        # Highest score first, newer memories first on ties
+        ranked = sorted(scores, key=lambda doc_id: (-scores[doc_id], -doc_id))[:k]
+        now = time.monotonic()
+        for doc_id in ranked:
+            self._entries.move_to_end(doc_id)
+            self._entries[doc_id]["accessed"] = now
+
+        logger.debug("Found %d memories", len(ranked))
+        return [self._entries[doc_id]["memory"] for doc_id in ranked]
+
+    @staticmethod
+    def _tokenize(text: str) -> List[str]:
+        return re.findall(r"\w+", text.lower())
+
+    @classmethod
+    def _text(cls, value: Any) -> str:
+        """Flatten a memory's values into one searchable string"""
+        if isinstance(value, dict):
+            return " ".join(cls._text(v) for v in value.values())
+        if isinstance(value, (list, tuple)):
+            return " ".join(cls._text(v) for v in value)
+        return str(value)
+
+    def _add(self, memory: Dict[str, Any]):
+        doc_id = self._next_id
+        self._next_id += 1
+        counts = Counter(self._tokenize(self._text(memory)))
+        for term, tf in counts.items():
+            self._postings.setdefault(term, {})[doc_id] = tf
+        length = sum(counts.values())
+        self._total_length += length
+        self._entries[doc_id] = {
+            "memory": memory,
+            "terms": list(counts),
+            "length": length,
+            "accessed": time.monotonic()
+        }
+
+    def _remove(self, doc_id: int):
+        entry = self._entries.pop(doc_id)
+        self._total_length -= entry["length"]
+        for term in entry["terms"]:
+            postings = self._postings[term]
+            del postings[doc_id]
+            if not postings:
+                del self._postings[term]
+
+    def _evict(self):
+        """Drop least recently used entries beyond capacity or past their TTL"""
+        while len(self._entries) > self.max_memories:
+            self._remove(next(iter(self._entries)))
+        if self.ttl is not None:
+            cutoff = time.monotonic() - self.ttl
+            while self._entries:
+                doc_id, entry = next(iter(self._entries.items()))
+                if entry["accessed"] >= cutoff:
+                    break
+                self._remove(doc_id)
@@ -0,0 +1,336 @@
+"""Pluggable vector backends for SemanticMemory"""
+from abc import ABC, abstractmethod
+from typing import Any, BinaryIO, Callable, Dict, List, Optional
+import json
+import os
+import shutil
+
+import numpy as np
+
+from .embeddings import HashingEmbeddingFunction
+
+EmbeddingFunction = Callable[[List[str]], np.ndarray]
+
+
+class VectorBackend(ABC):
+    """Batched document store with similarity search"""
+
+    @abstractmethod
+    def add(self, ids: List[str], documents: List[str], metadatas: List[Dict[str, Any]]) -> None:
+        """Insert (or replace) documents"""
+        ...
+
+    @abstractmethod
+    def query(self, texts: List[str], k: int) -> List[List[Dict[str, Any]]]:
+        """Return the top-k matches for each query text"""
+        ...
+
+    @abstractmethod
+    def delete(self, ids: List[str]) -> None:
+        """Remove documents by id"""
+        ...
+
+
+class NumpyVectorIndex(VectorBackend):
+    """In-process cosine index over a contiguous float32 matrix.
+
+    Each generation of the index lives in ``path/gen-<n>``. It holds a
+    memory-mapped ``vectors.f32`` matrix that grows by doubling, parallel
+    ``offsets.i64`` and ``alive.u8`` arrays, an ``ids.jsonl`` sidecar and an
+    append-only ``documents.jsonl`` log of documents and metadata. Startup
+    reads only the ids. Documents are read at their offsets when a query
+    returns them.
+
+    An added row is committed when its id line is written, and ``_load``
+    checks that every file covers the committed rows. Deletes clear
+    ``alive`` flags, and the index is compacted once dead rows exceed
+    ``compact_ratio`` of the total. Compaction writes the next generation
+    and switches to it by atomically replacing ``manifest.json``, so a
+    crash leaves one complete generation. Top-k uses ``argpartition`` over
+    one matrix product per query batch.
+    """
+
+    MANIFEST_FILE = "manifest.json"
+    VECTORS_FILE = "vectors.f32"
+    OFFSETS_FILE = "offsets.i64"
+    ALIVE_FILE = "alive.u8"
+    IDS_FILE = "ids.jsonl"
+    DOCUMENTS_FILE = "documents.jsonl"
+
+    def __init__(
+        self,
+        path: str,
+        embedding_function: Optional[EmbeddingFunction] = None,
+        initial_capacity: int = 1024,
+        compact_ratio: float = 0.25
+    ):
+        self.path = path
+        self.embedding_function = embedding_function or HashingEmbeddingFunction()
+        self.compact_ratio = compact_ratio
+        self.dim: Optional[int] = None
+        self.generation = 0
+        self.count = 0
+        self.ids: List[str] = []
+        self.rows: Dict[str, int] = {}
+        self._vectors: Optional[np.memmap] = None
+        self._offsets: Optional[np.memmap] = None
+        self._alive: Optional[np.memmap] = None
+        self._documents: Optional[BinaryIO] = None
+        self._initial_capacity = initial_capacity
+        os.makedirs(path, exist_ok=True)
+        self._load()
+
+    def _file(self, name: str, generation: Optional[int] = None) -> str:
+        generation = self.generation if generation is None else generation
+        return os.path.join(self.path, f"gen-{generation}", name)
+
+    @property
+    def _manifest_path(self) -> str:
+        return os.path.join(self.path, self.MANIFEST_FILE)
+
+    def __len__(self) -> int:
+        return len(self.rows)
+
+    def _load(self):
+        """Read the manifest and id sidecar, validate, and map the arrays"""
+        if not os.path.exists(self._manifest_path):
+            return
+        with open(self._manifest_path, "r") as f:
+            manifest = json.load(f)
+        self.generation, self.dim = manifest["generation"], manifest["dim"]
+        self._remove_other_generations()
+
+        ids = self._read_ids()
+        count = len(ids)
+        sizes = {
+            self.VECTORS_FILE: self.dim * 4,
+            self.OFFSETS_FILE: 8,
+            self.ALIVE_FILE: 1,
+        }
+        for name, row_bytes in sizes.items():
+            rows = os.path.getsize(self._file(name)) // row_bytes
+            if rows < count:
+                raise ValueError(
+                    f"Vector index {self.path} is inconsistent: {name} has {rows} rows, "
+                    f"{self.IDS_FILE} has {count}"
+                )
+        capacity = os.path.getsize(self._file(self.VECTORS_FILE)) // (self.dim * 4)
+        self._map(max(capacity, 1))
+
+        self.ids, self.count = ids, count
+        for row, mem_id in enumerate(ids):
+            if not self._alive[row]:
+                continue
+            previous = self.rows.get(mem_id)
+            if previous is not None:
+                # A replace was interrupted before the old row was retired
+                self._alive[previous] = 0
+            self.rows[mem_id] = row
+
+    def _read_ids(self) -> List[str]:
+        """Committed ids; a torn final line (crash mid-append) is cut off"""
+        ids: List[str] = []
+        path = self._file(self.IDS_FILE)
+        committed = 0
+        with open(path, "rb") as f:
+            for line in f:
+                if not line.endswith(b"\n"):
+                    break
+                ids.append(json.loads(line))
+                committed += len(line)
+        if committed < os.path.getsize(path):
+            with open(path, "r+b") as f:
+                f.truncate(committed)
+        return ids
+
+    def _remove_other_generations(self):
+        """Drop generations left behind by a finished or interrupted compaction"""
+        for name in os.listdir(self.path):
+            if name.startswith("gen-") and name != f"gen-{self.generation}":
+                shutil.rmtree(os.path.join(self.path, name), ignore_errors=True)
+
+    def _map(self, capacity: int):
+        """(Re)map the row arrays with room for ``capacity`` rows"""
+        self._flush()
+        self._vectors = self._map_file(self.VECTORS_FILE, np.float32, (capacity, self.dim))
+        self._offsets = self._map_file(self.OFFSETS_FILE, np.int64, (capacity,))
+        self._alive = self._map_file(self.ALIVE_FILE, np.uint8, (capacity,))
+
+    def _map_file(self, name: str, dtype, shape) -> np.memmap:
+        path = self._file(name)
+        size = int(np.prod(shape)) * np.dtype(dtype).itemsize
+        with open(path, "ab") as f:
+            if f.tell() < size:
+                f.truncate(size)
+        return np.memmap(path, dtype=dtype, mode="r+", shape=shape)
+
+    def _flush(self):
+        for array in (self._vectors, self._offsets, self._alive):
+            if array is not None:
+                array.flush()
+
+    def _release(self):
+        """Unmap arrays and close the document reader"""
+        self._flush()
+        self._vectors = self._offsets = self._alive = None
+        if self._documents is not None:
+            self._documents.close()
+            self._documents = None
+
+    def _write_manifest(self):
+        tmp_path = self._manifest_path + ".tmp"
+        with open(tmp_path, "w") as f:
+            json.dump({"generation": self.generation, "dim": self.dim}, f)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, self._manifest_path)
+
+    def _document(self, row: int) -> Dict[str, Any]:
+        """Read a row's document and metadata from the log"""
+        if self._documents is None:
+            self._documents = open(self._file(self.DOCUMENTS_FILE), "rb")
+        self._documents.seek(int(self._offsets[row]))
+        return json.loads(self._documents.readline())
+
+    def add(self, ids: List[str], documents: List[str], metadatas: List[Dict[str, Any]]) -> None:
+        if not ids:
+            return
+        embeddings = np.asarray(self.embedding_function(documents), dtype=np.float32)
+        norms = np.linalg.norm(embeddings, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        embeddings = embeddings / norms
+
+        if self.dim is None:
+            self.dim = embeddings.shape[1]
+            self.generation = 1
+            os.makedirs(self._file(""), exist_ok=True)
+            for name in (self.IDS_FILE, self.DOCUMENTS_FILE):
+                open(self._file(name), "ab").close()
+            self._map(self._initial_capacity)
+            self._write_manifest()
+
+        capacity = self._vectors.shape[0]
+        if self.count + len(ids) > capacity:
+            while capacity < self.count + len(ids):
+                capacity *= 2
+            self._map(capacity)
+
+        start, end = self.count, self.count + len(ids)
+        offsets = []
+        with open(self._file(self.DOCUMENTS_FILE), "ab") as f:
+            for document, metadata in zip(documents, metadatas):
+                offsets.append(f.tell())
+                f.write(_payload(document, metadata))
+        self._vectors[start:end] = embeddings
+        self._offsets[start:end] = offsets
+        self._alive[start:end] = 1
+        self._flush()
+        with open(self._file(self.IDS_FILE), "a") as f:  # Commit point
+            f.writelines(json.dumps(mem_id) + "\n" for mem_id in ids)
+
+        for row, mem_id in enumerate(ids, start):
+            previous = self.rows.get(mem_id)
+            if previous is not None:
+                self._alive[previous] = 0
+            self.rows[mem_id] = row
+            self.ids.append(mem_id)
+        self.count = end
+        self._alive.flush()
+        self._maybe_compact()
+
+    def query(self, texts: List[str], k: int) -> List[List[Dict[str, Any]]]:
+        if not texts:
+            return []
+        if not self.rows:
+            return [[] for _ in texts]
+        queries = np.asarray(self.embedding_function(texts), dtype=np.float32)
+        norms = np.linalg.norm(queries, axis=1, keepdims=True)
+        norms[norms == 0] = 1.0
+        queries = queries / norms
+
+        scores = queries @ self._vectors[:self.count].T
+        if len(self.rows) < self.count:
+            scores[:, self._alive[:self.count] == 0] = -np.inf
+        k = min(k, len(self.rows))
+        top = np.argpartition(-scores, k - 1, axis=1)[:, :k]
+
+        results = []
+        for q, candidates in enumerate(top):
+            ranked = candidates[np.argsort(-scores[q, candidates])]
+            hits = []
+            for row in ranked:
+                record = self._document(row)
+                hits.append({
+                    "content": record["document"],
+                    "metadata": record["metadata"],
+                    "id": self.ids[row],
+                    "score": float(scores[q, row])
+                })
+            results.append(hits)
+        return results
+
+    def delete(self, ids: List[str]) -> None:
+        deleted = [mem_id for mem_id in ids if mem_id in self.rows]
+        for mem_id in deleted:
+            self._alive[self.rows.pop(mem_id)] = 0
+        if deleted:
+            self._alive.flush()
+        self._maybe_compact()
+
+    def _maybe_compact(self):
+        if self.count and (self.count - len(self.rows)) / self.count > self.compact_ratio:
+            self.compact()
+
+    def compact(self) -> None:
+        """Rewrite the live rows as the next generation and switch to it"""
+        if self.dim is None:
+            return
+        live = np.flatnonzero(self._alive[:self.count])
+        ids = [self.ids[row] for row in live]
+        payloads = []
+        with open(self._file(self.DOCUMENTS_FILE), "rb") as f:
+            for row in live:
+                f.seek(int(self._offsets[row]))
+                payloads.append(f.readline())
+        self._switch_generation(ids, np.array(self._vectors[live]), payloads)
+
+    def _switch_generation(self, ids: List[str], vectors: np.ndarray, payloads: List[bytes]):
+        """Write ``generation + 1`` in full, then atomically point the manifest at it"""
+        old_generation, generation = self.generation, self.generation + 1
+        directory = self._file("", generation)
+        shutil.rmtree(directory, ignore_errors=True)
+        os.makedirs(directory)
+
+        capacity = max(len(ids) * 2, self._initial_capacity)
+        offsets = np.zeros(capacity, dtype=np.int64)
+        with open(os.path.join(directory, self.DOCUMENTS_FILE), "wb") as f:
+            for row, payload in enumerate(payloads):
+                offsets[row] = f.tell()
+                f.write(payload)
+            os.fsync(f.fileno())
+        matrix = np.zeros((capacity, self.dim), dtype=np.float32)
+        matrix[:len(ids)] = vectors
+        alive = np.zeros(capacity, dtype=np.uint8)
+        alive[:len(ids)] = 1
+        for name, array in ((self.VECTORS_FILE, matrix), (self.OFFSETS_FILE, offsets),
+                            (self.ALIVE_FILE, alive)):
+            with open(os.path.join(directory, name), "wb") as f:
+                f.write(array.tobytes())
+                os.fsync(f.fileno())
+        with open(os.path.join(directory, self.IDS_FILE), "w") as f:
+            f.writelines(json.dumps(mem_id) + "\n" for mem_id in ids)
+            os.fsync(f.fileno())
+
+        self._release()
+        self.generation = generation
+        self._write_manifest()  # The switch
+        if old_generation:
+            shutil.rmtree(self._file("", old_generation), ignore_errors=True)
+
+        self.ids, self.count = ids, len(ids)
+        self.rows = {mem_id: row for row, mem_id in enumerate(ids)}
+        self._map(capacity)
+
+
+def _payload(document: str, metadata: Dict[str, Any]) -> bytes:
+    return (json.dumps({"document": document, "metadata": metadata}) + "\n").encode("utf-8")
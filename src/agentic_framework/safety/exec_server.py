@@ -0,0 +1,195 @@
+"""Line-oriented code execution server run inside sandbox workers.
+
+Standard library only and Python 3.6+ compatible: the file's source is
+shipped verbatim into sandbox images. Each request is one JSON line on
+stdin, ``{"code": "...", "reset": false}``; each reply is one JSON line on
+stdout, ``{"success": bool, "output": str, "error": str}``. The namespace
+persists between requests unless ``reset`` is set, which is what lets a
+session keep interpreter state.
+
+Before running anything, ``main`` moves the protocol onto private
+duplicates of fds 0 and 1 and points those at ``/dev/null``, so user code
+cannot read requests or forge replies through the standard streams.
+
+Outside a container the server confines itself before the handshake. The
+options (a JSON object in ``argv[1]``) set rlimits, network isolation and a
+per-request CPU budget. The handshake reports which isolation layers took
+effect.
+"""
+import contextlib
+import errno
+import io
+import json
+import os
+import sys
+import traceback
+
+MAX_OUTPUT = 100000
+
+CLONE_NEWUSER = 0x10000000
+CLONE_NEWNET = 0x40000000
+
+# Denied with EPERM when seccomp bindings are available
+DENIED_SYSCALLS = (
+    "socket", "connect", "bind", "listen", "accept", "accept4", "ptrace",
+    "mount", "umount2", "unshare", "setns", "bpf", "keyctl", "kexec_load",
+    "init_module", "finit_module", "process_vm_readv", "process_vm_writev",
+)
+
+
+class CPULimitExceeded(Exception):
+    pass
+
+
+def _cpu_exceeded(signum, frame):
+    raise CPULimitExceeded("CPU time limit exceeded")
+
+
+def _set_limit(name, value):
+    import resource
+    limit = getattr(resource, name)
+    hard = resource.getrlimit(limit)[1]
+    if hard != resource.RLIM_INFINITY:
+        value = min(value, hard)
+    resource.setrlimit(limit, (value, value))
+
+
+def _unshare_network():
+    """Move into an empty network namespace (via a user namespace if unprivileged)"""
+    import ctypes
+    libc = ctypes.CDLL(None, use_errno=True)
+    uid, gid = os.geteuid(), os.getegid()
+    if uid == 0 and libc.unshare(CLONE_NEWNET) == 0:
+        return True
+    if libc.unshare(CLONE_NEWUSER | CLONE_NEWNET) != 0:
+        return False
+    for path, line in (("setgroups", "deny"), ("uid_map", "%d %d 1" % (uid, uid)),
+                       ("gid_map", "%d %d 1" % (gid, gid))):
+        try:
+            with open("/proc/self/" + path, "w") as f:
+                f.write(line)
+        except OSError:
+            pass
+    return True
+
+
+def _install_seccomp():
+    import seccomp
+    syscalls = seccomp.SyscallFilter(defaction=seccomp.ALLOW)
+    for name in DENIED_SYSCALLS:
+        try:
+            syscalls.add_rule(seccomp.ERRNO(errno.EPERM), name)
+        except Exception:
+            pass  # Not a syscall on this architecture
+    syscalls.load()
+
+
+def confine(options):
+    """Apply rlimits and best-effort isolation; return the layers in effect"""
+    applied = []
+    for name in options.get("preload", ()):
+        try:
+            __import__(name)  # Warm imports survive namespace resets
+        except Exception:
+            pass
+    if options.get("isolate"):
+        try:
+            if _unshare_network():
+                applied.append("netns")
+        except Exception:
+            pass
+        try:
+            _install_seccomp()
+            applied.append("seccomp")
+        except Exception:
+            pass
+    try:
+        import resource
+        import signal
+    except ImportError:
+        return applied
+    for name, key in (("RLIMIT_AS", "memory_bytes"), ("RLIMIT_NOFILE", "max_open_files"),
+                      ("RLIMIT_FSIZE", "max_file_bytes")):
+        if options.get(key) and hasattr(resource, name):
+            _set_limit(name, int(options[key]))
+            applied.append(name.lower())
+    if options.get("cpu_seconds"):
+        signal.signal(signal.SIGXCPU, _cpu_exceeded)
+        applied.append("rlimit_cpu")
+    return applied
+
+
+@contextlib.contextmanager
+def cpu_budget(seconds):
+    """Raise ``CPULimitExceeded`` in the request once it uses ``seconds`` of CPU"""
+    if not seconds:
+        yield
+        return
+    import resource
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    hard = resource.getrlimit(resource.RLIMIT_CPU)[1]
+    soft = int(usage.ru_utime + usage.ru_stime + seconds) + 1
+    if hard != resource.RLIM_INFINITY:
+        soft = min(soft, hard)
+    resource.setrlimit(resource.RLIMIT_CPU, (soft, hard))
+    try:
+        yield
+    finally:
+        resource.setrlimit(resource.RLIMIT_CPU, (hard, hard))
+
+
+def execute(code, namespace):
+    stdout = io.StringIO()
+    stderr = io.StringIO()
+    sys.stdin = io.StringIO()  # User code must never read the protocol stream
+    try:
+        with contextlib.redirect_stdout(stdout), contextlib.redirect_stderr(stderr):
+            exec(compile(code, "<sandbox>", "exec"), namespace)
+        success, error = True, stderr.getvalue()
+    except SystemExit as e:
+        success, error = e.code in (None, 0), stderr.getvalue()
+    except BaseException:
+        success, error = False, stderr.getvalue() + traceback.format_exc(limit=5)
+    return {
+        "success": success,
+        "output": stdout.getvalue()[:MAX_OUTPUT],
+        "error": error[:MAX_OUTPUT],
+    }
+
+
+def serve(instream, outstream, options=None):
+    options = options or {}
+    isolation = confine(options)
+    namespace = {"__name__": "__sandbox__"}
+    outstream.write(json.dumps({"ready": True, "isolation": isolation}) + "\n")
+    outstream.flush()
+    for line in instream:
+        if not line.strip():
+            continue
+        request = json.loads(line)
+        if request.get("reset"):
+            namespace = {"__name__": "__sandbox__"}
+        with cpu_budget(options.get("cpu_seconds")):
+            reply = execute(request.get("code", ""), namespace)
+        outstream.write(json.dumps(reply) + "\n")
+        outstream.flush()
+
+
+def protocol_streams():
+    """Private (in, out) protocol streams; fds 0 and 1 become /dev/null"""
+    infd, outfd = os.dup(0), os.dup(1)
+    devnull = os.open(os.devnull, os.O_RDWR)
+    os.dup2(devnull, 0)
+    os.dup2(devnull, 1)
+    os.close(devnull)
+    return (io.open(infd, "r", encoding="utf-8"),
+            io.open(outfd, "w", encoding="utf-8"))
+
+
+def main():
+    instream, outstream = protocol_streams()
+    serve(instream, outstream, json.loads(sys.argv[1]) if len(sys.argv) > 1 else None)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,172 @@
+"""Local subprocess sandbox: pre-warmed, rlimited Python workers (no Docker needed).
+
+Workers get resource limits, a throwaway working directory and, where the
+host allows, network-namespace and seccomp isolation. They do not get a
+private filesystem: code can read and write whatever the host user can.
+"""
+from typing import Any, Dict, Optional, Sequence
+import json
+import logging
+import os
+import select
+import shutil
+import signal
+import subprocess
+import sys
+import tempfile
+import time
+
+from .pool import EXEC_SERVER_SOURCE, LineProtocolWorker, PooledSandbox, WorkerError
+
+logger = logging.getLogger(__name__)
+
+ISOLATION_LAYERS = ("netns", "seccomp", "rlimit_cpu")
+
+
+class LocalWorker(LineProtocolWorker):
+    """An isolated-mode interpreter running the exec server over pipes.
+
+    The worker confines itself before its handshake (see ``exec_server``):
+    rlimits on address space, open files, file size and per-request CPU,
+    plus network-namespace and seccomp isolation where the kernel and
+    installed bindings allow. It starts in a temp directory with a minimal
+    environment and its own process group; the temp directory is only the
+    working directory, not a filesystem boundary.
+
+    The handshake reports the layers that took effect. A worker missing any
+    of ``require_isolation`` is killed and ``WorkerError`` raised, so it
+    never serves code.
+    """
+
+    def __init__(
+        self,
+        options: Dict[str, Any],
+        python: Optional[str] = None,
+        require_isolation: Sequence[str] = ()
+    ):
+        self.uses = 0
+        self.workdir = tempfile.mkdtemp(prefix="sandbox-")
+        self._buffer = b""
+        self.process = subprocess.Popen(
+            [python or sys.executable, "-I", "-u", "-c", EXEC_SERVER_SOURCE, json.dumps(options)],
+            stdin=subprocess.PIPE,
+            stdout=subprocess.PIPE,
+            stderr=subprocess.DEVNULL,
+            cwd=self.workdir,
+            env={"PATH": os.defpath, "HOME": self.workdir, "OPENBLAS_NUM_THREADS": "1"},
+            start_new_session=True,
+        )
+        try:
+            self.isolation = self.wait_ready(30.0).get("isolation", [])
+            missing = [layer for layer in require_isolation if layer not in self.isolation]
+            if missing:
+                logger.warning(
+                    "Refusing local sandbox worker without %s (in effect: %s)",
+                    ", ".join(missing), ", ".join(self.isolation) or "none"
+                )
+                raise WorkerError(f"Required sandbox isolation unavailable: {', '.join(missing)}")
+        except BaseException:
+            self.close()
+            raise
+
+    def _write(self, data: bytes) -> None:
+        self.process.stdin.write(data)
+        self.process.stdin.flush()
+
+    def _read_line(self, timeout: Optional[float]) -> bytes:
+        deadline = None if timeout is None else time.monotonic() + timeout
+        fd = self.process.stdout.fileno()
+        while b"\n" not in self._buffer:
+            left = None if deadline is None else max(0.0, deadline - time.monotonic())
+            ready, _, _ = select.select([fd], [], [], left)
+            if not ready:
+                raise TimeoutError("sandbox did not answer in time")
+            chunk = os.read(fd, 65536)
+            if not chunk:
+                return b""
+            self._buffer += chunk
+        line, self._buffer = self._buffer.split(b"\n", 1)
+        return line
+
+    def close(self) -> None:
+        try:
+            os.killpg(self.process.pid, signal.SIGKILL)
+        except OSError:
+            pass
+        self.process.wait()
+        for stream in (self.process.stdin, self.process.stdout):
+            try:
+                stream.close()
+            except OSError:
+                pass
+        shutil.rmtree(self.workdir, ignore_errors=True)
+
+
+class LocalSandbox(PooledSandbox):
+    """Executes code in confined local Python subprocesses
+
+    Same interface as ``DockerSandbox``, for hosts that opt out of Docker.
+    Workers start in milliseconds and are pre-warmed in a pool. ``preload``
+    modules (e.g. ``["numpy", "pandas"]``) are imported before the handshake,
+    so snippets skip that import cost. Runs past ``timeout`` seconds of wall
+    clock kill the worker. Runs past ``cpu_seconds`` of CPU fail with
+    ``CPULimitExceeded``.
+
+    This is weaker isolation than a container. There is no filesystem
+    restriction: workers read and write the host filesystem with the
+    permissions of the current user. Network and syscall isolation are best
+    effort, so ``require_isolation`` (by default ``("netns",)``) lists the
+    layers a worker must report; runs fail with an error instead of
+    executing on a host that cannot provide them. Layers are ``netns``,
+    ``seccomp`` and ``rlimit_cpu``; pass ``()`` to accept whatever applies.
+    """
+
+    def __init__(
+        self,
+        timeout: int = 30,
+        pool_size: int = 2,
+        max_uses: int = 50,
+        cpu_seconds: Optional[int] = 10,
+        memory_mb: Optional[int] = 512,
+        max_open_files: Optional[int] = 64,
+        max_file_mb: Optional[int] = 16,
+        isolate: bool = True,
+        preload: Sequence[str] = (),
+        python: Optional[str] = None,
+        session_ttl: Optional[float] = 600.0,
+        require_isolation: Sequence[str] = ("netns",)
+    ):
+        unknown = set(require_isolation) - set(ISOLATION_LAYERS)
+        if unknown:
+            raise ValueError(f"Unknown isolation layers: {', '.join(sorted(unknown))}")
+        super().__init__(timeout, pool_size, max_uses, session_ttl)
+        self.python = python
+        self.require_isolation = tuple(require_isolation)
+        self.options = {
+            "cpu_seconds": cpu_seconds,
+            "memory_bytes": memory_mb * 1024 * 1024 if memory_mb else None,
+            "max_open_files": max_open_files,
+            "max_file_bytes": max_file_mb * 1024 * 1024 if max_file_mb else None,
+            "isolate": isolate,
+            "preload": list(preload),
+        }
+
+    def _new_worker(self) -> LocalWorker:
+        return LocalWorker(self.options, self.python, self.require_isolation)
+
+    def run_code(self, code: str) -> Dict[str, Any]:
+        """Run Python code in a fresh worker"""
+        worker = None
+        try:
+            worker = self._new_worker()
+            result = worker.execute(code, timeout=self.timeout)
+        except TimeoutError:
+            return {"success": False, "error": f"Execution timed out after {self.timeout}s"}
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+        finally:
+            if worker is not None:
+                worker.close()
+        if not result["success"] and not result["error"]:
+            result["error"] = result["output"]
+        return result
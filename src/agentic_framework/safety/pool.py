@@ -0,0 +1,306 @@
+"""Warm pools of sandbox workers with per-session interpreter state"""
+from abc import ABC, abstractmethod
+from collections import deque
+from pathlib import Path
+from typing import Any, Callable, Deque, Dict, Optional
+import asyncio
+import json
+import logging
+import time
+
+logger = logging.getLogger(__name__)
+
+# Shipped verbatim to workers (``python -c``) so they need no package install
+EXEC_SERVER_SOURCE = (Path(__file__).parent / "exec_server.py").read_text()
+
+
+class WorkerError(Exception):
+    """The worker died or its channel broke; it must be discarded"""
+
+
+class SandboxWorker(ABC):
+    """One long-lived interpreter running ``exec_server``"""
+
+    uses: int = 0
+
+    @abstractmethod
+    def execute(
+        self, code: str, reset: bool = False, timeout: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """Run ``code`` (blocking). Raises ``TimeoutError`` or ``WorkerError``."""
+
+    @abstractmethod
+    def close(self) -> None:
+        """Stop the worker and release its resources"""
+
+
+class LineProtocolWorker(SandboxWorker):
+    """Worker that speaks the ``exec_server`` JSON-lines protocol.
+
+    Subclasses provide the byte transport: ``_write`` and ``_read_line``
+    (which raises ``TimeoutError`` once ``timeout`` passes).
+    """
+
+    @abstractmethod
+    def _write(self, data: bytes) -> None:
+        ...
+
+    @abstractmethod
+    def _read_line(self, timeout: Optional[float]) -> bytes:
+        ...
+
+    def _read_reply(self, timeout: Optional[float]) -> Dict[str, Any]:
+        line = self._read_line(timeout)
+        if not line:
+            raise WorkerError("worker exited")
+        try:
+            return json.loads(line)
+        except json.JSONDecodeError as e:
+            raise WorkerError(f"malformed reply: {line[:200]!r}") from e
+
+    def wait_ready(self, timeout: Optional[float] = 30.0) -> Dict[str, Any]:
+        """Block until the server's startup handshake arrives and return it"""
+        handshake = self._read_reply(timeout)
+        if not handshake.get("ready"):
+            raise WorkerError("worker did not start")
+        return handshake
+
+    def execute(
+        self, code: str, reset: bool = False, timeout: Optional[float] = None
+    ) -> Dict[str, Any]:
+        self._write((json.dumps({"code": code, "reset": reset}) + "\n").encode("utf-8"))
+        return self._read_reply(timeout)
+
+
+class WorkerPool:
+    """Pre-started workers for stateless calls and named sessions.
+
+    Idle workers have never run code. A stateless call takes one and
+    retires it afterwards, so no interpreter state outside the namespace
+    (modules, threads, open files) can reach a later caller. At most
+    ``size`` stateless calls run at once, and replacements start in the
+    background to keep the pool warm. A session (e.g. one per agent run)
+    owns a worker and keeps its interpreter state between calls until
+    ``end_session``, or until it has been idle for ``session_ttl`` seconds.
+    Session workers are recycled after ``max_uses`` executions or any
+    failure or timeout. A recycled session starts with fresh state, and its
+    next result says ``"session_reset": True``.
+    """
+
+    def __init__(
+        self,
+        factory: Callable[[], SandboxWorker],
+        size: int = 2,
+        max_uses: int = 50,
+        timeout: Optional[float] = 30.0,
+        session_ttl: Optional[float] = 600.0
+    ):
+        self.factory = factory
+        self.size = size
+        self.max_uses = max_uses
+        self.timeout = timeout
+        self.session_ttl = session_ttl
+        self._idle: Deque[SandboxWorker] = deque()
+        self._sessions: Dict[str, SandboxWorker] = {}
+        self._session_locks: Dict[str, asyncio.Lock] = {}
+        self._last_used: Dict[str, float] = {}
+        self._reset_sessions: set = set()
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._warming: set = set()
+        self._closing: set = set()
+        self.started = 0
+        self.recycled = 0
+
+    async def start(self) -> None:
+        """Pre-start ``size`` idle workers"""
+        missing = self.size - len(self._idle)
+        workers = await asyncio.gather(*(self._spawn() for _ in range(missing)))
+        self._idle.extend(workers)
+
+    async def _spawn(self) -> SandboxWorker:
+        worker = await asyncio.to_thread(self.factory)
+        self.started += 1
+        return worker
+
+    def _replenish(self) -> None:
+        """Start a replacement in the background to keep the pool warm"""
+        if len(self._idle) + len(self._warming) >= self.size:
+            return
+
+        async def warm():
+            try:
+                self._idle.append(await self._spawn())
+            except Exception as e:
+                logger.warning("Could not start sandbox worker: %s", e)
+
+        task = asyncio.ensure_future(warm())
+        self._warming.add(task)
+        task.add_done_callback(self._warming.discard)
+
+    async def _discard(self, worker: SandboxWorker) -> None:
+        self.recycled += 1
+        await asyncio.to_thread(worker.close)
+
+    def _retire(self, worker: SandboxWorker) -> None:
+        """Close a used worker in the background so the caller isn't kept waiting"""
+        task = asyncio.ensure_future(self._discard(worker))
+        self._closing.add(task)
+        task.add_done_callback(self._closing.discard)
+
+    def _spent(self, worker: SandboxWorker) -> bool:
+        return worker.uses >= self.max_uses
+
+    async def _execute(self, worker: SandboxWorker, code: str, reset: bool, timeout):
+        """Run on ``worker``; return (result, healthy)"""
+        worker.uses += 1
+        try:
+            result = await asyncio.to_thread(worker.execute, code, reset, timeout)
+            return result, True
+        except TimeoutError:
+            return {"success": False, "output": "",
+                    "error": f"Execution timed out after {timeout}s"}, False
+        except (WorkerError, OSError) as e:
+            return {"success": False, "output": "", "error": f"Sandbox failure: {e}"}, False
+
+    async def run(
+        self, code: str, session: Optional[str] = None, timeout: Optional[float] = None
+    ) -> Dict[str, Any]:
+        """Execute ``code`` statelessly, or in ``session``'s interpreter"""
+        timeout = timeout if timeout is not None else self.timeout
+        self._expire_sessions()
+        if session is not None:
+            return await self._run_session(code, session, timeout)
+
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.size)
+        async with self._slots:
+            worker = self._idle.popleft() if self._idle else await self._spawn()
+            self._replenish()
+            try:
+                result, _ = await self._execute(worker, code, True, timeout)
+            finally:
+                self._retire(worker)
+            return result
+
+    async def _run_session(self, code: str, session: str, timeout) -> Dict[str, Any]:
+        lock = self._session_locks.setdefault(session, asyncio.Lock())
+        async with lock:
+            worker = self._sessions.get(session)
+            if worker is None:
+                worker = self._idle.popleft() if self._idle else await self._spawn()
+                self._sessions[session] = worker
+                self._replenish()
+                reset = True
+            else:
+                reset = False
+            result, healthy = await self._execute(worker, code, reset, timeout)
+            self._last_used[session] = time.monotonic()
+            if session in self._reset_sessions:
+                self._reset_sessions.discard(session)
+                result["session_reset"] = True
+            if not healthy or self._spent(worker):
+                del self._sessions[session]
+                self._reset_sessions.add(session)
+                await self._discard(worker)
+            return result
+
+    def _pop_session(self, session: str) -> Optional[SandboxWorker]:
+        self._session_locks.pop(session, None)
+        self._last_used.pop(session, None)
+        self._reset_sessions.discard(session)
+        return self._sessions.pop(session, None)
+
+    async def end_session(self, session: str) -> None:
+        """Drop a session and its interpreter state"""
+        worker = self._pop_session(session)
+        if worker is not None:
+            await self._discard(worker)
+
+    def _expire_sessions(self) -> None:
+        """End sessions idle for longer than ``session_ttl``"""
+        if self.session_ttl is None:
+            return
+        cutoff = time.monotonic() - self.session_ttl
+        for session, last_used in list(self._last_used.items()):
+            lock = self._session_locks.get(session)
+            if last_used < cutoff and not (lock and lock.locked()):
+                worker = self._pop_session(session)
+                if worker is not None:
+                    self._retire(worker)
+
+    def stats(self) -> Dict[str, int]:
+        return {
+            "idle": len(self._idle),
+            "sessions": len(self._sessions),
+            "started": self.started,
+            "recycled": self.recycled,
+        }
+
+    async def close(self) -> None:
+        for task in list(self._warming):
+            task.cancel()
+        workers = list(self._idle) + list(self._sessions.values())
+        self._idle.clear()
+        self._sessions.clear()
+        self._last_used.clear()
+        await asyncio.gather(*(asyncio.to_thread(worker.close) for worker in workers))
+        await asyncio.gather(*list(self._closing), return_exceptions=True)
+
+
+class PooledSandbox(ABC):
+    """Async sandbox API over a ``WorkerPool``; backends supply the workers.
+
+    ``arun_code`` takes a warm worker; pass ``session_id`` to keep
+    interpreter state across calls. ``run_code`` is the synchronous one-shot
+    path.
+    """
+
+    def __init__(
+        self,
+        timeout: float = 30,
+        pool_size: int = 2,
+        max_uses: int = 50,
+        session_ttl: Optional[float] = 600.0
+    ):
+        self.timeout = timeout
+        self.pool = WorkerPool(self._new_worker, pool_size, max_uses, timeout, session_ttl)
+
+    @property
+    def available(self) -> bool:
+        return True
+
+    unavailable_error = "Sandbox not available"
+
+    @abstractmethod
+    def _new_worker(self) -> SandboxWorker:
+        ...
+
+    @abstractmethod
+    def run_code(self, code: str) -> Dict[str, Any]:
+        ...
+
+    async def start(self) -> None:
+        """Pre-start the warm pool"""
+        if self.available:
+            await self.pool.start()
+
+    async def arun_code(self, code: str, session_id: Optional[str] = None) -> Dict[str, Any]:
+        """Run Python code on a warm worker (in ``session_id``'s interpreter)"""
+        if not self.available:
+            return {"success": False, "error": self.unavailable_error}
+        try:
+            result = await self.pool.run(code, session=session_id)
+        except Exception as e:
+            return {"success": False, "error": str(e)}
+        if not result["success"] and not result["error"]:
+            result["error"] = result["output"]
+        return result
+
+    async def end_session(self, session_id: str) -> None:
+        await self.pool.end_session(session_id)
+
+    def stats(self) -> Dict[str, Any]:
+        return self.pool.stats()
+
+    async def close(self) -> None:
+        await self.pool.close()
@@ -1,53 +1,187 @@
 """Secure Code Execution Sandbox using Docker"""
-import docker
 from typing import Dict, Any, Optional
-import tempfile
-import os
+import socket
+import time
+
+import docker
+
+from .pool import EXEC_SERVER_SOURCE, LineProtocolWorker, PooledSandbox, WorkerError
+
+
+class DockerWorker(LineProtocolWorker):
+    """A resource-limited container running the exec server, attached over stdin/stdout"""
+
+    def __init__(self, client, image: str, **limits: Any):
+        self.uses = 0
+        self._sock = None
+        self._frames = b""
+        self._stdout = b""
+        self.container = client.containers.create(
+            image,
+            command=["python", "-u", "-c", EXEC_SERVER_SOURCE],
+            stdin_open=True,
+            **limits
+        )
+        try:
+            # Attach before starting: an attach only streams output written
+            # after it, and the server's handshake comes first
+            attached = self.container.attach_socket(params={"stdin": 1, "stdout": 1, "stream": 1})
+            self._sock = getattr(attached, "_sock", attached)
+            self.container.start()
+            self.wait_ready()
+        except BaseException:
+            self.close()
+            raise
+
+    def _write(self, data: bytes) -> None:
+        self._sock.sendall(data)
+
+    def _recv(self, size: int, deadline: Optional[float]) -> bytes:
+        while len(self._frames) < size:
+            if deadline is not None:
+                left = deadline - time.monotonic()
+                if left <= 0:
+                    raise TimeoutError("sandbox did not answer in time")
+                self._sock.settimeout(left)
+            else:
+                self._sock.settimeout(None)
+            try:
+                chunk = self._sock.recv(65536)
+            except socket.timeout:
+                raise TimeoutError("sandbox did not answer in time") from None
+            if not chunk:
+                raise WorkerError("container exited")
+            self._frames += chunk
+        data, self._frames = self._frames[:size], self._frames[size:]
+        return data
+
+    def _read_line(self, timeout: Optional[float]) -> bytes:
+        # Without a TTY, docker multiplexes streams in frames with an 8-byte
+        # header: stream type (1 = stdout, 2 = stderr), 3 pad bytes, size.
+        deadline = None if timeout is None else time.monotonic() + timeout
+        while b"\n" not in self._stdout:
+            header = self._recv(8, deadline)
+            payload = self._recv(int.from_bytes(header[4:8], "big"), deadline)
+            if header[0] == 1:
+                self._stdout += payload
+        line, self._stdout = self._stdout.split(b"\n", 1)
+        return line
+
+    def close(self) -> None:
+        try:
+            if self._sock is not None:
+                self._sock.close()
+        except Exception:
+            pass
+        try:
+            self.container.remove(force=True)
+        except Exception:
+            pass
+
+
+class DockerSandbox(PooledSandbox):
+    """Executes code in an isolated Docker container
+
+    ``run_code`` runs a snippet in a throwaway container. The async
+    ``arun_code`` instead uses a warm pool of ``pool_size`` pre-started
+    containers running a small exec server. Pass ``session_id`` to keep
+    interpreter state across calls (one container per session). Containers
+    are recycled after ``max_uses`` runs or on failure or timeout.
+    """
+
+    unavailable_error = "Docker not available"
 
-class DockerSandbox:
-    """Executes code in an isolated Docker container"""
-    
-    def __init__(self, image: str = "python:3.9-slim", timeout: int = 30):
+    def __init__(
+        self,
+        image: str = "python:3.9-slim",
+        timeout: int = 30,
+        pool_size: int = 2,
+        max_uses: int = 50,
+        mem_limit: str = "128m",
+        cpu_quota: int = 50000,
+        session_ttl: Optional[float] = 600.0
+    ):
+        super().__init__(timeout, pool_size, max_uses, session_ttl)
         self.image = image
-        self.timeout = timeout
+        self.limits = {
+            "mem_limit": mem_limit,
+            "network_disabled": True,  # No internet access by default
+            "cpu_quota": cpu_quota,  # 50% CPU by default
+            "pids_limit": 64,
+        }
+        self._image_ready = False
         try:
             self.client = docker.from_env()
         except Exception:
             self.client = None
             print("⚠️ Docker client not available. Sandbox will fail.")
 
+    @property
+    def available(self) -> bool:
+        return self.client is not None
+
+    def _ensure_image(self):
+        """Pull the image once per sandbox rather than checking on every run"""
+        if self._image_ready:
+            return
+        try:
+            self.client.images.get(self.image)
+        except docker.errors.ImageNotFound:
+            print(f"Pulling image {self.image}...")
+            self.client.images.pull(self.image)
+        self._image_ready = True
+
+    def _new_worker(self) -> DockerWorker:
+        self._ensure_image()
+        return DockerWorker(self.client, self.image, **self.limits)
+
     def run_code(self, code: str) -> Dict[str, Any]:
         """Run Python code in the container"""
         if not self.client:
             return {"success": False, "error": "Docker not available"}
-            
+
         try:
-            # Pull image if needed
-            try:
-                self.client.images.get(self.image)
-            except docker.errors.ImageNotFound:
-                print(f"Pulling image {self.image}...")
-                self.client.images.pull(self.image)
+            self._ensure_image()
 
             # Create container
             container = self.client.containers.run(
                 self.image,
                 command=["python", "-c", code],
                 detach=True,
-                mem_limit="128m",
-                network_disabled=True, # No internet access by default
-                cpu_quota=50000, # 50% CPU
+                **self.limits
             )
-            
+
             # Wait for result
             exit_code = container.wait(timeout=self.timeout)
             logs = container.logs().decode("utf-8")
             container.remove()
-            
+
             if exit_code["StatusCode"] == 0:
                 return {"success": True, "output": logs}
             else:
                 return {"success": False, "error": logs}
-                
+
         except Exception as e:
             return {"success": False, "error": str(e)}
+
+
+def create_sandbox(
+    backend: str = "docker",
+    timeout: int = 30,
+    pool_size: int = 2,
+    max_uses: int = 50,
+    **options: Any
+) -> PooledSandbox:
+    """Build a sandbox for ``backend``: ``docker`` (default) or ``local``.
+
+    There is no fallback: without a Docker daemon the docker backend
+    reports "Docker not available" rather than quietly running code on the
+    host. The weaker ``local`` backend must be asked for by name. Extra
+    ``options`` go to the chosen backend's constructor.
+    """
+    if backend == "docker":
+        return DockerSandbox(timeout=timeout, pool_size=pool_size, max_uses=max_uses, **options)
+    if backend == "local":
+        from .local import LocalSandbox
+        return LocalSandbox(timeout=timeout, pool_size=pool_size, max_uses=max_uses, **options)
+    raise ValueError(f"Unknown sandbox backend: {backend}")
@@ -1,5 +1,6 @@
 from fastapi import APIRouter, HTTPException
 from fastapi import APIRouter, HTTPException
+from fastapi.responses import StreamingResponse
 from typing import List, Dict, Any
 import uuid
 import json
@@ -54,6 +55,30 @@ async def create_agent(agent: AgentCreate):
         
     return AgentResponse(**agent_data)
 
+def _get_agent(agent_id: str, config: Dict[str, Any]) -> Agent:
+    """Return the cached agent, building it from its saved config on first use"""
+    if agent_id not in loaded_agents:
+        llm = OpenAIClient(model=config["model"])
+        tools = []
+        if "search" in config["tools"]:
+            tools.append(SearchTool())
+        if "finance" in config["tools"]:
+            tools.append(FundamentalAnalysisTool())
+            
+        memory = MultiLayerMemory() if config["memory"] else None
+        
+        agent = Agent(
+            id=agent_id,
+            name=config["name"],
+            instructions=config["instructions"],
+            tools=tools,
+            model_client=llm,
+            memory=memory
+        )
+        loaded_agents[agent_id] = agent
+    
+    return loaded_agents[agent_id]
+
 @router.post("/{agent_id}/execute", response_model=ExecuteResponse)
 async def execute_agent(agent_id: str, request: ExecuteRequest):
     """Execute an agent task"""
@@ -104,27 +129,7 @@ async def execute_agent(agent_id: str, request: ExecuteRequest):
         return ExecuteResponse(success=True, output=str(result), cost=0.0)
 
     # Default Agent Execution
-    if agent_id not in loaded_agents:
-        llm = OpenAIClient(model=config["model"])
-        tools = []
-        if "search" in config["tools"]:
-            tools.append(SearchTool())
-        if "finance" in config["tools"]:
-            tools.append(FundamentalAnalysisTool())
-            
-        memory = MultiLayerMemory() if config["memory"] else None
-        
-        agent = Agent(
-            id=agent_id,
-            name=config["name"],
-            instructions=config["instructions"],
-            tools=tools,
-            model_client=llm,
-            memory=memory
-        )
-        loaded_agents[agent_id] = agent
-    
-    agent = loaded_agents[agent_id]
+    agent = _get_agent(agent_id, config)
     
     try:
         result = await agent.execute(request.task)
@@ -134,3 +139,28 @@ async def execute_agent(agent_id: str, request: ExecuteRequest):
         )
     except Exception as e:
         return ExecuteResponse(success=False, output=str(e), error=str(e))
+
+@router.post("/{agent_id}/execute/stream")
+async def execute_agent_stream(agent_id: str, request: ExecuteRequest):
+    """Execute an agent task, streaming ReAct events as Server-Sent Events"""
+    config_path = os.path.join(AGENTS_DIR, f"{agent_id}.json")
+    if not os.path.exists(config_path):
+        raise HTTPException(status_code=404, detail="Agent not found")
+        
+    with open(config_path, "r") as f:
+        config = json.load(f)
+    
+    if config.get("model") == "dynamic-workflow":
+        raise HTTPException(status_code=400, detail="Streaming is not supported for workflows")
+    
+    agent = _get_agent(agent_id, config)
+    
+    async def event_source():
+        async for event in agent.execute_stream(request.task):
+            yield f"event: {event['type']}\ndata: {json.dumps(event, default=str)}\n\n"
+    
+    return StreamingResponse(
+        event_source(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"}
+    )
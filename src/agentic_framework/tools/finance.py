@@ -1,73 +1,166 @@
-from typing import Dict, Any
-import yfinance as yf
+from typing import Any, Dict, List, Optional
+import asyncio
+from agentic_framework.core.singleflight import SingleFlight
 from agentic_framework.core.tool import Tool
+from agentic_framework.tools.market_data import (
+    STATEMENTS,
+    MarketDataCache,
+    MarketDataSource,
+    YFinanceSource,
+)
+from agentic_framework.tools.statements import TABLE_FORMATS, StatementTable
 
 class FundamentalAnalysisTool(Tool):
-    """Tool for performing fundamental analysis on a stock ticker."""
-    
-    def __init__(self):
+    """Tool for performing fundamental analysis on a stock ticker.
+
+    Fields are fetched from ``source`` (Yahoo Finance by default) and cached
+    per field with their own TTLs: quotes and news briefly, statements for a
+    day. Pass ``cache_path`` to keep the cache on disk across restarts.
+    """
+
+    def __init__(
+        self,
+        source: Optional[MarketDataSource] = None,
+        cache: Optional[MarketDataCache] = None,
+        cache_path: Optional[str] = None,
+        ttls: Optional[Dict[str, float]] = None
+    ):
         super().__init__(
             name="fundamental_analysis",
             description="Get fundamental financial data for a stock ticker (e.g., AAPL, MSFT).",
-            category="finance"
+            category="finance",
+            coalesce=True,
+            timeout=30.0
         )
-    
-    async def execute(self, ticker: str, detailed: bool = False) -> Dict[str, Any]:
+        self.source = source or YFinanceSource()
+        self.cache = cache if cache is not None else MarketDataCache(ttls, cache_path)
+        self._fetches = SingleFlight()
+
+    async def execute(
+        self,
+        ticker: str,
+        detailed: bool = False,
+        metrics: Optional[List[str]] = None,
+        table_format: str = "columnar"
+    ) -> Dict[str, Any]:
         """
         Get fundamental analysis data for a ticker.
-        
+
         Args:
             ticker: The stock ticker symbol (e.g., 'AAPL')
             detailed: If True, includes Balance Sheet, Income Statement, and Cash Flow.
-            
+            metrics: Only include statement rows whose name contains one of these
+                terms (e.g. ['revenue', 'free cash flow']).
+            table_format: 'columnar' (periods, metrics and a value matrix),
+                'csv' or 'markdown'.
+
         Returns:
             Dictionary containing financial info, ratios, and recent news
         """
-        try:
-            stock = yf.Ticker(ticker)
-            info = stock.info
-            
-            # Extract key metrics
-            analysis = {
-                "symbol": info.get("symbol"),
-                "shortName": info.get("shortName"),
-                "sector": info.get("sector"),
-                "industry": info.get("industry"),
-                "marketCap": info.get("marketCap"),
-                "currentPrice": info.get("currentPrice"),
-                "targetMeanPrice": info.get("targetMeanPrice"),
-                "recommendationKey": info.get("recommendationKey"),
-                "forwardPE": info.get("forwardPE"),
-                "dividendYield": info.get("dividendYield"),
-                "beta": info.get("beta"),
-                "fiftyTwoWeekHigh": info.get("fiftyTwoWeekHigh"),
-                "fiftyTwoWeekLow": info.get("fiftyTwoWeekLow"),
-                "businessSummary": info.get("longBusinessSummary"),
-            }
-            
-            if detailed:
-                # Add deep financial data (converting DataFrames to dicts)
-                try:
-                    analysis["balance_sheet"] = stock.balance_sheet.to_dict()
-                    analysis["income_statement"] = stock.income_stmt.to_dict()
-                    analysis["cash_flow"] = stock.cashflow.to_dict()
-                except Exception as e:
-                    analysis["financials_error"] = f"Could not retrieve deep financials: {str(e)}"
-
-            # Add recent news if available
-            news = stock.news
-            if news:
-                analysis["recent_news"] = [
-                    {
-                        "title": item.get("title"),
-                        "publisher": item.get("publisher"),
-                        "link": item.get("link"),
-                        "relatedTickers": item.get("relatedTickers")
-                    }
-                    for item in news[:3]  # Limit to 3 recent news items
-                ]
-                
-            return analysis
-            
-        except Exception as e:
-            return {"error": f"Analysis failed for {ticker}: {str(e)}"}
+        if table_format not in TABLE_FORMATS:
+            return self._format_error(table_format)
+        return await self._analyze(ticker.strip().upper(), detailed, metrics, table_format)
+
+    async def execute_many(
+        self,
+        tickers: List[str],
+        detailed: bool = False,
+        metrics: Optional[List[str]] = None,
+        table_format: str = "columnar"
+    ) -> Dict[str, Dict[str, Any]]:
+        """Analyze several tickers concurrently, fetching each symbol once"""
+        symbols = list(dict.fromkeys(ticker.strip().upper() for ticker in tickers))
+        if table_format not in TABLE_FORMATS:
+            return {symbol: self._format_error(table_format) for symbol in symbols}
+        results = await asyncio.gather(*(
+            self._analyze(symbol, detailed, metrics, table_format) for symbol in symbols
+        ))
+        return dict(zip(symbols, results))
+
+    @staticmethod
+    def _format_error(table_format: str) -> Dict[str, Any]:
+        return {
+            "error": f"Unknown table_format {table_format!r}; use one of: {', '.join(TABLE_FORMATS)}"
+        }
+
+    async def _field(self, ticker: str, field: str) -> Any:
+        """Cached field value; concurrent misses share one fetch"""
+        value = self.cache.get(ticker, field, load=False)
+        if value is not None:
+            return value
+
+        async def fetch():
+            # Data sources block on HTTP and the cache's disk tier on SQLite;
+            # both stay off the event loop
+            if self.cache.on_disk:
+                value = await self.run_blocking(self.cache.get, ticker, field)
+                if value is not None:
+                    return value
+            return await self.run_blocking(self._fetch_and_store, ticker, field)
+
+        value, _ = await self._fetches.do((ticker, field), fetch)
+        return value
+
+    def _fetch_and_store(self, ticker: str, field: str) -> Any:
+        value = self.source.fetch(ticker, field)
+        self.cache.set(ticker, field, value)
+        return value
+
+    async def _analyze(
+        self,
+        ticker: str,
+        detailed: bool,
+        metrics: Optional[List[str]] = None,
+        table_format: str = "columnar"
+    ) -> Dict[str, Any]:
+        fields = ["info", "news"] + (["statements"] if detailed else [])
+        info, news, *statements = await asyncio.gather(
+            *(self._field(ticker, field) for field in fields), return_exceptions=True
+        )
+        if isinstance(info, BaseException):
+            return {"error": f"Analysis failed for {ticker}: {str(info) or type(info).__name__}"}
+
+        # Extract key metrics
+        analysis = {
+            "symbol": info.get("symbol"),
+            "shortName": info.get("shortName"),
+            "sector": info.get("sector"),
+            "industry": info.get("industry"),
+            "marketCap": info.get("marketCap"),
+            "currentPrice": info.get("currentPrice"),
+            "targetMeanPrice": info.get("targetMeanPrice"),
+            "recommendationKey": info.get("recommendationKey"),
+            "forwardPE": info.get("forwardPE"),
+            "dividendYield": info.get("dividendYield"),
+            "beta": info.get("beta"),
+            "fiftyTwoWeekHigh": info.get("fiftyTwoWeekHigh"),
+            "fiftyTwoWeekLow": info.get("fiftyTwoWeekLow"),
+            "businessSummary": info.get("longBusinessSummary"),
+        }
+
+        if detailed:
+            # Deep financial data, one compact table per statement
+            if isinstance(statements[0], BaseException):
+                analysis["financials_error"] = (
+                    f"Could not retrieve deep financials: {str(statements[0])}"
+                )
+            else:
+                for name in STATEMENTS:
+                    table = StatementTable.from_periods(statements[0].get(name) or {})
+                    table = table.select(metrics)
+                    if len(table):
+                        analysis[name] = table.render(table_format)
+
+        # Add recent news if available
+        if news and not isinstance(news, BaseException):
+            analysis["recent_news"] = [
+                {
+                    "title": item.get("title"),
+                    "publisher": item.get("publisher"),
+                    "link": item.get("link"),
+                    "relatedTickers": item.get("relatedTickers")
+                }
+                for item in news[:3]  # Limit to 3 recent news items
+            ]
+
+        return analysis
@@ -0,0 +1,215 @@
+"""Market data sources and a per-field TTL cache for finance tools"""
+from abc import ABC, abstractmethod
+from typing import Any, Dict, List, Optional, Tuple
+import json
+import math
+import sqlite3
+import threading
+import time
+
+# Seconds each field stays fresh: quotes move, statements change quarterly
+DEFAULT_TTLS = {
+    "info": 60.0,
+    "news": 300.0,
+    "statements": 86400.0,
+}
+
+STATEMENTS = ("balance_sheet", "income_statement", "cash_flow")
+
+
+class MarketDataSource(ABC):
+    """Blocking fetches of one field for one ticker"""
+
+    @abstractmethod
+    def info(self, ticker: str) -> Dict[str, Any]:
+        """Quote, profile and ratio snapshot"""
+
+    @abstractmethod
+    def news(self, ticker: str) -> List[Dict[str, Any]]:
+        """Recent news items"""
+
+    @abstractmethod
+    def statements(self, ticker: str) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        """``{statement: {period: {metric: value}}}`` for ``STATEMENTS``"""
+
+    def fetch(self, ticker: str, field: str) -> Any:
+        return getattr(self, field)(ticker)
+
+
+def _plain(value: Any) -> Any:
+    """numpy/pandas scalars to Python values; NaN to None"""
+    if hasattr(value, "item"):
+        value = value.item()
+    if isinstance(value, float) and math.isnan(value):
+        return None
+    return value
+
+
+def _json_default(value: Any) -> Any:
+    """``json.dumps`` fallback that keeps numeric scalars numeric"""
+    if hasattr(value, "item"):
+        return _plain(value)
+    if hasattr(value, "isoformat"):
+        return value.isoformat()
+    return str(value)
+
+
+def _frame_to_dict(frame: Any) -> Dict[str, Dict[str, Any]]:
+    """DataFrame (metrics x periods) to JSON-safe ``{period: {metric: value}}``"""
+    return {
+        str(getattr(period, "date", lambda: period)()): {
+            str(metric): _plain(value) for metric, value in column.items()
+        }
+        for period, column in frame.to_dict().items()
+    }
+
+
+class YFinanceSource(MarketDataSource):
+    """Yahoo Finance via ``yfinance`` (imported on first use)"""
+
+    def _ticker(self, ticker: str):
+        import yfinance as yf
+        return yf.Ticker(ticker)
+
+    def info(self, ticker: str) -> Dict[str, Any]:
+        return self._ticker(ticker).info
+
+    def news(self, ticker: str) -> List[Dict[str, Any]]:
+        return self._ticker(ticker).news or []
+
+    def statements(self, ticker: str) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        stock = self._ticker(ticker)
+        return {
+            "balance_sheet": _frame_to_dict(stock.balance_sheet),
+            "income_statement": _frame_to_dict(stock.income_stmt),
+            "cash_flow": _frame_to_dict(stock.cashflow),
+        }
+
+
+class StaticDataSource(MarketDataSource):
+    """In-memory fixtures, for offline tests and demos.
+
+    ``data`` maps tickers to ``{"info": ..., "news": ..., "statements": ...}``.
+    ``calls`` counts fetches per (ticker, field).
+    """
+
+    def __init__(self, data: Dict[str, Dict[str, Any]], latency: float = 0.0):
+        self.data = {ticker.upper(): fields for ticker, fields in data.items()}
+        self.latency = latency
+        self.calls: Dict[Tuple[str, str], int] = {}
+        self._lock = threading.Lock()
+
+    def fetch(self, ticker: str, field: str) -> Any:
+        with self._lock:
+            self.calls[(ticker, field)] = self.calls.get((ticker, field), 0) + 1
+        if self.latency:
+            time.sleep(self.latency)
+        if ticker not in self.data:
+            raise ValueError(f"No data for {ticker}")
+        if field not in self.data[ticker]:
+            raise ValueError(f"No {field} for {ticker}")
+        return self.data[ticker][field]
+
+    def info(self, ticker: str) -> Dict[str, Any]:
+        return self.fetch(ticker, "info")
+
+    def news(self, ticker: str) -> List[Dict[str, Any]]:
+        return self.fetch(ticker, "news")
+
+    def statements(self, ticker: str) -> Dict[str, Dict[str, Dict[str, Any]]]:
+        return self.fetch(ticker, "statements")
+
+
+class MarketDataCache:
+    """Per-(ticker, field) cache with field-specific TTLs.
+
+    Entries live in memory and, with ``db_path``, in SQLite so they survive
+    restarts. Freshness is checked against ``ttls`` at read time, so
+    changing a TTL also applies to entries already stored. The SQLite tier
+    blocks, so async callers should do disk lookups (``get`` with
+    ``load=True``) and ``set`` off the event loop.
+    """
+
+    def __init__(self, ttls: Optional[Dict[str, float]] = None, db_path: Optional[str] = None):
+        self.ttls = {**DEFAULT_TTLS, **(ttls or {})}
+        self._entries: Dict[Tuple[str, str], Tuple[float, Any]] = {}
+        self._lock = threading.Lock()  # Guards the memory tier and counters only
+        self._db_lock = threading.Lock()  # Serializes the shared SQLite connection
+        self._conn: Optional[sqlite3.Connection] = None
+        self.hits = 0
+        self.misses = 0
+        if db_path:
+            self._conn = sqlite3.connect(db_path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            with self._conn:
+                self._conn.execute(
+                    "CREATE TABLE IF NOT EXISTS market_data (ticker TEXT, field TEXT, "
+                    "value TEXT, fetched_at REAL, PRIMARY KEY (ticker, field))"
+                )
+
+    def _fresh(self, field: str, fetched_at: float) -> bool:
+        return time.time() - fetched_at < self.ttls.get(field, 0.0)
+
+    @property
+    def on_disk(self) -> bool:
+        return self._conn is not None
+
+    def get(self, ticker: str, field: str, load: bool = True) -> Optional[Any]:
+        """Fresh cached value or None.
+
+        With ``load=False`` only memory is consulted. If there is a disk
+        tier, a miss is then not counted: the caller is expected to retry
+        with ``load=True`` off the event loop, which counts it.
+        """
+        key = (ticker, field)
+        with self._lock:
+            entry = self._entries.get(key)
+        if entry is None and load and self._conn is not None:
+            with self._db_lock:
+                row = self._conn.execute(
+                    "SELECT fetched_at, value FROM market_data WHERE ticker = ? AND field = ?",
+                    (ticker, field)
+                ).fetchone()
+            if row is not None:
+                entry = (row[0], json.loads(row[1]))
+                with self._lock:
+                    current = self._entries.get(key)
+                    if current is None or current[0] < entry[0]:
+                        self._entries[key] = entry
+        fresh = entry is not None and self._fresh(field, entry[0])
+        if not fresh and not load and self._conn is not None:
+            return None
+        with self._lock:
+            if fresh:
+                self.hits += 1
+            else:
+                self.misses += 1
+        return entry[1] if fresh else None
+
+    def set(self, ticker: str, field: str, value: Any) -> None:
+        fetched_at = time.time()
+        with self._lock:
+            self._entries[(ticker, field)] = (fetched_at, value)
+        if self._conn is not None:
+            payload = json.dumps(value, default=_json_default)
+            with self._db_lock, self._conn:
+                self._conn.execute(
+                    "INSERT OR REPLACE INTO market_data (ticker, field, value, fetched_at) "
+                    "VALUES (?, ?, ?, ?)",
+                    (ticker, field, payload, fetched_at)
+                )
+
+    def stats(self) -> Dict[str, Any]:
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "entries": len(self._entries),
+            "hit_rate": self.hits / lookups if lookups else 0.0
+        }
+
+    def close(self):
+        with self._db_lock:
+            if self._conn is not None:
+                self._conn.close()
+                self._conn = None
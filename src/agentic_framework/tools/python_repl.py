@@ -1,14 +1,38 @@
-from typing import Dict, Any
+from typing import Dict, Any, Optional
+import os
+from agentic_framework.core.run import current_run
 from agentic_framework.core.tool import Tool, ToolSchema
-from agentic_framework.safety.sandbox import DockerSandbox
+from agentic_framework.safety.pool import PooledSandbox
+
+_shared_sandbox: Optional[PooledSandbox] = None
+
+
+def shared_sandbox() -> PooledSandbox:
+    """Process-wide sandbox, so all agents draw on one warm pool.
+
+    The backend comes from ``SANDBOX_BACKEND``: ``docker`` (the default) or
+    ``local`` to opt in to confined host subprocesses.
+    """
+    global _shared_sandbox
+    if _shared_sandbox is None:
+        from agentic_framework.safety.sandbox import create_sandbox
+        _shared_sandbox = create_sandbox(os.getenv("SANDBOX_BACKEND", "docker"))
+    return _shared_sandbox
+
 
 class PythonREPLTool(Tool):
     """
-    Executes Python code in a secure Docker sandbox.
+    Executes Python code in a secure sandbox (Docker by default; see
+    ``shared_sandbox`` for the opt-in local backend).
     Useful for complex calculations and data analysis.
+
+    Each agent run gets its own interpreter session, so variables defined in
+    one call are visible in the next call of the same run, but never to other
+    agents sharing the tool. The session ends with the run. Calls outside an
+    agent run, or with ``persistent=False``, use a fresh namespace.
     """
     
-    def __init__(self):
+    def __init__(self, sandbox: Optional[PooledSandbox] = None, persistent: bool = True):
         super().__init__(
             name="python_repl",
             description="Executes Python code. Use this for math, data analysis, or complex logic. Input should be valid Python code.",
@@ -24,11 +48,18 @@ class PythonREPLTool(Tool):
                     "required": ["code"]
                 },
                 output_schema={"type": "string"}
-            )
+            ),
+            category="sandbox"
         )
-        self.sandbox = DockerSandbox()
+        self.sandbox = sandbox if sandbox is not None else shared_sandbox()
+        self.persistent = persistent
 
     async def execute(self, code: str) -> Dict[str, Any]:
         """Execute code in sandbox"""
-        result = self.sandbox.run_code(code)
-        return result
+        run = current_run()
+        session_id = run.id if run is not None and self.persistent else None
+        return await self.sandbox.arun_code(code, session_id=session_id)
+
+    async def end_run(self, run_id: str) -> None:
+        """Drop the interpreter session of a finished run"""
+        await self.sandbox.end_session(run_id)
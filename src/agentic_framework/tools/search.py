@@ -9,10 +9,15 @@ class SearchTool(Tool):
         super().__init__(
             name="web_search",
             description="Search the web for information about a topic or ticker.",
-            category="search"
+            category="search",
+            coalesce=True,
+            timeout=20.0
         )
         self.max_results = max_results
     
+    def call_key(self, params: Dict[str, Any]) -> str:
+        return super().call_key({**params, "max_results": self.max_results})
+    
     async def execute(self, query: str) -> List[Dict[str, Any]]:
         """
         Execute a web search.
@@ -24,8 +29,11 @@ class SearchTool(Tool):
             List of search results containing title, link, and snippet
         """
         try:
-            with DDGS() as ddgs:
-                results = list(ddgs.text(query, max_results=self.max_results))
-                return results
+            # DDGS does blocking HTTP; keep it off the event loop
+            return await self.run_blocking(self._search, query)
         except Exception as e:
-            return [{"error": f"Search failed: {str(e)}"}]
+            return [{"error": f"Search failed: {str(e) or type(e).__name__}"}]
+    
+    def _search(self, query: str) -> List[Dict[str, Any]]:
+        with DDGS() as ddgs:
+            return list(ddgs.text(query, max_results=self.max_results))
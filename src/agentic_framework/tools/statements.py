@@ -0,0 +1,81 @@
+"""Compact columnar encoding of financial statements"""
+from dataclasses import dataclass
+from typing import Any, Dict, List, Optional, Sequence
+import math
+
+import numpy as np
+
+TABLE_FORMATS = ("columnar", "csv", "markdown")
+
+
+def _fmt(value: float) -> str:
+    return "" if math.isnan(value) else f"{value:.6g}"
+
+
+@dataclass
+class StatementTable:
+    """One statement as a metrics x periods float matrix (NaN = missing)"""
+    metrics: List[str]
+    periods: List[str]
+    values: np.ndarray
+
+    @classmethod
+    def from_periods(cls, data: Dict[str, Dict[str, Any]]) -> "StatementTable":
+        """Build from ``{period: {metric: value}}`` (``DataFrame.to_dict()`` layout)"""
+        periods = [str(period) for period in data]
+        metrics = list(dict.fromkeys(metric for column in data.values() for metric in column))
+        row = {metric: i for i, metric in enumerate(metrics)}
+        values = np.full((len(metrics), len(periods)), np.nan)
+        for j, column in enumerate(data.values()):
+            for metric, value in column.items():
+                if isinstance(value, (int, float)) and not isinstance(value, bool):
+                    values[row[metric], j] = value
+        return cls(metrics, periods, values)
+
+    def select(self, metrics: Optional[Sequence[str]] = None) -> "StatementTable":
+        """Keep metrics whose name contains any requested term (case-insensitive)"""
+        if not metrics:
+            return self
+        terms = [term.lower() for term in metrics]
+        rows = [i for i, name in enumerate(self.metrics) if any(t in name.lower() for t in terms)]
+        return StatementTable([self.metrics[i] for i in rows], self.periods, self.values[rows])
+
+    def to_dict(self) -> Dict[str, Any]:
+        """``{"periods": [...], "metrics": [...], "values": [[row per metric]]}``"""
+        return {
+            "periods": self.periods,
+            "metrics": self.metrics,
+            "values": [
+                [None if math.isnan(v) else float(f"{v:.6g}") for v in row]
+                for row in self.values
+            ]
+        }
+
+    def to_csv(self) -> str:
+        lines = [",".join(["metric", *self.periods])]
+        for metric, row in zip(self.metrics, self.values):
+            name = f'"{metric}"' if "," in metric else metric
+            lines.append(",".join([name, *(_fmt(v) for v in row)]))
+        return "\n".join(lines)
+
+    def to_markdown(self) -> str:
+        lines = [
+            "| metric | " + " | ".join(self.periods) + " |",
+            "|---" * (len(self.periods) + 1) + "|",
+        ]
+        for metric, row in zip(self.metrics, self.values):
+            lines.append(f"| {metric} | " + " | ".join(_fmt(v) for v in row) + " |")
+        return "\n".join(lines)
+
+    def render(self, table_format: str = "columnar") -> Any:
+        """``columnar`` (dict of arrays), ``csv`` or ``markdown``"""
+        if table_format == "csv":
+            return self.to_csv()
+        if table_format == "markdown":
+            return self.to_markdown()
+        if table_format == "columnar":
+            return self.to_dict()
+        raise ValueError(f"Unknown table format: {table_format}")
+
+    def __len__(self) -> int:
+        return len(self.metrics)
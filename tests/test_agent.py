@@ -0,0 +1,392 @@
+import asyncio
+import os
+import threading
+import time
+from typing import Any, Dict, List, Optional
+
+import pytest
+from agentic_framework import Agent, AgentConfig
+from agentic_framework.core.tool import Tool
+from agentic_framework.llm.base import BaseLLMClient
+
+
+class ScriptedLLM(BaseLLMClient):
+    """Replays canned responses in order"""
+
+    def __init__(self, responses: List[str]):
+        self.responses = list(responses)
+        self.calls: List[List[Dict[str, Any]]] = []
+
+    async def generate(self, messages, **kwargs):
+        self.calls.append(list(messages))
+        return {"content": self.responses.pop(0), "tokens": 0, "cost": 0.0}
+
+
+class SleepTool(Tool):
+    def __init__(self, name: str, delay: float = 0.05, serial: bool = False):
+        super().__init__(name=name, description="Sleeps then echoes", category="test", serial=serial)
+        self.delay = delay
+        self.active = 0
+        self.peak = 0
+
+    async def execute(self, value: str = "") -> str:
+        self.active += 1
+        self.peak = max(self.peak, self.active)
+        await asyncio.sleep(self.delay)
+        self.active -= 1
+        return f"{self.name}:{value}"
+
+
+class SquareTool(Tool):
+    """CPU-bound tool; module-level so worker processes can unpickle it"""
+
+    def execute(self, n: str = "0") -> str:
+        return f"{int(n) ** 2} in {'worker' if os.getpid() != PARENT_PID else 'parent'}"
+
+
+class LockedSquareTool(SquareTool):
+    def __init__(self, **kwargs):
+        super().__init__(**kwargs)
+        self.lock = threading.Lock()
+
+
+PARENT_PID = os.getpid()
+
+
+def _observations(llm: ScriptedLLM) -> List[str]:
+    return [m["content"] for m in llm.calls[-1] if m["content"].startswith("Observation:")]
+
+
+async def test_parallel_tool_calls_preserve_order():
+    class DelayTool(Tool):
+        async def execute(self, delay: str = "0") -> str:
+            await asyncio.sleep(float(delay))
+            return f"slept {delay}"
+
+    tool = DelayTool(name="delay_tool", description="Sleeps for the given seconds")
+    llm = ScriptedLLM([
+        'delay_tool("0.1")\ndelay_tool("0.01")\ndelay_tool("0.05")',
+        "Final answer: done",
+    ])
+    agent = Agent(id="a", name="a", instructions="", tools=[tool], model_client=llm)
+
+    start = time.perf_counter()
+    result = await agent.execute("go")
+    elapsed = time.perf_counter() - start
+
+    assert result["success"]
+    assert elapsed < 0.15
+    assert [o.split("returned: ")[1] for o in _observations(llm)] == [
+        "slept 0.1", "slept 0.01", "slept 0.05"
+    ]
+
+
+async def test_concurrency_cap_and_serial_tools():
+    shared = SleepTool("shared_tool", delay=0.02)
+    serial = SleepTool("serial_tool", delay=0.02, serial=True)
+    llm = ScriptedLLM([
+        "shared_tool('1') shared_tool('2') shared_tool('3') serial_tool('x')",
+        "Final answer: done",
+    ])
+    agent = Agent(
+        id="b", name="b", instructions="", tools=[shared, serial], model_client=llm,
+        config=AgentConfig(max_tool_concurrency=2),
+    )
+
+    result = await agent.execute("go")
+
+    assert result["success"]
+    assert shared.peak == 2
+    assert serial.peak == 1
+
+
+async def test_sequential_mode():
+    tool = SleepTool("seq_tool", delay=0.01)
+    llm = ScriptedLLM(["seq_tool('1') seq_tool('2')", "Final answer: done"])
+    agent = Agent(
+        id="c", name="c", instructions="", tools=[tool], model_client=llm,
+        config=AgentConfig(parallel_tool_calls=False),
+    )
+
+    await agent.execute("go")
+
+    assert tool.peak == 1
+
+
+async def test_concurrent_runs_keep_separate_budgets():
+    class PricedLLM(BaseLLMClient):
+        """Each call costs 0.45; a run calls a tool once, then answers"""
+
+        async def generate(self, messages, **kwargs):
+            await asyncio.sleep(0.01)
+            answered = messages[-1]["content"].startswith("Observation:")
+            content = "Final answer: done" if answered else f"echo_tool('{messages[-1]['content']}')"
+            return {"content": content, "tokens": 1, "cost": 0.45}
+
+    agent = Agent(
+        id="e", name="e", instructions="", tools=[SleepTool("echo_tool", delay=0.02)],
+        model_client=PricedLLM(), config=AgentConfig(max_cost=1.0),
+    )
+
+    # Two runs of 0.90 each on one agent: each stays under its own cap
+    results = await asyncio.gather(agent.execute("a"), agent.execute("b"))
+
+    for result in results:
+        assert result["success"], result
+        assert result["iterations"] == 2
+        assert result["cost"] == pytest.approx(0.9)
+        assert [entry["iteration"] for entry in result["usage"]["iterations"]] == [1, 2]
+    assert agent.total_cost == pytest.approx(1.8)
+
+
+async def test_execute_stream_events():
+    tool = SleepTool("echo_tool", delay=0)
+    llm = ScriptedLLM(["echo_tool('hi')", "Final answer: hi"])
+    agent = Agent(id="d", name="d", instructions="", tools=[tool], model_client=llm)
+
+    events = [event async for event in agent.execute_stream("go")]
+
+    types = [event["type"] for event in events]
+    assert types == ["token", "thought", "tool_call", "observation", "token", "final"]
+    assert events[2] == {"type": "tool_call", "tool": "echo_tool", "params": {"value": "hi"}}
+    assert "echo_tool:hi" in events[3]["content"]
+    assert events[-1]["content"] == "Final answer: hi"
+    assert events[-1]["iterations"] == 2
+
+
+async def test_execute_stream_reports_errors():
+    llm = ScriptedLLM(["echo_tool('hi')"] * 3)
+    agent = Agent(
+        id="e", name="e", instructions="", tools=[SleepTool("echo_tool", delay=0)],
+        model_client=llm, config=AgentConfig(max_iterations=2),
+    )
+
+    events = [event async for event in agent.execute_stream("go")]
+
+    assert events[-1]["type"] == "error"
+    assert "Max iterations" in events[-1]["error"]
+
+
+def test_tool_call_parser_single_pass():
+    from agentic_framework.core.parser import ToolCallParser
+
+    class Lookup(Tool):
+        async def execute(self, ticker: str, detailed: bool = False) -> str:
+            return ticker
+
+    search, lookup = SleepTool("web_search"), Lookup(name="lookup")
+    parser = ToolCallParser([search, lookup])
+
+    calls = parser.parse(
+        "First LOOKUP('AAPL', True), then web_search(value='apple (inc) news') "
+        "and lookup(ticker=\"MSFT\"). Not a call: my_lookup('x') or lookup(undefined_name)"
+    )
+
+    assert [(c["tool"].name, c["params"]) for c in calls] == [
+        ("lookup", {"ticker": "AAPL", "detailed": True}),
+        ("web_search", {"value": "apple (inc) news"}),
+        ("lookup", {"ticker": "MSFT"}),
+    ]
+    assert ToolCallParser([]).parse("lookup('AAPL')") == []
+
+
+async def test_agent_accepts_structured_tool_calls():
+    class StructuredLLM(ScriptedLLM):
+        async def generate(self, messages, **kwargs):
+            response = await super().generate(messages, **kwargs)
+            if len(self.calls) == 1:
+                response["tool_calls"] = [
+                    {"id": "call_1", "function": {"name": "echo_tool", "arguments": '{"value": "x"}'}},
+                    {"id": "call_2", "function": {"name": "unknown", "arguments": "{}"}},
+                ]
+            return response
+
+    llm = StructuredLLM(["", "Final answer: x"])
+    agent = Agent(id="f", name="f", instructions="", tools=[SleepTool("echo_tool", delay=0)], model_client=llm)
+
+    result = await agent.execute("go")
+
+    assert result["success"]
+    replies = [(m["tool_call_id"], m["content"]) for m in llm.calls[-1] if m["role"] == "tool"]
+    assert replies == [
+        ("call_1", "Tool echo_tool returned: echo_tool:x"),
+        ("call_2", "Tool unknown error: unknown tool or invalid arguments"),
+    ]
+    assert llm.calls[-1][-3]["tool_calls"][0]["id"] == "call_1"
+
+
+async def test_native_tool_schemas_replace_prose_tool_list():
+    class NativeLLM(ScriptedLLM):
+        supports_tools = True
+
+        async def generate(self, messages, **kwargs):
+            self.kwargs = kwargs
+            return await super().generate(messages, **kwargs)
+
+    class Lookup(Tool):
+        async def execute(self, ticker: str, detailed: bool = False, limit: Optional[int] = None):
+            return ticker
+
+    llm = NativeLLM(["Final answer: none"])
+    agent = Agent(id="g", name="g", instructions="", tools=[Lookup(name="lookup")], model_client=llm)
+
+    await agent.execute("go")
+
+    assert not any("Available tools" in m["content"] for m in llm.calls[0])
+    assert llm.kwargs["tools"] == [{
+        "type": "function",
+        "function": {
+            "name": "lookup",
+            "description": "",
+            "parameters": {
+                "type": "object",
+                "properties": {
+                    "ticker": {"type": "string"},
+                    "detailed": {"type": "boolean"},
+                    "limit": {"type": "integer"},
+                },
+                "required": ["ticker"],
+            },
+        },
+    }]
+
+    agent.config.native_tool_calls = False
+    llm.responses = ["Final answer: none"]
+    await agent.execute("go")
+    assert "tools" not in llm.kwargs
+    assert any("Available tools" in m["content"] for m in llm.calls[-1])
+
+
+async def test_coalesced_tool_runs_once_across_agents():
+    class QuoteTool(Tool):
+        def __init__(self):
+            super().__init__(name="quote", description="Quote", coalesce=True)
+            self.calls = 0
+
+        async def execute(self, ticker: str) -> str:
+            self.calls += 1
+            await asyncio.sleep(0.02)
+            return f"{ticker}=1"
+
+    tool = QuoteTool()
+    agents = [
+        Agent(
+            id=str(i), name=str(i), instructions="", tools=[tool],
+            model_client=ScriptedLLM([f"quote('{t}')", "Final answer: ok"]),
+        )
+        for i, t in enumerate(["AAPL", "AAPL", "AAPL", "MSFT"])
+    ]
+
+    results = await asyncio.gather(*(agent.execute("go") for agent in agents))
+
+    assert all(r["success"] for r in results)
+    assert tool.calls == 2
+    assert _observations(agents[1].model_client) == ["Observation: Tool quote returned: AAPL=1"]
+
+
+async def test_old_observations_are_compacted():
+    class DumpTool(Tool):
+        async def execute(self, n: str = "0") -> str:
+            return f"sheet{n} " + "1234.5, " * 2000
+
+    llm = ScriptedLLM(["dump('1')", "dump('2')", "dump('3')", "Final answer: done"])
+    agent = Agent(
+        id="d", name="d", instructions="", tools=[DumpTool(name="dump")], model_client=llm,
+        config=AgentConfig(context_keep_recent_turns=1, observation_max_tokens=50),
+    )
+
+    result = await agent.execute("go")
+
+    assert result["success"]
+    first, second, third = _observations(llm)
+    assert "sheet1" in first and "[truncated" in first
+    assert "[truncated" in second and "[truncated" not in third
+    assert len(first) < 500
+    saved = [entry["tokens_saved"] for entry in result["usage"]["iterations"]]
+    assert saved[0] == saved[1] == 0 and 0 < saved[2] < saved[3]
+    assert result["usage"]["tokens_saved"] == sum(saved)
+
+
+def test_context_manager_drops_stale_turns_within_budget():
+    from agentic_framework.core.context import ContextManager
+
+    conversation = [
+        {"role": "system", "content": "You are terse."},
+        {"role": "user", "content": "task"},
+    ]
+    for i in range(6):
+        conversation.append({"role": "assistant", "content": f"step {i}", "tool_calls": [{}]})
+        conversation.append({"role": "tool", "tool_call_id": str(i), "content": "word " * 20})
+    manager = ContextManager(max_tokens=80, keep_recent_turns=2, max_observation_tokens=None)
+
+    assert manager.compact(conversation) > 0
+    assert conversation[:2] == [
+        {"role": "system", "content": "You are terse."}, {"role": "user", "content": "task"}
+    ]
+    assert "4 earlier reasoning steps were omitted" in conversation[2]["content"]
+    assert [m["content"] for m in conversation[3::2]] == ["step 4", "step 5"]
+    assert conversation[4]["role"] == "tool"
+
+
+async def test_blocking_tools_run_on_category_pools():
+    from agentic_framework.core.executor import ToolExecutor
+
+    executor = ToolExecutor(max_workers={"slow": 1}, default_workers=4)
+
+    class BlockingTool(Tool):
+        def execute(self, seconds: str = "0.05") -> str:
+            time.sleep(float(seconds))
+            return "done"
+
+    slow = BlockingTool(name="slow", category="slow", executor=executor)
+    fast = BlockingTool(name="fast", category="fast", executor=executor, timeout=0.02)
+    llm = ScriptedLLM([
+        "slow('0.05') slow('0.05') fast('0.01') fast('0.01') fast('0.2')",
+        "Final answer: done",
+    ])
+    agent = Agent(
+        id="e", name="e", instructions="", tools=[slow, fast], model_client=llm,
+        config=AgentConfig(max_tool_concurrency=5),
+    )
+
+    ticks = 0
+
+    async def heartbeat():
+        nonlocal ticks
+        while True:
+            ticks += 1
+            await asyncio.sleep(0.005)
+
+    beat = asyncio.ensure_future(heartbeat())
+    result = await agent.execute("go")
+    beat.cancel()
+
+    assert result["success"]
+    assert ticks > 5  # The event loop kept running while tools blocked
+    observations = _observations(llm)
+    assert observations[:4] == ["Observation: Tool slow returned: done"] * 2 + [
+        "Observation: Tool fast returned: done"
+    ] * 2
+    assert "timed out" in observations[4]
+
+    stats = executor.stats()
+    assert stats["slow"]["completed"] == 2 and stats["slow"]["max_queue_time"] >= 0.04
+    assert stats["fast"]["timeouts"] == 1 and stats["fast"]["max_queue_time"] < 0.04
+    executor.shutdown()
+
+
+async def test_cpu_bound_tools_run_in_worker_processes():
+    from agentic_framework.core.executor import ToolExecutor
+
+    executor = ToolExecutor(process_workers=1)
+    # A tool's own executor is left behind; unpicklable state is rejected clearly
+    square = SquareTool(name="square", cpu_bound=True, executor=executor)
+    locked = LockedSquareTool(name="locked", cpu_bound=True, executor=executor)
+    llm = ScriptedLLM(["square('12') locked('3')", "Final answer: done"])
+    agent = Agent(id="p", name="p", instructions="", tools=[square, locked], model_client=llm)
+
+    assert (await agent.execute("go"))["success"]
+    observations = _observations(llm)
+    assert observations[0] == "Observation: Tool square returned: 144 in worker"
+    assert "cannot run in a process pool" in observations[1] and "lock" in observations[1]
+    executor.shutdown()
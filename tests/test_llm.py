@@ -0,0 +1,475 @@
+import asyncio
+import time
+
+import pytest
+from agentic_framework.llm.openai_client import OpenAIClient
+from agentic_framework.llm.transport import ClientRegistry, PoolConfig
+
+
+async def test_openai_clients_share_a_pool_per_endpoint():
+    registry = ClientRegistry(PoolConfig(max_connections=7))
+    a = OpenAIClient(api_key="k1", registry=registry)
+    b = OpenAIClient(api_key="k1", model="gpt-4o-mini", registry=registry)
+    c = OpenAIClient(api_key="k2", registry=registry)
+    d = OpenAIClient(api_key="k1", base_url="http://localhost:1/v1", registry=registry)
+
+    assert a.client is b.client
+    assert a.client is not c.client
+    assert a.client is not d.client
+    assert OpenAIClient(api_key="k1", shared=False, registry=registry).client is not a.client
+
+    stats = registry.stats()
+    assert len(stats) == 3
+    assert all(s["clients"] == 1 and s["requests"] == 0 for s in stats.values())
+    await registry.aclose()
+
+
+async def test_registry_in_flight_survives_connection_errors():
+    import openai
+
+    registry = ClientRegistry()
+    client = OpenAIClient(api_key="k", base_url="http://127.0.0.1:1/v1", registry=registry)
+
+    with pytest.raises(openai.APIConnectionError):
+        await client.client.with_options(max_retries=0).models.list()
+
+    (stats,) = registry.stats().values()
+    assert stats["requests"] == 1 and stats["in_flight"] == 0
+    await registry.aclose()
+
+
+def test_shared_pools_are_per_event_loop():
+    registry = ClientRegistry()
+    client = OpenAIClient(api_key="k", registry=registry)
+
+    async def grab():
+        return client.client
+
+    first, second = asyncio.run(grab()), asyncio.run(grab())
+    assert first is not second
+
+
+class CountingLLM:
+    """Minimal BaseLLMClient stand-in that counts calls"""
+
+    model = "fake"
+
+    def __init__(self, delay: float = 0.0):
+        self.calls = 0
+        self.delay = delay
+
+    async def generate(self, messages, **kwargs):
+        self.calls += 1
+        await asyncio.sleep(self.delay)
+        return {"content": f"answer {self.calls}", "tokens": 10, "cost": 0.01}
+
+    async def stream(self, messages, **kwargs):
+        response = await self.generate(messages, **kwargs)
+        yield {"content": response["content"]}
+        yield {"done": True, "response": response}
+
+
+async def test_cached_llm_client_tiers_and_cost(tmp_path):
+    from agentic_framework.llm.cache import CachedLLMClient, ResponseCache
+
+    inner = CountingLLM()
+    db_path = str(tmp_path / "responses.db")
+    llm = CachedLLMClient(inner, ResponseCache(db_path=db_path))
+    messages = [{"role": "user", "content": "What is  2+2?\n"}]
+
+    first = await llm.generate(messages, temperature=0)
+    second = await llm.generate([{"role": "user", "content": "What is 2+2?"}], temperature=0)
+    assert first == {"content": "answer 1", "tokens": 10, "cost": 0.01}
+    assert second == {"content": "answer 1", "tokens": 10, "cost": 0.0, "cached": True}
+
+    await llm.generate(messages, temperature=0, max_tokens=5)  # different params
+    await llm.generate(messages, temperature=0.7)  # non-deterministic, bypasses cache
+    await llm.generate(messages, temperature=0.7)
+    assert inner.calls == 4
+    assert llm.stats()["hits"] == 1 and llm.stats()["misses"] == 2
+
+    chunks = [c async for c in llm.stream(messages, temperature=0)]
+    assert chunks[-1]["response"]["cached"] is True
+
+    restarted = CachedLLMClient(inner, ResponseCache(db_path=db_path))
+    assert (await restarted.generate(messages, temperature=0))["content"] == "answer 1"
+    assert inner.calls == 4
+
+
+class SlowConnection:
+    """Wraps a sqlite3 connection so every statement takes ``delay`` seconds"""
+
+    def __init__(self, conn, delay):
+        self.conn, self.delay = conn, delay
+
+    def execute(self, *args):
+        time.sleep(self.delay)
+        return self.conn.execute(*args)
+
+    def __enter__(self):
+        return self.conn.__enter__()
+
+    def __exit__(self, *exc):
+        return self.conn.__exit__(*exc)
+
+    def close(self):
+        self.conn.close()
+
+
+async def test_response_cache_memory_hits_never_wait_on_sqlite(tmp_path):
+    from agentic_framework.llm.cache import ResponseCache
+
+    cache = ResponseCache(db_path=str(tmp_path / "responses.db"))
+    cache.set("warm", {"content": "x"})
+    cache._conn = SlowConnection(cache._conn, 0.2)
+
+    write = asyncio.ensure_future(cache.aset("cold", {"content": "y"}))
+    await asyncio.sleep(0.02)
+    started = time.perf_counter()
+    assert await cache.aget("warm") == {"content": "x"}
+    assert time.perf_counter() - started < 0.1
+    await write
+    cache.close()
+
+
+def test_response_cache_ttl():
+    from agentic_framework.llm.cache import ResponseCache
+
+    cache = ResponseCache(ttl=0.01)
+    cache.set("k", {"content": "x"})
+    assert cache.get("k") == {"content": "x"}
+    time.sleep(0.02)
+    assert cache.get("k") is None
+
+
+async def test_agent_reports_cached_turns_as_free():
+    from agentic_framework import Agent, AgentConfig
+    from agentic_framework.llm.cache import CachedLLMClient
+
+    class FinalLLM(CountingLLM):
+        async def generate(self, messages, **kwargs):
+            response = await super().generate(messages, **kwargs)
+            return {**response, "content": "Final answer: 4"}
+
+    llm = CachedLLMClient(FinalLLM())
+    agent = Agent(
+        id="c", name="c", instructions="", tools=[], model_client=llm,
+        config=AgentConfig(temperature=0),
+    )
+
+    assert (await agent.execute("2+2?"))["cost"] == 0.01
+    assert (await agent.execute("2+2?"))["cost"] == 0.0
+    assert agent.total_cost == 0.01
+
+
+async def test_agent_max_cost_applies_per_run():
+    from agentic_framework import Agent, AgentConfig
+
+    class FinalLLM(CountingLLM):
+        async def generate(self, messages, **kwargs):
+            response = await super().generate(messages, **kwargs)
+            return {**response, "content": "Final answer: 4"}
+
+    agent = Agent(
+        id="c", name="c", instructions="", tools=[], model_client=FinalLLM(),
+        config=AgentConfig(max_cost=0.015),
+    )
+
+    # Each run costs 0.01: well under the cap, even though the lifetime total is not
+    for _ in range(3):
+        assert (await agent.execute("2+2?"))["success"]
+    assert round(agent.total_cost, 2) == 0.03
+
+
+class ConceptEmbedding:
+    """Stand-in for a sentence-embedding model: word forms map to one concept"""
+
+    CONCEPTS = {"analyze": "analysis", "analysis": "analysis", "fundamental": "fundamentals",
+                "fundamentals": "fundamentals", "aapl": "aapl", "msft": "msft", "news": "news"}
+
+    def __call__(self, texts):
+        import numpy as np
+
+        vocabulary = sorted(set(self.CONCEPTS.values()))
+        vectors = np.zeros((len(texts), len(vocabulary)), dtype=np.float32)
+        for row, text in enumerate(texts):
+            for word in text.lower().split():
+                if word in self.CONCEPTS:
+                    vectors[row, vocabulary.index(self.CONCEPTS[word])] = 1.0
+        return vectors
+
+
+async def test_semantic_cache_serves_paraphrases_at_the_default_threshold():
+    from agentic_framework.llm.semantic_cache import SemanticCachedLLMClient
+    from agentic_framework.memory.embeddings import HashingEmbeddingFunction
+
+    inner = CountingLLM()
+    llm = SemanticCachedLLMClient(inner, embedding_function=ConceptEmbedding())
+    system = {"role": "system", "content": "You are a financial analyst."}
+
+    first = await llm.generate([system, {"role": "user", "content": "analyze AAPL fundamentals"}])
+    hit = await llm.generate(
+        [system, {"role": "user", "content": "give me AAPL fundamental analysis"}]
+    )
+    assert hit["content"] == first["content"] and hit["cached"] is True
+    await llm.generate([system, {"role": "user", "content": "analyze MSFT fundamentals"}])
+    assert inner.calls == 2
+
+    # A lexical embedder cannot match this pair at the default threshold
+    lexical = SemanticCachedLLMClient(CountingLLM(), embedding_function=HashingEmbeddingFunction())
+    await lexical.generate([system, {"role": "user", "content": "analyze AAPL fundamentals"}])
+    await lexical.generate(
+        [system, {"role": "user", "content": "give me AAPL fundamental analysis"}]
+    )
+    assert lexical.stats()["hits"] == 0
+
+
+def test_semantic_cache_requires_an_embedding_model():
+    import importlib.util
+
+    from agentic_framework.llm.semantic_cache import SemanticCachedLLMClient
+
+    if importlib.util.find_spec("chromadb") is not None:
+        pytest.skip("chromadb provides the default model")
+    with pytest.raises(ImportError, match="embedding_function"):
+        SemanticCachedLLMClient(CountingLLM())
+
+
+async def test_semantic_cache_reuses_near_duplicate_prompts():
+    from agentic_framework.llm.semantic_cache import SemanticCachedLLMClient
+    from agentic_framework.memory.embeddings import HashingEmbeddingFunction
+
+    inner = CountingLLM()
+    llm = SemanticCachedLLMClient(
+        inner, threshold=0.8, embedding_function=HashingEmbeddingFunction(),
+        max_entries_per_scope=2
+    )
+    system = {"role": "system", "content": "You are a financial analyst."}
+
+    first = await llm.generate([system, {"role": "user", "content": "Analyze AAPL fundamentals"}])
+    hit = await llm.generate([system, {"role": "user", "content": "analyze AAPL fundamentals please"}])
+    assert hit["content"] == first["content"] and hit["cost"] == 0.0 and hit["cached"] is True
+    assert 0.8 <= hit["similarity"] < 1.0
+
+    # Different ticker, different instructions, different tools: all misses
+    await llm.generate([system, {"role": "user", "content": "Analyze MSFT fundamentals"}])
+    other = {"role": "system", "content": "You are a poet."}
+    await llm.generate([other, {"role": "user", "content": "Analyze AAPL fundamentals"}])
+    await llm.generate(
+        [system, {"role": "user", "content": "Analyze AAPL fundamentals"}], tools=[{"name": "x"}]
+    )
+    assert inner.calls == 4
+    assert llm.stats()["hits"] == 1 and llm.stats()["scopes"] == 3
+
+    # Per-scope eviction drops the oldest prompt (AAPL) once MSFT and a third arrive
+    await llm.generate([system, {"role": "user", "content": "Analyze TSLA fundamentals"}])
+    await llm.generate([system, {"role": "user", "content": "Analyze AAPL fundamentals"}])
+    assert inner.calls == 6
+
+
+async def test_coalescing_client_shares_in_flight_requests():
+    from agentic_framework.llm.coalescing import CoalescingLLMClient
+
+    inner = CountingLLM(delay=0.02)
+    llm = CoalescingLLMClient(inner)
+    messages = [{"role": "user", "content": "What is 2+2?"}]
+
+    responses = await asyncio.gather(*(llm.generate(messages, temperature=0) for _ in range(5)))
+    assert inner.calls == 1
+    assert sum(r["cost"] for r in responses) == 0.01
+    assert sum(bool(r.get("coalesced")) for r in responses) == 4
+
+    # Finished flights are forgotten; distinct params never share
+    await asyncio.gather(
+        llm.generate(messages, temperature=0), llm.generate(messages, temperature=0, max_tokens=5)
+    )
+    assert inner.calls == 3
+    assert llm.stats()["in_flight"] == 0 and llm.stats()["shared"] == 4
+
+
+async def test_rate_limiter_priority_usage_and_throttling():
+    from agentic_framework.llm.ratelimit import ModelLimits, RateLimitedLLMClient, RateLimiter
+
+    order = []
+
+    class UsageLLM(CountingLLM):
+        async def generate(self, messages, **kwargs):
+            response = await super().generate(messages, **kwargs)
+            order.append(messages[0]["content"])
+            return {**response, "usage": {"total_tokens": 100}}
+
+    limiter = RateLimiter(
+        {"fake": ModelLimits(tokens_per_minute=6000)}, initial_concurrency=1, max_concurrency=1
+    )
+    llm = RateLimitedLLMClient(UsageLLM(delay=0.01), limiter)
+
+    def ask(text, **kwargs):
+        return llm.generate([{"role": "user", "content": text}], max_tokens=5000, **kwargs)
+
+    # 5000-token reservations only fit one at a time; the real usage (100) is
+    # refunded so the queue keeps moving, and interactive overtakes batch
+    first = asyncio.ensure_future(ask("first"))
+    await asyncio.sleep(0)
+    batch = asyncio.ensure_future(ask("batch", priority="batch"))
+    interactive = asyncio.ensure_future(ask("interactive"))
+    await asyncio.sleep(0)
+    assert llm.stats()["queue_depth"] == 2
+    await asyncio.wait_for(asyncio.gather(first, batch, interactive), timeout=1)
+    assert order == ["first", "interactive", "batch"]
+    assert llm.stats()["max_wait"] > 0
+
+    class Throttled(Exception):
+        status_code = 429
+
+    class ThrottledLLM(CountingLLM):
+        async def generate(self, messages, **kwargs):
+            await asyncio.sleep(0.01)
+            raise Throttled()
+
+    limiter = RateLimiter(initial_concurrency=8)
+    llm = RateLimitedLLMClient(ThrottledLLM(), limiter)
+    results = await asyncio.gather(
+        *(llm.generate([{"role": "user", "content": "x"}]) for _ in range(4)),
+        return_exceptions=True
+    )
+    assert all(isinstance(r, Throttled) for r in results)
+    stats = llm.stats()
+    assert stats["throttled"] == 4 and stats["concurrency_limit"] == 4  # halved once
+    assert stats["in_flight"] == 0
+
+
+async def test_resilient_client_retries_with_jitter():
+    from agentic_framework.llm.resilience import ResilientLLMClient, RetryPolicy
+
+    class Unavailable(Exception):
+        status_code = 503
+
+    class BadRequest(Exception):
+        status_code = 400
+
+    class FlakyLLM(CountingLLM):
+        def __init__(self, failures, error):
+            super().__init__()
+            self.failures, self.error = failures, error
+
+        async def generate(self, messages, **kwargs):
+            if self.failures:
+                self.failures -= 1
+                raise self.error()
+            return await super().generate(messages, **kwargs)
+
+    policy = RetryPolicy(max_attempts=3, base_delay=0.001, max_delay=0.01)
+    llm = ResilientLLMClient(FlakyLLM(2, Unavailable), retry=policy)
+    assert (await llm.generate([]))["content"] == "answer 1"
+    assert llm.stats()["retries"] == 2
+
+    llm = ResilientLLMClient(FlakyLLM(1, BadRequest), retry=policy)
+    with pytest.raises(BadRequest):
+        await llm.generate([])
+    assert llm.stats()["retries"] == 0
+
+    # Per-call timeouts are retried too
+    slow = CountingLLM(delay=1)
+    llm = ResilientLLMClient(slow, timeout=0.01, retry=policy)
+    with pytest.raises(asyncio.TimeoutError):
+        await llm.generate([])
+    assert slow.calls == 3
+
+
+async def test_resilient_client_hedges_slow_requests():
+    from agentic_framework.llm.resilience import ResilientLLMClient
+
+    class TailLLM(CountingLLM):
+        async def generate(self, messages, **kwargs):
+            self.calls += 1
+            await asyncio.sleep(1 if self.calls == 2 else 0.01)
+            return {"content": f"call {self.calls}", "tokens": 1, "cost": 0.01}
+
+    llm = ResilientLLMClient(TailLLM(), hedge=True, hedge_min_samples=1)
+    await llm.generate([])  # warm-up sample (~10ms)
+
+    start = asyncio.get_running_loop().time()
+    response = await llm.generate([])
+    assert asyncio.get_running_loop().time() - start < 0.5
+    assert response["content"] == "call 3"
+    assert llm.stats()["hedges"] == 1 and llm.stats()["hedge_wins"] == 1
+
+
+async def test_deadlines_bound_llm_calls_and_agent_tasks():
+    from agentic_framework import Agent, AgentConfig
+    from agentic_framework.core.deadline import DeadlineExceeded, deadline, remaining
+    from agentic_framework.llm.resilience import ResilientLLMClient
+
+    assert remaining() is None
+    with deadline(10):
+        with deadline(60):
+            assert remaining() <= 10
+
+    llm = ResilientLLMClient(CountingLLM(delay=1))
+    with deadline(0.02):
+        with pytest.raises(asyncio.TimeoutError):
+            await llm.generate([])
+        with pytest.raises(DeadlineExceeded):
+            await llm.generate([])
+
+    agent = Agent(
+        id="t", name="t", instructions="", tools=[], model_client=CountingLLM(delay=1),
+        config=AgentConfig(timeout_seconds=0.02),
+    )
+    result = await agent.execute("slow")
+    assert not result["success"] and "timed out" in result["error"]
+    events = [e async for e in agent.execute_stream("slow")]
+    assert events[-1]["type"] == "error" and "timed out" in events[-1]["error"]
+
+
+def test_openai_client_prices_reported_and_estimated_usage():
+    from types import SimpleNamespace
+    from agentic_framework.llm.usage import count_message_tokens, count_tokens
+
+    client = OpenAIClient(api_key="sk-test", model="gpt-4o-2024-08-06")
+    usage = SimpleNamespace(
+        prompt_tokens=1000, completion_tokens=100,
+        prompt_tokens_details=SimpleNamespace(cached_tokens=400)
+    )
+    response = client._build_response("hi", None, [], usage)
+    assert response["usage"] == {
+        "prompt_tokens": 1000, "completion_tokens": 100, "cached_tokens": 400,
+        "total_tokens": 1100, "estimated": False
+    }
+    # 600 * $2.50 + 400 * $1.25 + 100 * $10 per million
+    assert abs(response["cost"] - 0.003) < 1e-12
+
+    messages = [{"role": "user", "content": "Summarize the 10-K, please."}]
+    estimated = client._build_response("Revenue grew 12%.", None, messages)
+    assert estimated["usage"]["estimated"] is True
+    assert estimated["usage"]["prompt_tokens"] == count_message_tokens(messages) > 6
+    assert estimated["usage"]["completion_tokens"] == count_tokens("Revenue grew 12%.") > 3
+    assert estimated["cost"] > 0
+
+
+async def test_agent_reports_per_iteration_usage():
+    from agentic_framework import Agent
+    from agentic_framework.core.tool import Tool
+
+    class UsageLLM(CountingLLM):
+        async def generate(self, messages, **kwargs):
+            response = await super().generate(messages, **kwargs)
+            content = "Final answer: ok" if self.calls > 1 else "echo()"
+            usage = {"prompt_tokens": 50 * self.calls, "completion_tokens": 5, "cached_tokens": 0}
+            return {**response, "content": content, "usage": usage}
+
+    class Echo(Tool):
+        async def execute(self) -> str:
+            return "ok"
+
+    agent = Agent(
+        id="u", name="u", instructions="", tools=[Echo(name="echo")], model_client=UsageLLM()
+    )
+    for _ in range(2):  # Breakdown is per run, not cumulative
+        usage = (await agent.execute("go"))["usage"]
+        assert [(i["iteration"], i["prompt_tokens"]) for i in usage["iterations"]] == [
+            (1, 50), (2, 100)
+        ]
+        agent.model_client.calls = 0
+    assert usage["prompt_tokens"] == 150 and usage["completion_tokens"] == 10
+    assert usage["total_tokens"] == 160 and abs(usage["cost"] - 0.02) < 1e-9
@@ -0,0 +1,482 @@
+import asyncio
+import sqlite3
+
+import pytest
+
+from agentic_framework.memory.episodic import EpisodicMemory
+
+
+async def test_episodic_batches_writes_and_reads_its_own_writes(tmp_path):
+    memory = EpisodicMemory(db_path=str(tmp_path / "episodes.db"), batch_size=100)
+
+    for i in range(5):
+        await memory.store({"agent_id": "a" if i % 2 else "b", "task": f"t{i}", "content": i})
+
+    # Nothing has reached disk yet, but reads flush first
+    assert len(memory._pending) == 5
+    recent = await memory.retrieve("", k=3)
+    assert [e["content"] for e in recent] == [4, 3, 2]
+    assert [e["task"] for e in await memory.retrieve("", k=5, agent_id="a")] == ["t3", "t1"]
+
+    await memory.close()
+
+
+async def test_episodic_background_flush_and_schema(tmp_path):
+    db_path = str(tmp_path / "episodes.db")
+    memory = EpisodicMemory(db_path=db_path, flush_interval=0.01)
+
+    await memory.store({"task": "t", "content": {"x": 1}})
+    await asyncio.sleep(0.05)
+    assert memory._pending == []
+
+    await memory.close()
+
+    with sqlite3.connect(db_path) as conn:
+        assert conn.execute("PRAGMA journal_mode").fetchone()[0] == "wal"
+        indexes = {row[1] for row in conn.execute("PRAGMA index_list(episodes)")}
+        assert "idx_episodes_agent_timestamp" in indexes
+        assert conn.execute("SELECT COUNT(*) FROM episodes").fetchone()[0] == 1
+
+
+async def test_episodic_keeps_rows_when_a_flush_fails(tmp_path, monkeypatch):
+    from agentic_framework.memory import episodic
+
+    db_path = str(tmp_path / "episodes.db")
+    memory = EpisodicMemory(db_path=db_path, batch_size=100)
+    await memory.store({"task": "first", "content": 1})
+
+    def broken(rows):
+        raise sqlite3.OperationalError("database is locked")
+
+    monkeypatch.setattr(memory, "_insert_many", broken)
+    with pytest.raises(sqlite3.OperationalError):
+        await memory.flush()
+    assert len(memory._pending) == 1
+    monkeypatch.undo()
+
+    # Never closed: the exit hook still writes what is buffered
+    await memory.store({"task": "second", "content": 2})
+    episodic._flush_at_exit()
+    with sqlite3.connect(db_path) as conn:
+        tasks = [row[0] for row in conn.execute("SELECT task FROM episodes ORDER BY id")]
+    assert tasks == ["first", "second"]
+    await memory.close()
+
+
+async def test_episodic_cancelled_flush_writes_rows_once(tmp_path, monkeypatch):
+    import time
+
+    memory = EpisodicMemory(db_path=str(tmp_path / "episodes.db"), batch_size=100)
+    insert = memory._insert_many
+
+    def slow(rows):
+        time.sleep(0.1)
+        insert(rows)
+
+    monkeypatch.setattr(memory, "_insert_many", slow)
+    await memory.store({"task": "once", "content": 1})
+    with pytest.raises(asyncio.TimeoutError):
+        await asyncio.wait_for(memory.retrieve("once"), 0.02)
+    assert memory._pending == []
+
+    await memory.flush()
+    assert [e["task"] for e in await memory.retrieve("", k=5)] == ["once"]
+    await memory.close()
+
+
+async def test_episodic_full_text_retrieval(tmp_path):
+    memory = EpisodicMemory(db_path=str(tmp_path / "episodes.db"))
+    await memory.store({"agent_id": "a", "task": "AAPL fundamentals", "content": "AAPL pe ratio 28"})
+    await memory.store({"agent_id": "a", "task": "weather", "content": "sunny in Paris"})
+    await memory.store({"agent_id": "b", "task": "MSFT news", "content": "AAPL and MSFT earnings"})
+    await memory.store({"agent_id": "a", "task": "lunch", "content": "pasta", "type": "note"})
+
+    hits = await memory.retrieve("AAPL fundamentals?", k=5)
+    assert [h["task"] for h in hits] == ["AAPL fundamentals", "MSFT news"]
+    assert hits[0]["score"] > hits[1]["score"]
+
+    assert [h["task"] for h in await memory.retrieve("aapl", agent_id="b")] == ["MSFT news"]
+    assert await memory.retrieve("pasta", episode_type="experience") == []
+    assert await memory.retrieve("AAPL", since="2999-01-01") == []
+
+    blended = await memory.retrieve("AAPL", k=1, recency_weight=1.0)
+    assert blended[0]["task"] == "MSFT news"
+
+    # Stopwords alone never reach FTS; all-term matches outrank any-term ones
+    assert EpisodicMemory._query_terms("What is the AAPL P/E?") == ["aapl"]
+    assert [h["task"] for h in await memory.retrieve("the and of", k=2)] == ["lunch", "MSFT news"]
+    both = await memory.retrieve("MSFT earnings in Paris", k=2)
+    assert [h["task"] for h in both] == ["MSFT news", "weather"]
+    assert "id" not in both[0]
+
+    await memory.close()
+
+
+async def test_episodic_indexes_rows_written_before_fts(tmp_path):
+    db_path = str(tmp_path / "episodes.db")
+    with sqlite3.connect(db_path) as conn:
+        conn.execute(
+            "CREATE TABLE episodes (id INTEGER PRIMARY KEY AUTOINCREMENT, timestamp TEXT, "
+            "agent_id TEXT, task TEXT, content TEXT, type TEXT)"
+        )
+        conn.execute(
+            "INSERT INTO episodes (timestamp, agent_id, task, content, type) "
+            "VALUES ('2024-01-01T00:00:00', 'a', 'legacy task', '\"old\"', 'experience')"
+        )
+
+    memory = EpisodicMemory(db_path=db_path)
+    assert [h["content"] for h in await memory.retrieve("legacy")] == ["old"]
+    await memory.close()
+
+
+def test_numpy_vector_index_persists_and_compacts(tmp_path):
+    from agentic_framework.memory.vector_index import NumpyVectorIndex
+
+    path = str(tmp_path / "index")
+    index = NumpyVectorIndex(path, initial_capacity=2, compact_ratio=0.5)
+    index.add(
+        ["aapl", "msft", "paris", "pasta"],
+        ["apple stock earnings", "microsoft stock earnings", "paris weather", "pasta recipe"],
+        [{"n": 1}, {"n": 2}, {"n": 3}, {"n": 4}],
+    )
+
+    hits = index.query(["apple earnings", "weather in paris"], k=2)
+    assert hits[0][0]["id"] == "aapl"
+    assert hits[0][1]["id"] == "msft"
+    assert hits[1][0]["id"] == "paris"
+    assert hits[0][0]["score"] >= hits[0][1]["score"]
+
+    index.delete(["aapl"])
+    index.add(["msft"], ["microsoft cloud revenue"], [{"n": 5}])
+    assert len(index) == 3
+
+    reloaded = NumpyVectorIndex(path)
+    assert len(reloaded) == 3
+    top = reloaded.query(["microsoft cloud"], k=1)[0][0]
+    assert top["id"] == "msft" and top["metadata"] == {"n": 5}
+
+    index.delete(["msft", "pasta"])
+    assert index.count == 1  # compacted
+    assert [h["id"] for h in NumpyVectorIndex(path).query(["anything"], k=3)[0]] == ["paris"]
+
+
+def test_numpy_vector_index_survives_interrupted_writes(tmp_path):
+    import os
+    from agentic_framework.memory.vector_index import NumpyVectorIndex
+
+    path = str(tmp_path / "index")
+    index = NumpyVectorIndex(path, initial_capacity=4)
+    index.add(["a", "b"], ["apple stock", "bond yields"], [{}, {}])
+    generation = index.generation
+
+    # A compaction that died before switching the manifest is discarded
+    os.makedirs(os.path.join(path, f"gen-{generation + 1}"))
+    with open(index._file(index.IDS_FILE), "a") as f:
+        f.write('"c')  # An append that died before its commit point
+    reloaded = NumpyVectorIndex(path)
+    assert reloaded.generation == generation and len(reloaded) == 2
+    assert sorted(os.listdir(path)) == [f"gen-{generation}", "manifest.json"]
+    reloaded.add(["c"], ["cash flow"], [{"n": 3}])
+    assert NumpyVectorIndex(path).query(["cash flow"], k=1)[0][0]["metadata"] == {"n": 3}
+
+    # Row arrays that don't cover the committed ids are rejected
+    with open(reloaded._file(reloaded.OFFSETS_FILE), "r+b") as f:
+        f.truncate(8)
+    with pytest.raises(ValueError, match="inconsistent"):
+        NumpyVectorIndex(path)
+
+
+async def test_semantic_memory_numpy_backend(tmp_path):
+    from agentic_framework.memory.semantic import SemanticMemory
+
+    memory = SemanticMemory(persist_dir=str(tmp_path), backend="numpy")
+    await memory.store({"id": "1", "content": "The user prefers dividend stocks"})
+    await memory.store({"id": "2", "content": "Paris is the capital of France"})
+
+    results = await memory.retrieve("which stocks does the user prefer", k=1)
+    assert results[0]["id"] == "1"
+    assert results[0]["metadata"] == {"type": "memory"}
+
+
+async def test_semantic_memory_dedupes_ids_within_a_batch():
+    from agentic_framework.memory.semantic import SemanticMemory
+    from agentic_framework.memory.vector_index import VectorBackend
+
+    class StrictBackend(VectorBackend):
+        """Rejects repeated ids in one batch, like Chroma's add validation"""
+
+        def __init__(self):
+            self.batches = []
+
+        def add(self, ids, documents, metadatas):
+            if len(set(ids)) != len(ids):
+                raise ValueError("duplicate ids")
+            self.batches.append(list(zip(ids, documents, metadatas)))
+
+        def query(self, texts, k):
+            return [[] for _ in texts]
+
+        def delete(self, ids):
+            pass
+
+    backend = StrictBackend()
+    memory = SemanticMemory(backend=backend)
+    await memory.store_many([
+        {"content": "AAPL looks cheap", "metadata": {"agent": "a"}},
+        {"content": "MSFT looks fair"},
+        {"content": "AAPL looks cheap", "metadata": {"agent": "b"}},
+    ])
+
+    (batch,) = backend.batches
+    assert [(document, metadata) for _, document, metadata in batch] == [
+        ("AAPL looks cheap", {"agent": "b"}), ("MSFT looks fair", {"type": "memory"})
+    ]
+
+
+async def test_batching_memory_coalesces_concurrent_calls():
+    from agentic_framework.memory.batching import BatchingMemory
+    from agentic_framework.memory.simple import SimpleMemory
+
+    class CountingMemory(SimpleMemory):
+        def __init__(self):
+            super().__init__()
+            self.batches = []
+
+        async def store_many(self, memories):
+            self.batches.append(("store", len(memories)))
+            await super().store_many(memories)
+
+        async def retrieve_many(self, queries, k=5):
+            self.batches.append(("retrieve", len(queries)))
+            return [[{"query": q, "k": k}] for q in queries]
+
+    inner = CountingMemory()
+    memory = BatchingMemory(inner, window=0.01, max_batch=3)
+
+    await asyncio.gather(*(memory.store({"content": f"m{i}"}) for i in range(4)))
+    results = await asyncio.gather(memory.retrieve("a"), memory.retrieve("b"), memory.retrieve("c", k=2))
+
+    assert inner.batches == [("store", 3), ("store", 1), ("retrieve", 2), ("retrieve", 1)]
+    assert len(inner.memories) == 4
+    assert results == [[{"query": "a", "k": 5}], [{"query": "b", "k": 5}], [{"query": "c", "k": 2}]]
+
+
+async def test_episodic_and_semantic_batch_apis(tmp_path):
+    from agentic_framework.memory.semantic import SemanticMemory
+
+    episodic = EpisodicMemory(db_path=str(tmp_path / "episodes.db"))
+    await episodic.store_many([{"task": "buy AAPL"}, {"task": "sell MSFT"}])
+    hits = await episodic.retrieve_many(["AAPL", "MSFT", ""], k=5)
+    assert [[h["task"] for h in batch] for batch in hits[:2]] == [["buy AAPL"], ["sell MSFT"]]
+    assert len(hits[2]) == 2
+    await episodic.close()
+
+    semantic = SemanticMemory(persist_dir=str(tmp_path), backend="numpy")
+    await semantic.store_many([
+        {"id": "a", "content": "apple earnings beat"},
+        {"id": "b", "content": "rain in london"},
+    ])
+    batches = await semantic.retrieve_many(["apple earnings", "london rain"], k=1)
+    assert [batch[0]["id"] for batch in batches] == ["a", "b"]
+
+
+def test_cached_embedding_function_tiers(tmp_path):
+    from agentic_framework.memory.embeddings import CachedEmbeddingFunction, HashingEmbeddingFunction
+
+    calls = []
+
+    def embed(texts):
+        calls.append(list(texts))
+        return HashingEmbeddingFunction(dim=8)(texts)
+
+    disk_path = str(tmp_path / "embeddings.db")
+    cache = CachedEmbeddingFunction(embed, max_entries=2, disk_path=disk_path)
+
+    first = cache(["a b", "c d", "a b"])
+    assert calls == [["a b", "c d"]]
+    assert first.shape == (3, 8)
+    assert (first[0] == first[2]).all()
+
+    cache(["a b"])
+    cache(["e f"])  # evicts "c d" from the LRU tier
+    again = cache(["c d"])
+    assert calls == [["a b", "c d"], ["e f"]]
+    assert (again[0] == first[1]).all()
+    assert cache.stats()["disk_hits"] == 1
+    cache.close()
+
+    restarted = CachedEmbeddingFunction(embed, disk_path=disk_path)
+    restarted(["a b", "e f"])
+    assert len(calls) == 2
+    assert restarted.stats() == {
+        "hits": 0, "disk_hits": 2, "misses": 0, "size": 2, "hit_rate": 1.0
+    }
+
+
+async def test_semantic_memory_reuses_cached_embeddings(tmp_path):
+    from agentic_framework.memory.semantic import SemanticMemory
+
+    memory = SemanticMemory(persist_dir=str(tmp_path), backend="numpy")
+    await memory.store({"id": "1", "content": "analyze AAPL"})
+    await memory.retrieve("analyze AAPL")
+    await memory.retrieve("analyze AAPL")
+
+    assert memory.embedding_cache.stats()["misses"] == 1
+    assert memory.embedding_cache.stats()["hits"] == 2
+
+
+class _StubLayer:
+    def __init__(self, results, delay=0.0):
+        self.results = results
+        self.delay = delay
+        self.stored = []
+
+    async def store_many(self, memories):
+        await asyncio.sleep(self.delay)
+        self.stored.extend(memories)
+
+    async def retrieve_many(self, queries, k=5):
+        await asyncio.sleep(self.delay)
+        return [self.results[:k] for _ in queries]
+
+
+async def test_multilayer_fuses_layers_and_skips_slow_ones(tmp_path):
+    from agentic_framework.memory.multilayer import MultiLayerMemory
+    from agentic_framework.memory.procedural import ProceduralMemory
+
+    semantic = _StubLayer([{"content": "AAPL pays dividends"}, {"content": "MSFT cloud"}])
+    episodic = _StubLayer([{"content": "AAPL pays dividends", "task": "t"}], delay=0.2)
+    memory = MultiLayerMemory(
+        semantic=semantic,
+        episodic=episodic,
+        procedural=ProceduralMemory(str(tmp_path / "rules.json")),
+        layer_timeouts={"episodic": 0.05},
+    )
+    await memory.store({"content": "AAPL pays dividends"})
+
+    start = asyncio.get_running_loop().time()
+    results = await memory.retrieve("AAPL dividends", k=5)
+    assert asyncio.get_running_loop().time() - start < 0.15
+
+    # Seen in short-term and semantic layers, so it ranks first and appears once
+    assert [r["content"] for r in results] == ["AAPL pays dividends", "MSFT cloud"]
+    assert results[0]["score"] > results[1]["score"]
+
+    memory.layer_timeouts["episodic"] = 1.0
+    results = await memory.retrieve("AAPL", k=1)
+    assert results[0]["task"] == "t"
+
+
+async def test_multilayer_background_writes(tmp_path):
+    from agentic_framework.memory.multilayer import MultiLayerMemory
+    from agentic_framework.memory.procedural import ProceduralMemory
+
+    semantic, episodic = _StubLayer([], delay=0.05), _StubLayer([], delay=0.05)
+    memory = MultiLayerMemory(
+        semantic=semantic,
+        episodic=episodic,
+        procedural=ProceduralMemory(str(tmp_path / "rules.json")),
+        background_writes=True,
+    )
+
+    await memory.store({"content": "be concise", "type": "rule", "key": "style"})
+    assert semantic.stored == [] and episodic.stored == []
+
+    await memory.flush()
+    assert len(semantic.stored) == len(episodic.stored) == 1
+    assert memory.procedural.get_preference("style") == "be concise"
+
+
+async def test_simple_memory_ranks_with_bm25():
+    from agentic_framework.memory.simple import SimpleMemory
+
+    memory = SimpleMemory()
+    await memory.store({"task": "My name is Alice.", "content": "Nice to meet you"})
+    await memory.store({"task": "weather", "content": {"city": "Paris", "forecast": "rain"}})
+    await memory.store({"task": "name the capital", "content": "Paris is the capital of France"})
+
+    assert [m["task"] for m in await memory.retrieve("What is my name?")] == [
+        "My name is Alice.", "name the capital"
+    ]
+    assert [m["task"] for m in await memory.retrieve("paris capital", k=1)] == ["name the capital"]
+    assert [m["task"] for m in await memory.retrieve("rain forecast")] == ["weather"]
+    assert await memory.retrieve("xyzzy") == []
+
+
+async def test_simple_memory_eviction():
+    from agentic_framework.memory.simple import SimpleMemory
+
+    memory = SimpleMemory(max_memories=2)
+    await memory.store({"content": "alpha"})
+    await memory.store({"content": "bravo"})
+    await memory.retrieve("alpha")  # touch alpha so bravo is least recently used
+    await memory.store({"content": "charlie"})
+    assert [m["content"] for m in memory.memories] == ["alpha", "charlie"]
+    assert await memory.retrieve("bravo") == []
+
+    expiring = SimpleMemory(ttl=0.01)
+    await expiring.store({"content": "alpha"})
+    await asyncio.sleep(0.02)
+    assert await expiring.retrieve("alpha") == []
+    assert expiring.memories == []
+
+
+def test_procedural_memory_debounces_and_merges(tmp_path, monkeypatch):
+    import json
+    import time
+    from agentic_framework.memory.procedural import ProceduralMemory
+
+    path = str(tmp_path / "rules.json")
+    memory = ProceduralMemory(path, flush_interval_ms=20)
+    writes = []
+    original = memory._write_atomic
+    monkeypatch.setattr(memory, "_write_atomic", lambda data: (writes.append(data), original(data)))
+
+    memory.set_preference("tone", "formal")
+    memory.set_preference("currency", "USD")
+    context = memory.get_all_context()
+    assert context == "User Preferences / Rules:\n- tone: formal\n- currency: USD\n"
+    assert memory.get_all_context() is context
+    time.sleep(0.1)
+    assert len(writes) == 1
+
+    other = ProceduralMemory(path)
+    other.set_preference("risk", "low")
+    memory.set_preference("tone", "casual")
+    memory.flush()
+    with open(path) as f:
+        assert json.load(f) == {"tone": "casual", "currency": "USD", "risk": "low"}
+    assert memory.get_preference("risk") == "low"
+
+
+def test_procedural_memory_journal_recovery(tmp_path):
+    from agentic_framework.memory.procedural import ProceduralMemory
+
+    path = str(tmp_path / "rules.json")
+    crashed = ProceduralMemory(path, flush_interval_ms=60_000, journal=True)
+    crashed.set_preference("tone", "formal")
+    crashed._timer.cancel()  # Simulate dying before the flush
+
+    recovered = ProceduralMemory(path)
+    assert recovered.get_preference("tone") == "formal"
+    recovered.set_preference("currency", "EUR")
+    with open(recovered.journal_path) as f:
+        assert f.read() == ""
+
+
+def test_procedural_memory_exit_flush_does_not_pin_instances(tmp_path):
+    import gc
+    import weakref
+    from agentic_framework.memory import procedural
+
+    path = str(tmp_path / "rules.json")
+    memory = procedural.ProceduralMemory(path, flush_interval_ms=60_000, journal=True)
+    memory.set_preference("tone", "formal")
+    procedural._flush_at_exit()
+    with open(path) as f:
+        assert f.read().count("formal") == 1
+
+    ref = weakref.ref(memory)
+    del memory
+    gc.collect()
+    assert ref() is None
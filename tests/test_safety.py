@@ -0,0 +1,200 @@
+import asyncio
+import importlib.util
+import io
+import json
+import sys
+
+import pytest
+
+from agentic_framework.core.agent import Agent
+from agentic_framework.llm.base import BaseLLMClient
+from agentic_framework.safety import exec_server
+from agentic_framework.safety.local import LocalSandbox
+from agentic_framework.safety.pool import PooledSandbox, SandboxWorker, WorkerError, WorkerPool
+from agentic_framework.tools.python_repl import PythonREPLTool
+
+
+class InProcessWorker(SandboxWorker):
+    """Runs exec_server in-process; ``crash``/``hang`` simulate failures"""
+
+    def __init__(self):
+        self.uses = 0
+        self.namespace = {}
+
+    def execute(self, code, reset=False, timeout=None):
+        if code == "crash":
+            raise WorkerError("boom")
+        if code == "hang":
+            raise TimeoutError
+        if reset:
+            self.namespace = {}
+        return exec_server.execute(code, self.namespace)
+
+    def close(self):
+        pass
+
+
+class InProcessSandbox(PooledSandbox):
+    def _new_worker(self):
+        return InProcessWorker()
+
+    def run_code(self, code):
+        return exec_server.execute(code, {})
+
+
+class ScriptedLLM(BaseLLMClient):
+    def __init__(self, responses):
+        self.responses = list(responses)
+        self.calls = []
+
+    async def generate(self, messages, **kwargs):
+        self.calls.append(list(messages))
+        await asyncio.sleep(0.01)  # let concurrent runs interleave
+        return {"content": self.responses.pop(0), "tokens": 0, "cost": 0.0}
+
+
+def test_exec_server_protocol():
+    requests = "\n".join(json.dumps(r) for r in [
+        {"code": "x = 2\nprint(x * 21)"},
+        {"code": "print(x)"},
+        {"code": "print(x)", "reset": True},
+    ])
+    out = io.StringIO()
+    exec_server.serve(io.StringIO(requests + "\n"), out)
+
+    ready, first, second, third = [json.loads(line) for line in out.getvalue().splitlines()]
+    assert ready == {"ready": True, "isolation": []}
+    assert first == {"success": True, "output": "42\n", "error": ""}
+    assert second["output"] == "2\n"
+    assert not third["success"] and "NameError" in third["error"]
+
+
+async def test_worker_pool_sessions_and_recycling():
+    pool = WorkerPool(InProcessWorker, size=2, max_uses=3)
+    await pool.start()
+    assert pool.stats()["idle"] == 2
+
+    # Sessions keep state between calls, and sessions are isolated
+    await pool.run("total = 10", session="a")
+    await pool.run("total = 99", session="b")
+    assert (await pool.run("total += 5\nprint(total)", session="a"))["output"] == "15\n"
+
+    # The third use recycles the worker; the next call reports the reset
+    await pool.run("pass", session="a")
+    result = await pool.run("print(total)", session="a")
+    assert result["session_reset"] and not result["success"]
+
+    # Stateless calls get a worker that never ran code, and retire it
+    used = []
+    pool.factory = lambda: used.append(InProcessWorker()) or used[-1]
+    await pool.close()
+    await pool.start()
+    assert (await pool.run("y = 1"))["success"]
+    assert not (await pool.run("print(y)"))["success"]
+    await pool.run("pass", session="c")
+    assert sum(worker.uses for worker in used) == 3
+    assert all(worker.uses <= 1 for worker in used)
+
+    # Failures and timeouts discard a session's worker instead of reusing it
+    recycled = pool.stats()["recycled"]
+    assert "timed out" in (await pool.run("hang", session="b"))["error"]
+    assert pool.stats()["recycled"] == recycled + 1
+    assert "Sandbox failure" in (await pool.run("crash"))["error"]
+
+    # Idle sessions expire
+    pool.session_ttl = 0.01
+    await asyncio.sleep(0.02)
+    await pool.run("pass")
+    assert pool.stats()["sessions"] == 0
+
+    await pool.end_session("a")
+    await pool.close()
+
+
+async def test_python_repl_sessions_follow_the_agent_run():
+    sandbox = InProcessSandbox(pool_size=2)
+    tool = PythonREPLTool(sandbox=sandbox)
+    llms = {
+        name: ScriptedLLM([
+            f'python_repl("owner = {name!r}")',
+            'python_repl("print(owner)")',
+            "Final answer: done",
+        ])
+        for name in ("alice", "bob")
+    }
+    agents = [
+        Agent(id=name, name=name, instructions="", tools=[tool], model_client=llm)
+        for name, llm in llms.items()
+    ]
+
+    # Two agents share one tool concurrently without seeing each other's state
+    results = await asyncio.gather(*(agent.execute("go") for agent in agents))
+    assert all(result["success"] for result in results)
+    for name, llm in llms.items():
+        observation = llm.calls[-1][-1]["content"]
+        assert f"'output': '{name}\\n'" in observation
+
+    # Each run's session ended with the run; a new run starts fresh
+    assert sandbox.stats()["sessions"] == 0
+    llms["alice"].responses = ['python_repl("print(owner)")', "Final answer: done"]
+    await agents[0].execute("again")
+    assert "NameError" in llms["alice"].calls[-1][-1]["content"]
+    await sandbox.close()
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="needs POSIX rlimits")
+async def test_local_sandbox_limits_and_sessions():
+    # RLIMIT_CPU has one-second granularity: leave the wall clock headroom
+    sandbox = LocalSandbox(timeout=4, pool_size=1, cpu_seconds=1, memory_mb=256)
+    await sandbox.start()
+    try:
+        assert (await sandbox.arun_code("n = 6", session_id="agent"))["success"]
+        assert (await sandbox.arun_code("print(n * 7)", session_id="agent"))["output"] == "42\n"
+
+        memory = await sandbox.arun_code("blob = bytearray(1024 ** 3)")
+        assert "MemoryError" in memory["error"]
+        cpu = await sandbox.arun_code("while True: pass")
+        assert "CPULimitExceeded" in cpu["error"]
+        wall = await sandbox.arun_code("import time; time.sleep(10)")
+        assert "timed out" in wall["error"]
+
+        # The session survived the failing stateless runs
+        assert (await sandbox.arun_code("print(n)", session_id="agent"))["output"] == "6\n"
+    finally:
+        await sandbox.close()
+
+
+@pytest.mark.skipif(sys.platform == "win32", reason="needs POSIX rlimits")
+async def test_local_sandbox_refuses_missing_isolation():
+    if importlib.util.find_spec("seccomp") is not None:
+        pytest.skip("seccomp bindings are installed")
+    with pytest.raises(ValueError):
+        LocalSandbox(require_isolation=("chroot",))
+
+    sandbox = LocalSandbox(pool_size=1, require_isolation=("seccomp",))
+    try:
+        result = await sandbox.arun_code("print('ran')")
+        assert not result["success"]
+        assert "isolation unavailable: seccomp" in result["error"]
+    finally:
+        await sandbox.close()
+
+
+@pytest.mark.docker
+async def test_docker_sandbox_handshake_and_sessions():
+    docker = pytest.importorskip("docker")
+    try:
+        docker.from_env().ping()
+    except Exception:
+        pytest.skip("no Docker daemon")
+    from agentic_framework.safety.sandbox import DockerSandbox
+
+    sandbox = DockerSandbox(pool_size=1, timeout=60)
+    try:
+        await sandbox.start()
+        assert sandbox.stats()["idle"] == 1
+        assert (await sandbox.arun_code("n = 6", session_id="agent"))["success"]
+        assert (await sandbox.arun_code("print(n * 7)", session_id="agent"))["output"] == "42\n"
+        assert "NameError" in (await sandbox.arun_code("print(n)"))["error"]
+    finally:
+        await sandbox.close()
@@ -0,0 +1,173 @@
+import asyncio
+
+import numpy as np
+
+from agentic_framework.tools.finance import FundamentalAnalysisTool
+from agentic_framework.tools.market_data import MarketDataCache, StaticDataSource
+
+FIXTURES = {
+    "AAPL": {
+        "info": {"symbol": "AAPL", "shortName": "Apple Inc.", "currentPrice": 230.1},
+        "news": [{"title": "Apple ships", "publisher": "Wire", "link": "http://x"}],
+        "statements": {
+            "balance_sheet": {"2024-09-30": {"Total Assets": 3.65e11}},
+            "income_statement": {"2024-09-30": {"Total Revenue": 3.91e11}},
+            "cash_flow": {"2024-09-30": {"Free Cash Flow": 1.08e11}},
+        },
+    },
+    "MSFT": {
+        "info": {"symbol": "MSFT", "shortName": "Microsoft", "currentPrice": 415.0},
+        "news": [],
+    },
+}
+
+
+async def test_fundamental_analysis_caches_fields_with_ttls(tmp_path):
+    source = StaticDataSource(FIXTURES, latency=0.01)
+    db_path = str(tmp_path / "market.db")
+    tool = FundamentalAnalysisTool(source=source, cache_path=db_path)
+
+    first = await tool.execute("aapl", detailed=True)
+    assert first["shortName"] == "Apple Inc."
+    assert first["income_statement"] == {
+        "periods": ["2024-09-30"], "metrics": ["Total Revenue"], "values": [[3.91e11]]
+    }
+    assert first["recent_news"][0]["title"] == "Apple ships"
+    await tool.execute("AAPL")
+    assert source.calls == {("AAPL", "info"): 1, ("AAPL", "news"): 1, ("AAPL", "statements"): 1}
+
+    # Expired quotes are refetched while statements stay cached
+    tool.cache.ttls["info"] = 0
+    stats = tool.cache.stats()
+    await tool.execute("AAPL", detailed=True)
+    assert source.calls[("AAPL", "info")] == 2 and source.calls[("AAPL", "statements")] == 1
+    # The stale quote counts as one miss, not one per cache tier consulted
+    assert tool.cache.stats()["misses"] == stats["misses"] + 1
+
+    # A new process reuses the on-disk tier
+    restarted = StaticDataSource(FIXTURES)
+    tool = FundamentalAnalysisTool(source=restarted, cache=MarketDataCache(db_path=db_path))
+    assert (await tool.execute("AAPL", detailed=True))["currentPrice"] == 230.1
+    assert restarted.calls == {}
+
+
+async def test_market_data_memory_hits_never_wait_on_sqlite(tmp_path):
+    import time
+
+    cache = MarketDataCache(db_path=str(tmp_path / "market.db"))
+    cache.set("AAPL", "info", {"symbol": "AAPL"})
+    conn = cache._conn
+
+    class SlowConnection:
+        def execute(self, *args):
+            time.sleep(0.2)
+            return conn.execute(*args)
+
+        def __enter__(self):
+            return conn.__enter__()
+
+        def __exit__(self, *exc):
+            return conn.__exit__(*exc)
+
+    cache._conn = SlowConnection()
+    write = asyncio.ensure_future(asyncio.to_thread(cache.set, "MSFT", "info", {}))
+    await asyncio.sleep(0.02)
+    started = time.perf_counter()
+    assert cache.get("AAPL", "info", load=False) == {"symbol": "AAPL"}
+    assert time.perf_counter() - started < 0.1
+    await write
+    cache._conn = conn
+    cache.close()
+
+
+async def test_fundamental_analysis_execute_many_dedupes():
+    source = StaticDataSource(FIXTURES, latency=0.03)
+    tool = FundamentalAnalysisTool(source=source)
+
+    start = asyncio.get_running_loop().time()
+    results = await tool.execute_many(["AAPL", "msft", "aapl", "NOPE"], detailed=True)
+    elapsed = asyncio.get_running_loop().time() - start
+
+    assert list(results) == ["AAPL", "MSFT", "NOPE"]
+    assert elapsed < 0.2  # 9 fetches, concurrently (serially they take 0.27s)
+    assert results["MSFT"]["financials_error"].startswith("Could not retrieve")
+    assert "recent_news" not in results["MSFT"]
+    assert results["NOPE"] == {"error": "Analysis failed for NOPE: No data for NOPE"}
+    assert source.calls[("AAPL", "info")] == 1
+
+
+def test_statement_table_encoding_and_selection():
+    from agentic_framework.tools.statements import StatementTable
+
+    nested = {
+        "2024-09-30": {"Total Revenue": 391035000000.0, "Net Income": 93736000000.0,
+                       "Operating Revenue": 391035000000.0},
+        "2023-09-30": {"Total Revenue": 383285000000.0, "Net Income": float("nan")},
+    }
+    table = StatementTable.from_periods(nested)
+
+    assert table.metrics == ["Total Revenue", "Net Income", "Operating Revenue"]
+    assert table.to_dict()["values"][1] == [9.3736e10, None]
+
+    # Metric names are written once instead of once per period
+    wide = {
+        f"202{y}-09-30": {f"Statement Line Item {m}": 1234567.0 * (m + y) for m in range(20)}
+        for y in range(4)
+    }
+    assert len(str(StatementTable.from_periods(wide).to_dict())) < len(str(wide)) * 0.6
+
+    revenue = table.select(["revenue"])
+    assert revenue.metrics == ["Total Revenue", "Operating Revenue"]
+    assert revenue.to_csv().splitlines() == [
+        "metric,2024-09-30,2023-09-30",
+        "Total Revenue,3.91035e+11,3.83285e+11",
+        "Operating Revenue,3.91035e+11,",
+    ]
+    assert revenue.render("markdown").splitlines()[:2] == [
+        "| metric | 2024-09-30 | 2023-09-30 |", "|---|---|---|"
+    ]
+
+
+async def test_fundamental_analysis_metric_selection():
+    tool = FundamentalAnalysisTool(source=StaticDataSource(FIXTURES))
+
+    result = await tool.execute("AAPL", detailed=True, metrics=["cash"], table_format="csv")
+
+    assert result["cash_flow"] == "metric,2024-09-30\nFree Cash Flow,1.08e+11"
+    assert "balance_sheet" not in result and "income_statement" not in result
+
+
+def test_fundamental_analysis_function_schema():
+    tool = FundamentalAnalysisTool(source=StaticDataSource(FIXTURES))
+
+    properties = tool.function_schema()["function"]["parameters"]["properties"]
+
+    assert properties["metrics"] == {"type": "array", "items": {"type": "string"}}
+    assert properties["ticker"] == {"type": "string"}
+
+
+async def test_fundamental_analysis_rejects_unknown_table_format():
+    source = StaticDataSource(FIXTURES)
+    tool = FundamentalAnalysisTool(source=source)
+
+    result = await tool.execute("AAPL", detailed=True, table_format="xml")
+    assert "Unknown table_format 'xml'" in result["error"]
+
+    many = await tool.execute_many(["AAPL", "MSFT"], table_format="xml")
+    assert set(many) == {"AAPL", "MSFT"} and all("error" in r for r in many.values())
+    assert sum(source.calls.values()) == 0
+
+
+async def test_market_data_disk_tier_keeps_numeric_types(tmp_path):
+    db_path = str(tmp_path / "market.db")
+    info = {
+        "symbol": "AAPL", "marketCap": np.int64(3_400_000_000_000),
+        "beta": np.float64(1.24), "dividendYield": float("nan"), "shortable": np.bool_(True),
+    }
+    source = StaticDataSource({"AAPL": {"info": info, "news": []}})
+    await FundamentalAnalysisTool(source=source, cache_path=db_path).execute("AAPL")
+
+    reloaded = MarketDataCache(db_path=db_path).get("AAPL", "info")
+    assert reloaded["marketCap"] == 3_400_000_000_000 and isinstance(reloaded["marketCap"], int)
+    assert reloaded["beta"] == 1.24 and reloaded["shortable"] is True
+    assert np.isnan(reloaded["dividendYield"])